@@ -12,90 +12,10 @@ db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 
-def init_db(app):
-    """Inicializa o banco de dados e cria o usuário admin se necessário"""
-    with app.app_context():
-        try:
-            # Criar todas as tabelas
-            db.create_all()
-            print("Tabelas criadas com sucesso!")
-            
-            # Verificar e criar usuário admin
-            from app.models import User
-            admin = User.query.filter_by(username='admin').first()
-            if not admin:
-                admin = User(
-                    username='admin',
-                    email='admin@example.com',
-                    is_admin=True
-                )
-                admin.set_password('admin123')
-                db.session.add(admin)
-                db.session.commit()
-                print("Usuário admin criado com sucesso!")
-                
-            # Verificar e criar dados iniciais se necessário
-            from app.models import Potencia, Rito, Grau, Sessao, Oriente
-            
-            # Verificar potências
-            if Potencia.query.count() == 0:
-                potencias = [
-                    Potencia(nome='Grande Oriente do Brasil', sigla='GOB'),
-                    Potencia(nome='Grande Loja Maçônica do Brasil', sigla='GLMB'),
-                    Potencia(nome='Grande Loja Maçônica do Estado de São Paulo', sigla='GLMESP')
-                ]
-                db.session.bulk_save_objects(potencias)
-                print("Potências iniciais criadas com sucesso!")
-            
-            # Verificar ritos
-            if Rito.query.count() == 0:
-                ritos = [
-                    Rito(nome='Rito Escocês Antigo e Aceito', descricao='Rito mais praticado no Brasil'),
-                    Rito(nome='Rito Brasileiro', descricao='Rito criado no Brasil'),
-                    Rito(nome='Rito de York', descricao='Rito praticado em algumas potências')
-                ]
-                db.session.bulk_save_objects(ritos)
-                print("Ritos iniciais criadas com sucesso!")
-            
-            # Verificar graus
-            if Grau.query.count() == 0:
-                graus = [
-                    Grau(numero=1, descricao='Aprendiz'),
-                    Grau(numero=2, descricao='Companheiro'),
-                    Grau(numero=3, descricao='Mestre')
-                ]
-                db.session.bulk_save_objects(graus)
-                print("Graus iniciais criadas com sucesso!")
-            
-            # Verificar sessões
-            if Sessao.query.count() == 0:
-                sessoes = [
-                    Sessao(descricao='Sessão Magna'),
-                    Sessao(descricao='Sessão Branca'),
-                    Sessao(descricao='Sessão de Instrução')
-                ]
-                db.session.bulk_save_objects(sessoes)
-                print("Sessões iniciais criadas com sucesso!")
-            
-            # Verificar orientes
-            if Oriente.query.count() == 0:
-                orientes = [
-                    Oriente(nome='São Paulo', uf='SP'),
-                    Oriente(nome='Rio de Janeiro', uf='RJ'),
-                    Oriente(nome='Minas Gerais', uf='MG')
-                ]
-                db.session.bulk_save_objects(orientes)
-                print("Orientés iniciais criados com sucesso!")
-            
-            db.session.commit()
-            print("Banco de dados inicializado com sucesso!")
-            
-        except Exception as e:
-            print(f"Erro ao inicializar banco de dados: {str(e)}")
-            db.session.rollback()
-
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
+    if config:
+        app.config.update(config)
     
     # Configurações
     basedir = os.path.abspath(os.path.dirname(__file__))
@@ -103,21 +23,21 @@ def create_app():
     if not os.path.exists(instance_path):
         os.makedirs(instance_path, mode=0o777)
     
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(instance_path, "app.db")}'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'sua_chave_secreta_aqui')
-    app.config['JWT_TOKEN_LOCATION'] = ['headers']
-    app.config['JWT_HEADER_NAME'] = 'Authorization'
-    app.config['JWT_HEADER_TYPE'] = 'Bearer'
-    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
-    app.config['JWT_ERROR_MESSAGE_KEY'] = 'error'
-    app.config['JWT_IDENTITY_CLAIM'] = 'sub'
-    app.config['JWT_ALGORITHM'] = 'HS256'
-    app.config['JWT_DECODE_ALGORITHMS'] = ['HS256']
-    app.config['JWT_QUERY_STRING_NAME'] = 'token'
-    app.config['JWT_COOKIE_CSRF_PROTECT'] = False
-    app.config['JWT_CSRF_CHECK_FORM'] = False
-    app.config['UPLOAD_FOLDER'] = 'uploads'
+    # Padrões; o que vier em ``config`` prevalece
+    app.config.setdefault('JWT_SECRET_KEY', os.environ.get('JWT_SECRET_KEY', 'sua_chave_secreta_aqui'))
+    app.config.setdefault('JWT_TOKEN_LOCATION', ['headers'])
+    app.config.setdefault('JWT_HEADER_NAME', 'Authorization')
+    app.config.setdefault('JWT_HEADER_TYPE', 'Bearer')
+    app.config.setdefault('JWT_ACCESS_TOKEN_EXPIRES', timedelta(minutes=int(os.environ.get('JWT_ACCESS_TOKEN_MINUTES', 15))))
+    app.config.setdefault('JWT_REFRESH_TOKEN_EXPIRES', timedelta(days=int(os.environ.get('JWT_REFRESH_TOKEN_DAYS', 30))))
+    app.config.setdefault('JWT_ERROR_MESSAGE_KEY', 'error')
+    app.config.setdefault('JWT_IDENTITY_CLAIM', 'sub')
+    app.config.setdefault('JWT_ALGORITHM', 'HS256')
+    app.config.setdefault('JWT_DECODE_ALGORITHMS', ['HS256'])
+    app.config.setdefault('JWT_QUERY_STRING_NAME', 'token')
+    app.config.setdefault('JWT_COOKIE_CSRF_PROTECT', False)
+    app.config.setdefault('JWT_CSRF_CHECK_FORM', False)
+    app.config.setdefault('UPLOAD_FOLDER', 'uploads')
     
     # Configurar CORS - Permitir todas as origens durante o desenvolvimento
     CORS(app, resources={
@@ -130,13 +50,35 @@ def create_app():
         }
     })
     
+    # Logs primeiro, para que o request id exista nos demais hooks
+    from app.utils import compressao, logs, serializacao
+    logs.init_app(app)
+    serializacao.init_app(app)
+    compressao.init_app(app)
+    
     # Inicializar extensões
-    db.init_app(app)
-    migrate.init_app(app, db)
+    from app.config import database
+    database.init_app(app, instance_path)
     jwt.init_app(app)
     
+    from app.utils import auth, certificados, jobs, limites, orientes, revogacao, senhas
+    from app.utils.autocompletar import autocompletar
+    from app.utils.cache import reference_cache
+    auth.init_app(app)
+    revogacao.init_app(app)
+    senhas.init_app(app)
+    limites.init_app(app)
+    orientes.init_app(app)
+    certificados.init_app(app, instance_path)
+    jobs.init_app(app, instance_path)
+    reference_cache.init_app(app)
+    autocompletar.init_app(app)
+    
+    from app import commands
+    commands.init_app(app)
+    
     # Registrar blueprints
-    from app.routes import auth_bp, loja_bp, potencia_bp, rito_bp, visita_bp, sessao_bp, grau_bp, oriente_bp
+    from app.routes import auth_bp, loja_bp, potencia_bp, rito_bp, visita_bp, sessao_bp, grau_bp, oriente_bp, lookup_bp, stats_bp, busca_bp, autocomplete_bp, job_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(loja_bp)
@@ -146,21 +88,10 @@ def create_app():
     app.register_blueprint(sessao_bp)
     app.register_blueprint(grau_bp)
     app.register_blueprint(oriente_bp)
-    
-    # Inicializar banco de dados
-    init_db(app)
-    
-    # Cria as tabelas se não existirem
-    with app.app_context():
-        db.create_all()
-        
-        # Adiciona a coluna user_id se não existir
-        try:
-            db.engine.execute('ALTER TABLE lojas ADD COLUMN user_id INTEGER REFERENCES users(id)')
-        except Exception as e:
-            print(f"Coluna user_id já existe ou erro ao adicionar: {str(e)}")
-        
-        # Inicializa dados básicos
-        from app.models import User, Potencia, Rito, Grau
+    app.register_blueprint(lookup_bp)
+    app.register_blueprint(stats_bp)
+    app.register_blueprint(busca_bp)
+    app.register_blueprint(autocomplete_bp)
+    app.register_blueprint(job_bp)
     
     return app 
\ No newline at end of file
@@ -0,0 +1,151 @@
+import click
+from flask.cli import AppGroup, with_appcontext
+
+stats_cli = AppGroup('stats', help='Estatísticas de visitas.')
+search_cli = AppGroup('search', help='Índices de busca textual.')
+orientes_cli = AppGroup('orientes', help='Manutenção dos orientes.')
+
+# Dados iniciais de cada tabela de referência, inseridos só se ela estiver vazia
+DADOS_INICIAIS = {
+    'potencias': [
+        {'nome': 'Grande Oriente do Brasil', 'sigla': 'GOB'},
+        {'nome': 'Grande Loja Maçônica do Brasil', 'sigla': 'GLMB'},
+        {'nome': 'Grande Loja Maçônica do Estado de São Paulo', 'sigla': 'GLMESP'}
+    ],
+    'ritos': [
+        {'nome': 'Rito Escocês Antigo e Aceito', 'descricao': 'Rito mais praticado no Brasil'},
+        {'nome': 'Rito Brasileiro', 'descricao': 'Rito criado no Brasil'},
+        {'nome': 'Rito de York', 'descricao': 'Rito praticado em algumas potências'}
+    ],
+    'graus': [
+        {'numero': 1, 'descricao': 'Aprendiz'},
+        {'numero': 2, 'descricao': 'Companheiro'},
+        {'numero': 3, 'descricao': 'Mestre'}
+    ],
+    'sessoes': [
+        {'descricao': 'Sessão Magna'},
+        {'descricao': 'Sessão Branca'},
+        {'descricao': 'Sessão de Instrução'}
+    ],
+    'orientes': [
+        {'nome': 'São Paulo', 'uf': 'SP'},
+        {'nome': 'Rio de Janeiro', 'uf': 'RJ'},
+        {'nome': 'Minas Gerais', 'uf': 'MG'}
+    ]
+}
+
+def seed_db(admin_password='admin123'):
+    """Cria o usuário admin e os dados iniciais que ainda não existem.
+
+    O esquema é responsabilidade das migrações (``flask db upgrade``).
+    Retorna os nomes das coleções semeadas.
+    """
+    from app import db
+    from app.models import User, Potencia, Rito, Grau, Sessao, Oriente
+    from app.utils.cache import reference_cache
+
+    modelos = {
+        'potencias': Potencia,
+        'ritos': Rito,
+        'graus': Grau,
+        'sessoes': Sessao,
+        'orientes': Oriente
+    }
+    semeadas = []
+
+    if not db.session.query(User.id).filter_by(username='admin').first():
+        admin = User(username='admin', email='admin@example.com', is_admin=True)
+        admin.set_password(admin_password)
+        db.session.add(admin)
+        semeadas.append('admin')
+
+    for nome, registros in DADOS_INICIAIS.items():
+        modelo = modelos[nome]
+        if db.session.query(modelo.id).first() is None:
+            db.session.add_all(modelo(**registro) for registro in registros)
+            # Invalida o cache de referência dos demais workers
+            reference_cache.invalidate(nome)
+            semeadas.append(nome)
+
+    db.session.commit()
+    return semeadas
+
+@click.command('seed')
+@click.option('--admin-password', envvar='ADMIN_PASSWORD', default='admin123',
+              help='Senha do usuário admin, caso ele ainda não exista.')
+@with_appcontext
+def seed(admin_password):
+    """Cria o usuário admin e os dados iniciais."""
+    semeadas = seed_db(admin_password)
+    if semeadas:
+        click.echo(f"Dados iniciais criados: {', '.join(semeadas)}")
+    else:
+        click.echo('Banco de dados já inicializado.')
+
+@stats_cli.command('rebuild')
+def stats_rebuild():
+    """Recalcula as estatísticas a partir das visitas."""
+    from app.utils import estatisticas
+    estatisticas.rebuild()
+    click.echo('Estatísticas recalculadas com sucesso!')
+
+@search_cli.command('rebuild')
+def search_rebuild():
+    """Recria os índices de busca a partir dos dados existentes."""
+    from app.utils import busca
+    if not busca.disponivel():
+        click.echo('Busca textual indisponível neste banco; nada a fazer.')
+        return
+    busca.rebuild()
+    click.echo('Índices de busca recriados com sucesso!')
+
+@orientes_cli.command('merge')
+@click.option('--dry-run', is_flag=True, help='Só lista o que seria unido.')
+def orientes_merge(dry_run):
+    """Une orientes duplicados (mesmo nome sem acentos e UF)."""
+    from app.utils import orientes
+    mesclas, chaves = orientes.mesclar_duplicados(aplicar=not dry_run)
+    for mantido, removidos in mesclas:
+        click.echo(f"Oriente {mantido} <- {', '.join(map(str, removidos))}")
+    if dry_run:
+        click.echo(f'{len(mesclas)} grupos de duplicados, {chaves} chaves desatualizadas (nada foi alterado).')
+    else:
+        click.echo(f'{len(mesclas)} grupos de duplicados unidos, {chaves} chaves recalculadas.')
+
+@click.command('worker')
+@click.option('--threads', default=1, show_default=True, help='Jobs executados em paralelo.')
+@click.option('--burst', is_flag=True, help='Sai quando não houver mais jobs prontos.')
+@with_appcontext
+def worker(threads, burst):
+    """Executa os jobs em segundo plano (use JOBS_EMBUTIDO=0 nos processos web)."""
+    import threading
+    from flask import current_app
+    from app.utils import jobs
+
+    app = current_app._get_current_object()
+    parar = threading.Event()
+    workers = [
+        threading.Thread(target=jobs.trabalhar, name=f'worker-{i}', daemon=True, kwargs={
+            'app': app, 'worker': jobs.nome_worker(f':{i}'), 'burst': burst, 'parar': parar
+        })
+        for i in range(threads)
+    ]
+    click.echo(f"Worker de jobs iniciado ({threads} thread(s), tipos: {', '.join(sorted(jobs.TAREFAS))})")
+    for thread in workers:
+        thread.start()
+    try:
+        for thread in workers:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        click.echo('Encerrando: aguardando os jobs em execução...')
+        parar.set()
+        for thread in workers:
+            thread.join()
+
+def init_app(app):
+    app.cli.add_command(seed)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(orientes_cli)
+    app.cli.add_command(worker)
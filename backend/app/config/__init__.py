@@ -1,6 +1,6 @@
 from app.config.database import init_app as init_db
 from app.config.jwt import init_app as init_jwt
 
-def init_app(app):
-    init_db(app)
-    init_jwt(app) 
\ No newline at end of file
+def init_app(app, instance_path):
+    init_db(app, instance_path)
+    init_jwt(app) 
@@ -1,20 +1,95 @@
 import os
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 
-db = SQLAlchemy()
-migrate = Migrate()
+def _normalizar_url(url):
+    # Heroku e afins ainda exportam o esquema antigo postgres://
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
 
-def init_app(app: Flask):
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+def _configurar(app: Flask, instance_path):
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', _normalizar_url(os.environ.get(
         'DATABASE_URL',
-        'sqlite:///masonic_visits.db'
+        f'sqlite:///{os.path.join(instance_path, "app.db")}'
+    )))
+    app.config.setdefault('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+    app.config.setdefault('DB_POOL_SIZE', int(os.environ.get('DB_POOL_SIZE', 10)))
+    app.config.setdefault('DB_MAX_OVERFLOW', int(os.environ.get('DB_MAX_OVERFLOW', 20)))
+    app.config.setdefault('DB_POOL_TIMEOUT', int(os.environ.get('DB_POOL_TIMEOUT', 30)))
+    app.config.setdefault('DB_POOL_RECYCLE', int(os.environ.get('DB_POOL_RECYCLE', 1800)))
+    app.config.setdefault('SQLITE_BUSY_TIMEOUT', 5000)  # ms
+    app.config.setdefault('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+    app.config.setdefault('SQLITE_CACHE_SIZE', -20000)  # negativo = KiB
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', opcoes_engine(app.config['SQLALCHEMY_DATABASE_URI'], app.config))
+
+def opcoes_engine(uri, config):
+    """Opções de pool e de conexão para o create_engine conforme o banco"""
+    url = make_url(uri)
+
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # O Flask-SQLAlchemy já usa StaticPool para bancos em memória
+            return {}
+        return {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_pre_ping': True,
+            'connect_args': {
+                # O pool entrega a conexão a outras threads; o busy_timeout
+                # faz o SQLite esperar pelo lock em vez de falhar de imediato
+                'check_same_thread': False,
+                'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000
+            }
+        }
+
+    opcoes = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+        'pool_use_lifo': True
+    }
+    if url.get_backend_name() == 'postgresql':
+        opcoes['connect_args'] = {'connect_timeout': 10, 'application_name': 'visitas'}
+    return opcoes
+
+def _pragmas(config):
+    """PRAGMAs aplicados em toda conexão SQLite aberta pelo pool"""
+    return (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT'])),
+        ('mmap_size', int(config['SQLITE_MMAP_SIZE'])),
+        ('cache_size', int(config['SQLITE_CACHE_SIZE'])),
+        ('foreign_keys', 'ON')
     )
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    
+
+def _registrar_pragmas(engine, config):
+    pragmas = _pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for nome, valor in pragmas:
+                cursor.execute(f'PRAGMA {nome}={valor}')
+        finally:
+            cursor.close()
+
+def init_app(app: Flask, instance_path):
+    from app import db, migrate
+    from app.utils import busca
+
+    _configurar(app, instance_path)
     db.init_app(app)
-    migrate.init_app(app, db)
-    
+    # Os índices FTS são mantidos pela migração 0004, fora dos modelos
+    migrate.init_app(app, db, render_as_batch=True, include_name=busca.incluir_nome)
+
     with app.app_context():
-        db.create_all() 
\ No newline at end of file
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                _registrar_pragmas(engine, app.config)
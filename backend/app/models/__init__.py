@@ -6,5 +6,10 @@ from app.models.visita import Visita
 from app.models.sessao import Sessao
 from app.models.grau import Grau
 from app.models.oriente import Oriente
+from app.models.versao_referencia import VersaoReferencia
+from app.models.estatistica_visita import EstatisticaVisita
+from app.models.token_revogado import TokenRevogado
+from app.models.certificado import Certificado
+from app.models.job import Job
 
-__all__ = ['User', 'Loja', 'Potencia', 'Rito', 'Visita', 'Sessao', 'Grau', 'Oriente'] 
\ No newline at end of file
+__all__ = ['User', 'Loja', 'Potencia', 'Rito', 'Visita', 'Sessao', 'Grau', 'Oriente', 'VersaoReferencia', 'EstatisticaVisita', 'TokenRevogado', 'Certificado', 'Job'] 
\ No newline at end of file
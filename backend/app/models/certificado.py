@@ -0,0 +1,20 @@
+from app import db
+
+class Certificado(db.Model):
+    """Arquivo de certificado digitalizado, endereçado pelo sha256 do conteúdo.
+
+    Visitas com o mesmo arquivo apontam para a mesma linha e o mesmo arquivo em disco.
+    """
+    __tablename__ = 'certificados'
+    
+    sha256 = db.Column(db.String(64), primary_key=True)
+    content_type = db.Column(db.String(50), nullable=False)
+    tamanho = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def to_dict(self):
+        return {
+            'sha256': self.sha256,
+            'content_type': self.content_type,
+            'tamanho': self.tamanho
+        }
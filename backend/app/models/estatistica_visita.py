@@ -0,0 +1,10 @@
+from app import db
+
+class EstatisticaVisita(db.Model):
+    """Contagem de visitas por usuário em cada faixa (mês, loja, potência, grau, rito...)"""
+    __tablename__ = 'estatisticas_visitas'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    dimensao = db.Column(db.String(30), primary_key=True)
+    chave = db.Column(db.String(30), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
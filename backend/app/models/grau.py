@@ -1,4 +1,5 @@
 from app import db
+from app.utils.serializacao import serializador
 
 class Grau(db.Model):
     __tablename__ = 'graus'
@@ -14,4 +15,6 @@ class Grau(db.Model):
             'id': self.id,
             'numero': self.numero,
             'descricao': self.descricao
-        } 
\ No newline at end of file
+        }
+
+Grau.to_json = serializador(Grau, ('id', 'numero', 'descricao'))
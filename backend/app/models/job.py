@@ -0,0 +1,48 @@
+from app import db
+
+class Job(db.Model):
+    """Tarefa demorada executada em segundo plano (exportação, importação, recálculos).
+
+    A própria tabela é a fila: os workers reservam a próxima linha pendente
+    com um UPDATE condicional e renovam ``heartbeat`` enquanto executam.
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_fila', 'status', 'executar_apos'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default='pendente')
+    parametros = db.Column(db.JSON, nullable=False, default=dict)
+    resultado = db.Column(db.JSON)
+    erro = db.Column(db.Text)
+    progresso = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    max_tentativas = db.Column(db.Integer, nullable=False, default=3)
+    cancelar = db.Column(db.Boolean, nullable=False, default=False)
+    executar_apos = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    worker = db.Column(db.String(100))
+    heartbeat = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    iniciado_em = db.Column(db.DateTime)
+    concluido_em = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'status': self.status,
+            'progresso': self.progresso,
+            'total': self.total,
+            'resultado': self.resultado,
+            'erro': self.erro,
+            'tentativas': self.tentativas,
+            'max_tentativas': self.max_tentativas,
+            'cancelamento_solicitado': self.cancelar,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'concluido_em': self.concluido_em.isoformat() if self.concluido_em else None
+        }
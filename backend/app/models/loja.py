@@ -1,7 +1,19 @@
 from app import db
+from app.models.oriente import Oriente
+from app.models.potencia import Potencia
+from app.models.rito import Rito
+from app.utils.serializacao import serializador
+from app.utils.sql import agora_utc
 
 class Loja(db.Model):
     __tablename__ = 'lojas'
+    __table_args__ = (
+        # Listagem por dono ordenada por id e checagens de FK ao remover orientes
+        db.Index('ix_lojas_user_id_id', 'user_id', 'id'),
+        db.Index('ix_lojas_oriente_id', 'oriente_id'),
+        # Validador do ETag da listagem: count, max(id) e max(updated_at) só pelo índice
+        db.Index('ix_lojas_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), nullable=False)
@@ -11,7 +23,7 @@ class Loja(db.Model):
     oriente_id = db.Column(db.Integer, db.ForeignKey('orientes.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), default=agora_utc, onupdate=agora_utc)
 
     potencia = db.relationship('Potencia', backref=db.backref('lojas', lazy=True))
     rito = db.relationship('Rito', backref=db.backref('lojas', lazy=True))
@@ -30,4 +42,10 @@ class Loja(db.Model):
             'potencia': self.potencia.to_dict() if self.potencia else None,
             'rito': self.rito.to_dict() if self.rito else None,
             'oriente': self.oriente.to_dict() if self.oriente else None
-        } 
\ No newline at end of file
+        }
+
+Loja.to_json = serializador(
+    Loja,
+    ('id', 'nome', 'numero', 'potencia_id', 'rito_id', 'oriente_id', 'user_id', 'potencia', 'rito', 'oriente'),
+    potencia=Potencia.to_json, rito=Rito.to_json, oriente=Oriente.to_json
+)
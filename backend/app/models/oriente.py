@@ -1,17 +1,37 @@
+from sqlalchemy.orm import validates
 from app import db
+from app.utils.serializacao import serializador
+from app.utils.texto import normalizar
+
+def chave_oriente(nome, uf):
+    """Chave de unicidade: "São  Paulo"/"sp" e "Sao Paulo"/"SP" são o mesmo oriente"""
+    return f"{normalizar(nome)}|{str(uf or '').strip().upper()}"
 
 class Oriente(db.Model):
     __tablename__ = 'orientes'
-    
+    __table_args__ = (
+        db.Index('uq_orientes_chave', 'chave', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), nullable=False)
     uf = db.Column(db.String(2), nullable=False)
+    chave = db.Column(db.String(110), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
+    @validates('nome', 'uf')
+    def _atualizar_chave(self, campo, valor):
+        nome = valor if campo == 'nome' else self.nome
+        uf = valor if campo == 'uf' else self.uf
+        self.chave = chave_oriente(nome, uf)
+        return valor
+
     def to_dict(self):
         return {
             'id': self.id,
             'nome': self.nome,
             'uf': self.uf
-        } 
\ No newline at end of file
+        }
+
+Oriente.to_json = serializador(Oriente, ('id', 'nome', 'uf'))
@@ -1,4 +1,5 @@
 from app import db
+from app.utils.serializacao import serializador
 
 class Potencia(db.Model):
     __tablename__ = 'potencias'
@@ -14,4 +15,6 @@ class Potencia(db.Model):
             'id': self.id,
             'nome': self.nome,
             'sigla': self.sigla
-        } 
\ No newline at end of file
+        }
+
+Potencia.to_json = serializador(Potencia, ('id', 'nome', 'sigla'))
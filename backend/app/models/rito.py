@@ -1,4 +1,5 @@
 from app import db
+from app.utils.serializacao import serializador
 
 class Rito(db.Model):
     __tablename__ = 'ritos'
@@ -14,4 +15,6 @@ class Rito(db.Model):
             'id': self.id,
             'nome': self.nome,
             'descricao': self.descricao
-        } 
\ No newline at end of file
+        }
+
+Rito.to_json = serializador(Rito, ('id', 'nome', 'descricao'))
@@ -1,4 +1,5 @@
 from app import db
+from app.utils.serializacao import serializador
 
 class Sessao(db.Model):
     __tablename__ = 'sessoes'
@@ -12,4 +13,6 @@ class Sessao(db.Model):
         return {
             'id': self.id,
             'descricao': self.descricao
-        } 
\ No newline at end of file
+        }
+
+Sessao.to_json = serializador(Sessao, ('id', 'descricao'))
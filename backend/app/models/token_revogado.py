@@ -0,0 +1,12 @@
+from app import db
+
+class TokenRevogado(db.Model):
+    """Tokens JWT revogados antes de expirar (logout), fonte da lista de revogação"""
+    __tablename__ = 'tokens_revogados'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    tipo = db.Column(db.String(10), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    expira_em = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
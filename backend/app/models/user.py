@@ -1,5 +1,5 @@
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils import senhas
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -7,16 +7,16 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = senhas.gerar_hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return senhas.verificar(self.password_hash, password)
 
     def to_dict(self):
         return {
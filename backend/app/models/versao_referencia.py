@@ -0,0 +1,8 @@
+from app import db
+
+class VersaoReferencia(db.Model):
+    """Contador de versão por tabela de referência, compartilhado entre processos"""
+    __tablename__ = 'versoes_referencia'
+    
+    nome = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
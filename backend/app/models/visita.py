@@ -1,7 +1,26 @@
 from app import db
+from app.models.grau import Grau
+from app.models.loja import Loja
+from app.models.potencia import Potencia
+from app.models.rito import Rito
+from app.models.sessao import Sessao
+from app.utils.serializacao import serializador
+from app.utils.sql import agora_utc
 
 class Visita(db.Model):
     __tablename__ = 'visitas'
+    __table_args__ = (
+        # Índices da listagem paginada por (data_visita, id), com e sem filtros
+        db.Index('ix_visitas_data_visita_id', 'data_visita', 'id'),
+        db.Index('ix_visitas_user_data_visita_id', 'user_id', 'data_visita', 'id'),
+        db.Index('ix_visitas_loja_data_visita_id', 'loja_id', 'data_visita', 'id'),
+        db.Index('ix_visitas_potencia_data_visita_id', 'potencia_id', 'data_visita', 'id'),
+        db.Index('ix_visitas_grau_data_visita_id', 'grau_id', 'data_visita', 'id'),
+        db.Index('ix_visitas_rito_data_visita_id', 'rito_id', 'data_visita', 'id'),
+        db.Index('ix_visitas_sessao_data_visita_id', 'sessao_id', 'data_visita', 'id'),
+        # Validador do ETag da listagem: count, max(id) e max(updated_at) só pelo índice
+        db.Index('ix_visitas_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     data_visita = db.Column(db.Date, nullable=False)
@@ -16,9 +35,10 @@ class Visita(db.Model):
     data_entrega_certificado = db.Column(db.Date)
     certificado_scaniado = db.Column(db.Boolean, default=False)
     observacoes = db.Column(db.Text)
+    certificado_sha256 = db.Column(db.String(64), db.ForeignKey('certificados.sha256'), index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), default=agora_utc, onupdate=agora_utc)
 
     loja = db.relationship('Loja', backref=db.backref('visitas', lazy=True))
     sessao = db.relationship('Sessao', backref=db.backref('visitas', lazy=True))
@@ -42,10 +62,19 @@ class Visita(db.Model):
             'data_entrega_certificado': self.data_entrega_certificado.isoformat() if self.data_entrega_certificado else None,
             'certificado_scaniado': self.certificado_scaniado,
             'observacoes': self.observacoes,
+            'certificado_sha256': self.certificado_sha256,
             'user_id': self.user_id,
             'loja': self.loja.to_dict() if self.loja else None,
             'sessao': self.sessao.to_dict() if self.sessao else None,
             'grau': self.grau.to_dict() if self.grau else None,
             'rito': self.rito.to_dict() if self.rito else None,
             'potencia': self.potencia.to_dict() if self.potencia else None
-        } 
\ No newline at end of file
+        }
+
+Visita.to_json = serializador(
+    Visita,
+    ('id', 'data_visita', 'loja_id', 'sessao_id', 'grau_id', 'rito_id', 'potencia_id', 'prancha_presenca',
+     'possui_certificado', 'registro_loja', 'data_entrega_certificado', 'certificado_scaniado', 'observacoes',
+     'certificado_sha256', 'user_id', 'loja', 'sessao', 'grau', 'rito', 'potencia'),
+    loja=Loja.to_json, sessao=Sessao.to_json, grau=Grau.to_json, rito=Rito.to_json, potencia=Potencia.to_json
+)
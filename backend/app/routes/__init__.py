@@ -6,5 +6,10 @@ from app.routes.visita_routes import bp as visita_bp
 from app.routes.sessao_routes import bp as sessao_bp
 from app.routes.grau_routes import bp as grau_bp
 from app.routes.oriente_routes import bp as oriente_bp
+from app.routes.lookup_routes import bp as lookup_bp
+from app.routes.stats_routes import bp as stats_bp
+from app.routes.busca_routes import bp as busca_bp
+from app.routes.autocomplete_routes import bp as autocomplete_bp
+from app.routes.job_routes import bp as job_bp
 
-__all__ = ['auth_bp', 'loja_bp', 'potencia_bp', 'rito_bp', 'visita_bp', 'sessao_bp', 'grau_bp', 'oriente_bp'] 
\ No newline at end of file
+__all__ = ['auth_bp', 'loja_bp', 'potencia_bp', 'rito_bp', 'visita_bp', 'sessao_bp', 'grau_bp', 'oriente_bp', 'lookup_bp', 'stats_bp', 'busca_bp', 'autocomplete_bp', 'job_bp'] 
\ No newline at end of file
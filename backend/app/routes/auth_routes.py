@@ -1,9 +1,26 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import (create_access_token, create_refresh_token, current_user, decode_token,
+                                jwt_required, get_jwt, get_jwt_identity)
 from app.models import User
 from app import db
+from app.utils.auth import access_token_claims
+from app.utils import limites, senhas
+import logging
 
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
+logger = logging.getLogger(__name__)
+
+def _fila_senhas_cheia():
+    logger.warning('Fila de hashes de senha cheia')
+    response = jsonify({'error': 'Servidor ocupado, tente novamente em instantes'})
+    response.headers['Retry-After'] = str(current_app.config['PASSWORD_HASH_RETRY_AFTER'])
+    return response, 503
+
+def _muitas_tentativas(espera):
+    logger.warning('Login bloqueado para %s por %.0fs', request.remote_addr, espera)
+    response = jsonify({'error': 'Muitas tentativas de login, tente novamente mais tarde'})
+    response.headers['Retry-After'] = limites.retry_after(espera)
+    return response, 429
 
 @bp.route('/register', methods=['POST', 'OPTIONS'])
 def register():
@@ -40,6 +57,9 @@ def register():
         db.session.commit()
         
         return jsonify({'message': 'Usuário criado com sucesso'}), 201
+    except senhas.FilaSenhasCheia:
+        db.session.rollback()
+        return _fila_senhas_cheia()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
@@ -51,52 +71,112 @@ def login():
         
     try:
         if not request.is_json:
-            print("Requisição não contém JSON")
+            logger.debug('Requisição não contém JSON')
             return jsonify({'error': 'O conteúdo deve ser JSON'}), 400
             
         data = request.get_json()
-        print(f"Dados recebidos no login: {data}")
         
         if not data:
-            print("Nenhum dado recebido")
+            logger.debug('Nenhum dado recebido')
             return jsonify({'error': 'Dados não fornecidos'}), 400
             
         if 'username' not in data or 'password' not in data:
-            print("Campos obrigatórios não fornecidos")
+            logger.debug('Campos obrigatórios não fornecidos')
             return jsonify({'error': 'Username e password são obrigatórios'}), 400
+        
+        # Admissão antes de qualquer consulta ou hash
+        limitador = current_app.extensions['limite_login']
+        chaves = limites.limites_login(current_app, data['username'], request.remote_addr)
+        espera = limitador.tentar(chaves)
+        if espera:
+            return _muitas_tentativas(espera)
             
         user = User.query.filter_by(username=data['username']).first()
-        print(f"Usuário encontrado: {user.username if user else 'Não encontrado'}")
+        logger.debug('Usuário encontrado: %s', user.username if user else 'Não encontrado')
         
         if not user:
-            print("Usuário não encontrado")
+            logger.debug('Usuário não encontrado')
             return jsonify({'error': 'Usuário ou senha inválidos'}), 401
             
-        print(f"Verificando senha para o usuário: {user.username}")
-        print(f"Hash da senha armazenada: {user.password_hash}")
-        print(f"Senha fornecida: {data['password']}")
+        logger.debug('Verificando senha para o usuário: %s', user.username)
         
         if not user.check_password(data['password']):
-            print("Senha inválida")
+            logger.info('Senha inválida para o usuário %s', user.username)
             return jsonify({'error': 'Usuário ou senha inválidos'}), 401
         
-        access_token = create_access_token(identity=str(user.id))
-        print(f"Token gerado: {access_token}")
+        limitador.sucesso(chaves)
+        
+        # Atualiza hashes gerados com um custo antigo enquanto a senha está à mão
+        if senhas.precisa_rehash(user.password_hash):
+            user.set_password(data['password'])
+            db.session.commit()
+            logger.info('Hash de senha atualizado para o usuário %s', user.username)
+        
+        access_token = create_access_token(
+            identity=str(user.id),
+            additional_claims=access_token_claims(user)
+        )
+        refresh_token = create_refresh_token(
+            identity=str(user.id),
+            additional_claims=access_token_claims(user)
+        )
         
         user_dict = user.to_dict()
-        print(f"Dados do usuário: {user_dict}")
         
         response = jsonify({
             'access_token': access_token,
+            'refresh_token': refresh_token,
             'user': user_dict
         })
         
-        print(f"Resposta enviada: {response.get_json()}")
         return response, 200
+    except senhas.FilaSenhasCheia:
+        db.session.rollback()
+        return _fila_senhas_cheia()
     except Exception as e:
-        print(f"Erro no login: {str(e)}")
+        logger.exception('Erro no login')
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """Emite um novo access token a partir do refresh token, sem verificar senha"""
+    access_token = create_access_token(
+        identity=str(current_user.id),
+        additional_claims=access_token_claims(current_user)
+    )
+    return jsonify({'access_token': access_token})
+
+@bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Revoga o token enviado e, se informado no corpo, o refresh token da sessão"""
+    revogacao = current_app.extensions['revogacao']
+    dados = get_jwt()
+    tokens = [dados]
+    
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            dados_refresh = decode_token(refresh_token)
+        except Exception:
+            return jsonify({'error': 'Refresh token inválido'}), 400
+        if dados_refresh['sub'] != dados['sub'] or dados_refresh['type'] != 'refresh':
+            return jsonify({'error': 'Refresh token inválido'}), 400
+        if not revogacao.contem(dados_refresh['jti']):
+            tokens.append(dados_refresh)
+    
+    try:
+        for token in tokens:
+            revogacao.revogar(token)
+        db.session.commit()
+        logger.info('Logout do usuário %s', dados['sub'])
+        return jsonify({'message': 'Logout realizado com sucesso'})
+    except Exception:
+        db.session.rollback()
+        logger.exception('Erro ao revogar tokens')
+        return jsonify({'error': 'Erro ao realizar logout'}), 500
+
 @bp.route('/me', methods=['GET', 'OPTIONS'])
 @jwt_required(locations=['headers'], fresh=False)
 def get_current_user():
@@ -105,19 +185,18 @@ def get_current_user():
         
     try:
         user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
+        logger.debug('ID do usuário obtido do token: %s', user_id)
         
         user = db.session.get(User, user_id)
-        print(f"Usuário encontrado: {user}")
+        logger.debug('Usuário encontrado: %s', user)
         
         if not user:
-            print("Usuário não encontrado no banco de dados")
+            logger.debug('Usuário não encontrado no banco de dados')
             return jsonify({'error': 'Usuário não encontrado'}), 404
             
         user_dict = user.to_dict()
-        print(f"Dados do usuário: {user_dict}")
         
         return jsonify(user_dict)
     except Exception as e:
-        print(f"Erro ao obter usuário atual: {str(e)}")
+        logger.exception('Erro ao obter usuário atual')
         return jsonify({'error': str(e)}), 422 
\ No newline at end of file
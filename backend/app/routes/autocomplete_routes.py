@@ -0,0 +1,43 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, current_user
+from app.utils.autocompletar import autocompletar
+import logging
+
+bp = Blueprint('autocomplete', __name__, url_prefix='/api/autocomplete')
+logger = logging.getLogger(__name__)
+
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 50
+
+def _parametros():
+    limite = min(max(int(request.args.get('limite', LIMITE_PADRAO)), 1), LIMITE_MAXIMO)
+    return request.args.get('q', ''), limite
+
+@bp.route('/lojas', methods=['GET'], strict_slashes=False)
+@jwt_required()
+def autocomplete_lojas():
+    """Lojas (id, nome, número) cujo nome, palavra do nome ou número começa com q"""
+    try:
+        try:
+            prefixo, limite = _parametros()
+        except ValueError:
+            return jsonify({'error': 'Parâmetro limite deve ser um valor inteiro'}), 400
+        user = current_user
+        return jsonify(autocompletar.lojas(prefixo, limite, None if user.is_admin else user.id))
+    except Exception as e:
+        logger.exception('Erro ao autocompletar lojas')
+        return jsonify({'error': 'Erro ao autocompletar lojas'}), 500
+
+@bp.route('/orientes', methods=['GET'], strict_slashes=False)
+@jwt_required()
+def autocomplete_orientes():
+    """Orientes (id, nome, uf) cujo nome ou palavra do nome começa com q"""
+    try:
+        try:
+            prefixo, limite = _parametros()
+        except ValueError:
+            return jsonify({'error': 'Parâmetro limite deve ser um valor inteiro'}), 400
+        return jsonify(autocompletar.orientes(prefixo, limite))
+    except Exception as e:
+        logger.exception('Erro ao autocompletar orientes')
+        return jsonify({'error': 'Erro ao autocompletar orientes'}), 500
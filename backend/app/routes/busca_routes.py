@@ -0,0 +1,64 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, current_user
+from app.models import Visita, Loja, Oriente
+from app.routes.loja_routes import CARREGAMENTO_LOJA
+from app.routes.visita_routes import CARREGAMENTO_LISTA
+from app.utils import busca
+import logging
+
+bp = Blueprint('busca', __name__, url_prefix='/api/search')
+logger = logging.getLogger(__name__)
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 50
+
+# Tipo -> (índice, modelo, opções de carregamento, restrito ao dono)
+TIPOS = {
+    'visitas': ('busca_visitas', Visita, CARREGAMENTO_LISTA, True),
+    'lojas': ('busca_lojas', Loja, CARREGAMENTO_LOJA, True),
+    'orientes': ('busca_orientes', Oriente, (), False)
+}
+
+def _carregar(modelo, opcoes, ids):
+    """Carrega os objetos preservando a ordem de relevância dos ids"""
+    if not ids:
+        return []
+    objetos = {objeto.id: objeto for objeto in modelo.query.options(*opcoes).filter(modelo.id.in_(ids))}
+    return [objetos[id_].to_dict() for id_ in ids if id_ in objetos]
+
+@bp.route('', methods=['GET'], strict_slashes=False)
+@jwt_required()
+def search():
+    """Busca textual em visitas, lojas e orientes.
+
+    Parâmetros: q (palavras ou prefixos, sem distinção de acentos),
+    tipos (lista separada por vírgulas; padrão todos) e limite por tipo.
+    """
+    try:
+        consulta = request.args.get('q', '')
+        if busca.expressao(consulta) is None:
+            return jsonify({'error': 'O parâmetro q é obrigatório'}), 400
+
+        try:
+            limite = min(max(int(request.args.get('limite', LIMITE_PADRAO)), 1), LIMITE_MAXIMO)
+        except ValueError:
+            return jsonify({'error': 'Parâmetro limite deve ser um valor inteiro'}), 400
+
+        tipos = [tipo.strip() for tipo in request.args.get('tipos', ','.join(TIPOS)).split(',') if tipo.strip()]
+        invalidos = [tipo for tipo in tipos if tipo not in TIPOS]
+        if invalidos:
+            return jsonify({'error': f"Tipos inválidos: {', '.join(invalidos)}"}), 400
+
+        user = current_user
+        resultado = {}
+        for tipo in tipos:
+            indice, modelo, opcoes, restrito = TIPOS[tipo]
+            user_id = user.id if restrito and not user.is_admin else None
+            ids = busca.buscar_ids(indice, consulta, limite, user_id)
+            resultado[tipo] = _carregar(modelo, opcoes, ids)
+
+        logger.debug('Busca %r: %s', consulta, {tipo: len(itens) for tipo, itens in resultado.items()})
+        return jsonify(resultado)
+    except Exception as e:
+        logger.exception('Erro na busca')
+        return jsonify({'error': 'Erro na busca'}), 500
@@ -0,0 +1,91 @@
+from flask import Blueprint, current_app, jsonify, request, send_file
+from flask_jwt_extended import jwt_required, current_user
+from app.models import Job
+from app import db
+from app.utils import jobs
+import logging
+import os
+
+bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+logger = logging.getLogger(__name__)
+
+LIMITE_LISTAGEM = 50
+
+def _job_do_usuario(id):
+    query = Job.query.filter_by(id=id)
+    if not current_user.is_admin:
+        query = query.filter_by(user_id=current_user.id)
+    return query.first_or_404()
+
+def resposta_aceita(job):
+    """Resposta 202 de uma operação que virou job, com o endereço do status"""
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response
+
+@bp.route('', methods=['POST'], strict_slashes=False)
+@jwt_required()
+def create_job():
+    """Enfileira um job e retorna 202 na hora; o andamento fica em GET /api/jobs/<id>"""
+    data = request.get_json(silent=True) or {}
+    tipo = data.get('tipo')
+    tarefa = jobs.TAREFAS.get(tipo)
+    if tarefa is None or not tarefa.api:
+        return jsonify({'error': 'Tipo de job inválido'}), 400
+    if tarefa.admin and not current_user.is_admin:
+        return jsonify({'error': 'Acesso negado'}), 403
+
+    parametros = data.get('parametros') or {}
+    if not isinstance(parametros, dict):
+        return jsonify({'error': 'parametros deve ser um objeto'}), 400
+    if tarefa.validar:
+        try:
+            parametros = tarefa.validar(parametros)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    job = jobs.enfileirar(tipo, parametros, user_id=current_user.id)
+    logger.info('Job %s (%s) enfileirado', job.id, tipo)
+    return resposta_aceita(job)
+
+@bp.route('', methods=['GET'], strict_slashes=False)
+@jwt_required()
+def get_jobs():
+    """Últimos jobs do usuário"""
+    lista = (Job.query.filter_by(user_id=current_user.id)
+             .order_by(Job.id.desc())
+             .limit(LIMITE_LISTAGEM)
+             .all())
+    return jsonify([job.to_dict() for job in lista])
+
+@bp.route('/<int:id>', methods=['GET'], strict_slashes=False)
+@jwt_required()
+def get_job(id):
+    return jsonify(_job_do_usuario(id).to_dict())
+
+@bp.route('/<int:id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_job(id):
+    """Cancela o job; um job em execução para no próximo ponto de progresso"""
+    job = _job_do_usuario(id)
+    encontrado = None if job.status in jobs.TERMINAIS else jobs.cancelar(job)
+    if encontrado is None:
+        return jsonify({'error': f'Job já finalizado ({job.status})'}), 409
+    # O worker pode terminar o cancelamento antes da resposta; o código diz o que foi feito aqui
+    return jsonify(job.to_dict()), 202 if encontrado == 'executando' else 200
+
+@bp.route('/<int:id>/resultado', methods=['GET'])
+@jwt_required()
+def get_job_resultado(id):
+    """Baixa o arquivo gerado por um job concluído (exportações)"""
+    job = _job_do_usuario(id)
+    arquivo = (job.resultado or {}).get('arquivo') if job.status == 'concluido' else None
+    if not arquivo:
+        return jsonify({'error': 'Job sem arquivo de resultado'}), 404
+    caminho = os.path.join(current_app.config['JOBS_DIR'], os.path.basename(arquivo))
+    if not os.path.exists(caminho):
+        return jsonify({'error': 'Arquivo do resultado não está mais disponível'}), 410
+    db.session.rollback()
+    return send_file(caminho, mimetype=job.resultado.get('content_type'), as_attachment=True,
+                     download_name=job.resultado.get('download_name', os.path.basename(arquivo)))
@@ -1,145 +1,141 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Loja, User, Potencia, Rito, Oriente
+from flask_jwt_extended import jwt_required, current_user
+from sqlalchemy.orm import joinedload
+from app.models import Loja
 from app import db
+from app.utils import condicional, orientes, serializacao
+from app.utils.cache import reference_cache
 import logging
 
 bp = Blueprint('lojas', __name__, url_prefix='/api/lojas')
+logger = logging.getLogger(__name__)
+
+# Potência, rito e oriente são muitos-para-um: vêm no mesmo SELECT da loja
+CARREGAMENTO_LOJA = (
+    joinedload(Loja.potencia),
+    joinedload(Loja.rito),
+    joinedload(Loja.oriente)
+)
+
+# Coleções do reference_cache que entram aninhadas na listagem (ETag)
+COLECOES_ANINHADAS = ('potencias', 'ritos', 'orientes')
+
+def _carregar_loja(id):
+    return Loja.query.options(*CARREGAMENTO_LOJA).filter_by(id=id).first()
 
 @bp.route('', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_lojas():
     try:
-        print("Listando lojas...")
-        user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
+        logger.debug('Listando lojas...')
+        user = current_user
+
+        # Nada mudou no escopo do usuário: 304 sem carregar nenhuma linha
+        etag = condicional.etag(Loja, user, COLECOES_ANINHADAS)
+        nao_modificado = condicional.nao_modificado(etag)
+        if nao_modificado is not None:
+            return nao_modificado
             
         # Se for admin, retorna todas as lojas
+        query = Loja.query.options(*CARREGAMENTO_LOJA)
         if user.is_admin:
-            lojas = Loja.query.all()
+            lojas = query.all()
         else:
             # Se não for admin, retorna apenas as lojas do usuário
-            lojas = Loja.query.filter_by(user_id=user_id).all()
+            lojas = query.filter_by(user_id=user.id).all()
             
-        print(f"Encontradas {len(lojas)} lojas")
-        return jsonify([loja.to_dict() for loja in lojas])
+        logger.debug('Encontradas %s lojas', len(lojas))
+        return condicional.com_etag(serializacao.resposta(serializacao.lista(Loja.to_json, lojas)), etag)
     except Exception as e:
-        print(f"Erro ao listar lojas: {str(e)}")
+        logger.exception('Erro ao listar lojas')
         return jsonify({'error': 'Erro ao listar lojas'}), 500
 
 @bp.route('/<int:id>', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_loja(id):
     try:
-        print(f"Buscando loja com ID {id}")
-        user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
+        logger.debug('Buscando loja com ID %s', id)
+        user = current_user
             
-        loja = Loja.query.get(id)
+        loja = _carregar_loja(id)
         if not loja:
-            print(f"Loja com ID {id} não encontrada")
+            logger.debug('Loja com ID %s não encontrada', id)
             return jsonify({'error': 'Loja não encontrada'}), 404
             
         # Verificar se o usuário é admin ou se a loja pertence ao usuário
-        if not user.is_admin and loja.user_id != user_id:
-            print("Usuário não tem permissão para ver esta loja")
+        if not user.is_admin and loja.user_id != user.id:
+            logger.debug('Usuário não tem permissão para ver esta loja')
             return jsonify({'error': 'Você não tem permissão para ver esta loja'}), 403
             
         return jsonify(loja.to_dict())
     except Exception as e:
-        print(f"Erro ao buscar loja: {str(e)}")
+        logger.exception('Erro ao buscar loja')
         return jsonify({'error': 'Erro ao buscar loja'}), 500
 
 @bp.route('', methods=['POST'], strict_slashes=False)
 @jwt_required()
 def create_loja():
     try:
-        print("Recebendo requisição POST para /api/lojas")
+        logger.debug('Recebendo requisição POST para /api/lojas')
         data = request.get_json()
-        print(f"Dados recebidos: {data}")
+        logger.debug('Dados recebidos: %s', data)
         
         # Validar campos obrigatórios
         if not data.get('nome'):
-            print("Campo nome não fornecido")
+            logger.debug('Campo nome não fornecido')
             return jsonify({'error': 'O campo nome é obrigatório'}), 400
         if not data.get('numero'):
-            print("Campo numero não fornecido")
+            logger.debug('Campo numero não fornecido')
             return jsonify({'error': 'O campo numero é obrigatório'}), 400
         if not data.get('potencia_id'):
-            print("Campo potencia_id não fornecido")
+            logger.debug('Campo potencia_id não fornecido')
             return jsonify({'error': 'O campo potencia_id é obrigatório'}), 400
         if not data.get('rito_id'):
-            print("Campo rito_id não fornecido")
+            logger.debug('Campo rito_id não fornecido')
             return jsonify({'error': 'O campo rito_id é obrigatório'}), 400
         if not data.get('oriente_nome'):
-            print("Campo oriente_nome não fornecido")
+            logger.debug('Campo oriente_nome não fornecido')
             return jsonify({'error': 'O campo oriente_nome é obrigatório'}), 400
         if not data.get('oriente_uf'):
-            print("Campo oriente_uf não fornecido")
+            logger.debug('Campo oriente_uf não fornecido')
             return jsonify({'error': 'O campo oriente_uf é obrigatório'}), 400
         
         # Verificar se potência existe
-        potencia = Potencia.query.get(data['potencia_id'])
+        potencia = reference_cache.get('potencias', int(data['potencia_id']))
         if not potencia:
-            print(f"Potência com ID {data['potencia_id']} não encontrada")
+            logger.debug('Potência com ID %s não encontrada', data['potencia_id'])
             return jsonify({'error': 'Potência não encontrada'}), 404
         
         # Verificar se rito existe
-        rito = Rito.query.get(data['rito_id'])
+        rito = reference_cache.get('ritos', int(data['rito_id']))
         if not rito:
-            print(f"Rito com ID {data['rito_id']} não encontrado")
+            logger.debug('Rito com ID %s não encontrado', data['rito_id'])
             return jsonify({'error': 'Rito não encontrado'}), 404
         
-        # Criar ou encontrar oriente
-        oriente = Oriente.query.filter_by(
-            nome=data['oriente_nome'],
-            uf=data['oriente_uf']
-        ).first()
-        
-        if not oriente:
-            print(f"Criando novo oriente: {data['oriente_nome']} - {data['oriente_uf']}")
-            oriente = Oriente(
-                nome=data['oriente_nome'],
-                uf=data['oriente_uf']
-            )
-            db.session.add(oriente)
-            db.session.flush()  # Para obter o ID do oriente
-        
-        # Obter o ID do usuário do token
-        user_id = get_jwt_identity()
+        # Criar ou encontrar oriente pela chave normalizada
+        oriente_id = orientes.obter_ou_criar(data['oriente_nome'], data['oriente_uf'])
         
         # Criar loja
-        print("Criando nova loja")
+        logger.debug('Criando nova loja')
         loja = Loja(
             nome=data['nome'],
             numero=data['numero'],
             potencia_id=data['potencia_id'],
             rito_id=data['rito_id'],
-            oriente_id=oriente.id,
-            user_id=user_id
+            oriente_id=oriente_id,
+            user_id=current_user.id
         )
         
         db.session.add(loja)
+        # Os índices de autocompletar das lojas seguem a mesma versão compartilhada
+        reference_cache.invalidate('lojas')
         db.session.commit()
-        print(f"Loja criada com sucesso: {loja.to_dict()}")
+        loja = _carregar_loja(loja.id)
+        logger.info('Loja criada com sucesso (id %s)', loja.id)
         
         return jsonify(loja.to_dict()), 201
     except Exception as e:
-        print(f"Erro ao criar loja: {str(e)}")
+        logger.exception('Erro ao criar loja')
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
@@ -147,18 +143,14 @@ def create_loja():
 @jwt_required()
 def update_loja(id):
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuário não encontrado'}), 404
+        user = current_user
             
         loja = Loja.query.get(id)
         if not loja:
             return jsonify({'error': 'Loja não encontrada'}), 404
             
         # Verificar se o usuário é admin ou se a loja pertence ao usuário
-        if not user.is_admin and loja.user_id != user_id:
+        if not user.is_admin and loja.user_id != user.id:
             return jsonify({'error': 'Você não tem permissão para atualizar esta loja'}), 403
             
         data = request.get_json()
@@ -178,39 +170,29 @@ def update_loja(id):
             return jsonify({'error': 'O campo oriente_uf é obrigatório'}), 400
         
         # Verificar se potência existe
-        potencia = Potencia.query.get(data['potencia_id'])
+        potencia = reference_cache.get('potencias', int(data['potencia_id']))
         if not potencia:
             return jsonify({'error': 'Potência não encontrada'}), 404
         
         # Verificar se rito existe
-        rito = Rito.query.get(data['rito_id'])
+        rito = reference_cache.get('ritos', int(data['rito_id']))
         if not rito:
             return jsonify({'error': 'Rito não encontrado'}), 404
         
-        # Criar ou encontrar oriente
-        oriente = Oriente.query.filter_by(
-            nome=data['oriente_nome'],
-            uf=data['oriente_uf']
-        ).first()
-        
-        if not oriente:
-            oriente = Oriente(
-                nome=data['oriente_nome'],
-                uf=data['oriente_uf']
-            )
-            db.session.add(oriente)
-            db.session.flush()  # Para obter o ID do oriente
+        # Criar ou encontrar oriente pela chave normalizada
+        oriente_id = orientes.obter_ou_criar(data['oriente_nome'], data['oriente_uf'])
         
         # Atualizar loja
         loja.nome = data['nome']
         loja.numero = data['numero']
         loja.potencia_id = data['potencia_id']
         loja.rito_id = data['rito_id']
-        loja.oriente_id = oriente.id
+        loja.oriente_id = oriente_id
+        reference_cache.invalidate('lojas')
         
         db.session.commit()
         
-        return jsonify(loja.to_dict())
+        return jsonify(_carregar_loja(loja.id).to_dict())
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
@@ -219,33 +201,26 @@ def update_loja(id):
 @jwt_required()
 def delete_loja(id):
     try:
-        user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
+        user = current_user
         
         loja = Loja.query.get(id)
         if not loja:
-            print(f"Loja com ID {id} não encontrada")
+            logger.debug('Loja com ID %s não encontrada', id)
             return jsonify({'error': 'Loja não encontrada'}), 404
             
         # Verificar se o usuário é admin ou se a loja pertence ao usuário
-        if not user.is_admin and loja.user_id != user_id:
-            print("Usuário não tem permissão para deletar esta loja")
+        if not user.is_admin and loja.user_id != user.id:
+            logger.debug('Usuário não tem permissão para deletar esta loja')
             return jsonify({'error': 'Você não tem permissão para deletar esta loja'}), 403
             
-        print(f"Deletando loja: {loja.to_dict()}")
+        logger.debug('Deletando loja %s', loja.id)
         db.session.delete(loja)
+        reference_cache.invalidate('lojas')
         db.session.commit()
-        print("Loja deletada com sucesso")
+        logger.info('Loja deletada com sucesso')
         
         return jsonify({'message': 'Loja deletada com sucesso'})
     except Exception as e:
-        print(f"Erro ao deletar loja: {str(e)}")
+        logger.exception('Erro ao deletar loja')
         db.session.rollback()
         return jsonify({'error': 'Erro ao deletar loja'}), 500 
\ No newline at end of file
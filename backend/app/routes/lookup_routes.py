@@ -0,0 +1,62 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, current_user
+from app.models import Loja
+from app.routes.loja_routes import CARREGAMENTO_LOJA, COLECOES_ANINHADAS
+from app.utils import condicional
+from app.utils.cache import reference_cache
+import hashlib
+import logging
+
+bp = Blueprint('lookups', __name__, url_prefix='/api/lookups')
+logger = logging.getLogger(__name__)
+
+COLECOES = ('lojas', 'sessoes', 'graus', 'ritos', 'potencias', 'orientes')
+
+def _calcular_etag(nomes, user):
+    """Calcula a versão combinada das coleções pedidas.
+
+    As tabelas de referência usam a versão do cache; as lojas, que dependem
+    do usuário, contribuem com count, max(id) e max(updated_at) do escopo e
+    com as versões das coleções que entram aninhadas em cada loja.
+    """
+    versionadas = {nome for nome in nomes if nome != 'lojas'}
+    if 'lojas' in nomes:
+        versionadas.update(COLECOES_ANINHADAS)
+    partes = ['|'.join(nomes)]
+    partes.extend(f'{nome}={reference_cache.version(nome)}' for nome in sorted(versionadas))
+
+    if 'lojas' in nomes:
+        partes.append('admin' if user.is_admin else str(user.id))
+        partes.extend(str(valor) for valor in condicional.versao_escopo(Loja, user))
+
+    return hashlib.sha1('|'.join(partes).encode()).hexdigest()
+
+def _carregar(nome, user):
+    if nome != 'lojas':
+        return reference_cache.all(nome)
+    query = Loja.query.options(*CARREGAMENTO_LOJA)
+    if not user.is_admin:
+        query = query.filter(Loja.user_id == user.id)
+    return [loja.to_dict() for loja in query.order_by(Loja.id).all()]
+
+@bp.route('', methods=['GET'], strict_slashes=False)
+@jwt_required()
+def get_lookups():
+    """Retorna as coleções de referência pedidas em ?include= em uma só resposta"""
+    try:
+        user = current_user
+        include = request.args.get('include')
+        nomes = [nome.strip() for nome in include.split(',') if nome.strip()] if include else list(COLECOES)
+        invalidos = [nome for nome in nomes if nome not in COLECOES]
+        if invalidos:
+            return jsonify({'error': f"Coleções inválidas: {', '.join(invalidos)}"}), 400
+        nomes = sorted(set(nomes))
+
+        etag = _calcular_etag(nomes, user)
+        nao_modificado = condicional.nao_modificado(etag)
+        if nao_modificado is not None:
+            return nao_modificado
+        return condicional.com_etag(jsonify({nome: _carregar(nome, user) for nome in nomes}), etag)
+    except Exception as e:
+        logger.exception('Erro ao carregar coleções de referência')
+        return jsonify({'error': 'Erro ao carregar coleções de referência'}), 500
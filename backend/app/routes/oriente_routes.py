@@ -1,201 +1,155 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Oriente, User
+from flask_jwt_extended import jwt_required
+from app.models import Oriente
 from app import db
+from app.utils.auth import admin_required
+from app.utils.cache import reference_cache
 import logging
 
 bp = Blueprint('orientes', __name__, url_prefix='/api/orientes')
+logger = logging.getLogger(__name__)
 
 @bp.route('', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_orientes():
     try:
-        print("Listando orientes...")
-        user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
-            
-        orientes = Oriente.query.all()
-        print(f"Encontrados {len(orientes)} orientes")
-        return jsonify([oriente.to_dict() for oriente in orientes])
+        logger.debug('Listando orientes...')
+        orientes = reference_cache.all('orientes')
+        logger.debug('Encontrados %s orientes', len(orientes))
+        return jsonify(orientes)
     except Exception as e:
-        print(f"Erro ao listar orientes: {str(e)}")
+        logger.exception('Erro ao listar orientes')
         return jsonify({'error': 'Erro ao listar orientes'}), 500
 
 @bp.route('/<int:id>', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_oriente(id):
     try:
-        print(f"Buscando oriente com ID {id}")
-        user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
-            
-        oriente = Oriente.query.get(id)
+        logger.debug('Buscando oriente com ID %s', id)
+        oriente = reference_cache.get('orientes', id)
         if not oriente:
-            print(f"Oriente com ID {id} não encontrado")
+            logger.debug('Oriente com ID %s não encontrado', id)
             return jsonify({'error': 'Oriente não encontrado'}), 404
-        return jsonify(oriente.to_dict())
+        return jsonify(oriente)
     except Exception as e:
-        print(f"Erro ao buscar oriente: {str(e)}")
+        logger.exception('Erro ao buscar oriente')
         return jsonify({'error': 'Erro ao buscar oriente'}), 500
 
 @bp.route('', methods=['POST'], strict_slashes=False)
-@jwt_required()
+@admin_required('Apenas administradores podem criar orientes')
 def create_oriente():
     try:
-        user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
-            
-        if not user.is_admin:
-            print("Usuário não é administrador")
-            return jsonify({'error': 'Apenas administradores podem criar orientes'}), 403
-        
         if not request.is_json:
-            print("Requisição não contém JSON")
+            logger.debug('Requisição não contém JSON')
             return jsonify({'error': 'O conteúdo deve ser JSON'}), 400
             
         data = request.get_json()
-        print(f"Dados recebidos: {data}")
+        logger.debug('Dados recebidos: %s', data)
         
         if not data:
-            print("Nenhum dado recebido")
+            logger.debug('Nenhum dado recebido')
             return jsonify({'error': 'Dados não fornecidos'}), 400
             
         campos_obrigatorios = ['nome', 'uf']
         for campo in campos_obrigatorios:
             if campo not in data:
-                print(f"Campo obrigatório não fornecido: {campo}")
+                logger.debug('Campo obrigatório não fornecido: %s', campo)
                 return jsonify({'error': f'Campo {campo} é obrigatório'}), 400
             
         if not isinstance(data['nome'], str) or len(data['nome'].strip()) == 0:
-            print("Nome inválido")
+            logger.debug('Nome inválido')
             return jsonify({'error': 'Nome é obrigatório e deve ser uma string não vazia'}), 400
             
         if not isinstance(data['uf'], str) or len(data['uf'].strip()) != 2:
-            print("UF inválida")
+            logger.debug('UF inválida')
             return jsonify({'error': 'UF deve ter exatamente 2 caracteres'}), 400
         
         oriente = Oriente(
             nome=data['nome'].strip(),
             uf=data['uf'].strip().upper()
         )
-        print(f"Criando oriente: {oriente.to_dict()}")
+        if Oriente.query.filter_by(chave=oriente.chave).first():
+            logger.debug('Oriente já existe')
+            return jsonify({'error': 'Já existe um oriente com este nome e UF'}), 409
+        logger.debug('Criando oriente: %s - %s', oriente.nome, oriente.uf)
         
         db.session.add(oriente)
+        reference_cache.invalidate('orientes')
         db.session.commit()
-        print("Oriente criado com sucesso")
+        logger.info('Oriente criado com sucesso')
         
         return jsonify(oriente.to_dict()), 201
     except Exception as e:
-        print(f"Erro ao criar oriente: {str(e)}")
+        logger.exception('Erro ao criar oriente')
         db.session.rollback()
         return jsonify({'error': 'Erro ao criar oriente'}), 500
 
 @bp.route('/<int:id>', methods=['PUT'], strict_slashes=False)
-@jwt_required()
+@admin_required('Apenas administradores podem atualizar orientes')
 def update_oriente(id):
     try:
-        user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
-            
-        if not user.is_admin:
-            print("Usuário não é administrador")
-            return jsonify({'error': 'Apenas administradores podem atualizar orientes'}), 403
-        
         oriente = Oriente.query.get(id)
         if not oriente:
-            print(f"Oriente com ID {id} não encontrado")
+            logger.debug('Oriente com ID %s não encontrado', id)
             return jsonify({'error': 'Oriente não encontrado'}), 404
 
         if not request.is_json:
-            print("Requisição não contém JSON")
+            logger.debug('Requisição não contém JSON')
             return jsonify({'error': 'O conteúdo deve ser JSON'}), 400
             
         data = request.get_json()
-        print(f"Dados recebidos para atualização: {data}")
+        logger.debug('Dados recebidos para atualização: %s', data)
         
         if not data:
-            print("Nenhum dado recebido")
+            logger.debug('Nenhum dado recebido')
             return jsonify({'error': 'Dados não fornecidos'}), 400
                 
         if 'nome' in data:
             if not isinstance(data['nome'], str) or len(data['nome'].strip()) == 0:
-                print("Nome inválido")
+                logger.debug('Nome inválido')
                 return jsonify({'error': 'Nome deve ser uma string não vazia'}), 400
             oriente.nome = data['nome'].strip()
             
         if 'uf' in data:
             if not isinstance(data['uf'], str) or len(data['uf'].strip()) != 2:
-                print("UF inválida")
+                logger.debug('UF inválida')
                 return jsonify({'error': 'UF deve ter exatamente 2 caracteres'}), 400
             oriente.uf = data['uf'].strip().upper()
             
+        with db.session.no_autoflush:
+            duplicado = Oriente.query.filter(Oriente.chave == oriente.chave, Oriente.id != oriente.id).first()
+        if duplicado:
+            logger.debug('Oriente já existe')
+            db.session.rollback()
+            return jsonify({'error': 'Já existe um oriente com este nome e UF'}), 409
+            
+        reference_cache.invalidate('orientes')
         db.session.commit()
-        print("Oriente atualizado com sucesso")
+        logger.info('Oriente atualizado com sucesso')
         
         return jsonify(oriente.to_dict())
     except Exception as e:
-        print(f"Erro ao atualizar oriente: {str(e)}")
+        logger.exception('Erro ao atualizar oriente')
         db.session.rollback()
         return jsonify({'error': 'Erro ao atualizar oriente'}), 500
 
 @bp.route('/<int:id>', methods=['DELETE'], strict_slashes=False)
-@jwt_required()
+@admin_required('Apenas administradores podem deletar orientes')
 def delete_oriente(id):
     try:
-        user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
-            
-        if not user.is_admin:
-            print("Usuário não é administrador")
-            return jsonify({'error': 'Apenas administradores podem deletar orientes'}), 403
-        
         oriente = Oriente.query.get(id)
         if not oriente:
-            print(f"Oriente com ID {id} não encontrado")
+            logger.debug('Oriente com ID %s não encontrado', id)
             return jsonify({'error': 'Oriente não encontrado'}), 404
             
-        print(f"Deletando oriente: {oriente.to_dict()}")
+        logger.debug('Deletando oriente %s', oriente.id)
         db.session.delete(oriente)
+        reference_cache.invalidate('orientes')
         db.session.commit()
-        print("Oriente deletado com sucesso")
+        logger.info('Oriente deletado com sucesso')
         
         return jsonify({'message': 'Oriente deletado com sucesso'})
     except Exception as e:
-        print(f"Erro ao deletar oriente: {str(e)}")
+        logger.exception('Erro ao deletar oriente')
         db.session.rollback()
         return jsonify({'error': 'Erro ao deletar oriente'}), 500 
\ No newline at end of file
@@ -1,126 +1,110 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Rito, User
+from flask_jwt_extended import jwt_required
+from app.models import Rito
 from app import db
+from app.utils.auth import admin_required
+from app.utils.cache import reference_cache
+import logging
 
 bp = Blueprint('ritos', __name__, url_prefix='/api/ritos')
+logger = logging.getLogger(__name__)
 
 @bp.route('', methods=['GET'])
 @jwt_required()
 def get_ritos():
     try:
-        print("Recebendo requisição GET para listar ritos")
-        ritos = Rito.query.all()
-        print(f"Ritos encontrados: {len(ritos)}")
-        return jsonify([rito.to_dict() for rito in ritos])
+        logger.debug('Recebendo requisição GET para listar ritos')
+        ritos = reference_cache.all('ritos')
+        logger.debug('Ritos encontrados: %s', len(ritos))
+        return jsonify(ritos)
     except Exception as e:
-        print(f"Erro ao listar ritos: {str(e)}")
+        logger.exception('Erro ao listar ritos')
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_rito(id):
     try:
-        rito = Rito.query.get_or_404(id)
-        return jsonify(rito.to_dict())
+        rito = reference_cache.get('ritos', id)
+        if not rito:
+            return jsonify({'error': 'Rito não encontrado'}), 404
+        return jsonify(rito)
     except Exception as e:
-        print(f"Erro ao buscar rito: {str(e)}")
+        logger.exception('Erro ao buscar rito')
         return jsonify({'error': str(e)}), 500
 
 @bp.route('', methods=['POST'])
-@jwt_required()
+@admin_required('Apenas administradores podem criar ritos')
 def create_rito():
     try:
-        print("Recebendo requisição POST para criar rito")
-        user_id = get_jwt_identity()
-        print(f"ID do usuário do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
-            
-        if not user.is_admin:
-            print("Usuário não é admin")
-            return jsonify({'error': 'Apenas administradores podem criar ritos'}), 403
-        
+        logger.debug('Recebendo requisição POST para criar rito')
         data = request.get_json()
-        print(f"Dados recebidos: {data}")
+        logger.debug('Dados recebidos: %s', data)
         
         if not data:
-            print("Nenhum dado recebido")
+            logger.debug('Nenhum dado recebido')
             return jsonify({'error': 'Nenhum dado recebido'}), 400
         
         # Validar campos obrigatórios
         if not data.get('nome'):
-            print("Campo nome não fornecido")
+            logger.debug('Campo nome não fornecido')
             return jsonify({'error': 'O campo nome é obrigatório'}), 400
         
         # Validar tamanho do nome
         if len(data['nome']) > 100:
-            print("Nome excede o limite de caracteres")
+            logger.debug('Nome excede o limite de caracteres')
             return jsonify({'error': 'O nome não pode ter mais de 100 caracteres'}), 400
         
-        print("Criando novo rito...")
+        logger.debug('Criando novo rito...')
         rito = Rito(
             nome=data['nome'],
             descricao=data.get('descricao', '')
         )
         
-        print("Adicionando rito à sessão...")
+        logger.debug('Adicionando rito à sessão...')
         db.session.add(rito)
         
-        print("Commitando alterações...")
+        logger.debug('Commitando alterações...')
+        reference_cache.invalidate('ritos')
         db.session.commit()
         
-        print(f"Rito criado com sucesso: {rito.to_dict()}")
+        logger.info('Rito criado com sucesso (id %s)', rito.id)
         return jsonify(rito.to_dict()), 201
         
     except Exception as e:
-        print(f"Erro ao criar rito: {str(e)}")
-        print(f"Tipo do erro: {type(e)}")
-        import traceback
-        print(f"Stack trace: {traceback.format_exc()}")
+        logger.exception('Erro ao criar rito')
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/<int:id>', methods=['PUT'])
-@jwt_required()
+@admin_required('Apenas administradores podem atualizar ritos')
 def update_rito(id):
     try:
-        user = User.query.get(get_jwt_identity())
-        if not user.is_admin:
-            return jsonify({'error': 'Apenas administradores podem atualizar ritos'}), 403
-        
         rito = Rito.query.get_or_404(id)
         data = request.get_json()
         
         rito.nome = data.get('nome', rito.nome)
         rito.descricao = data.get('descricao', rito.descricao)
+        reference_cache.invalidate('ritos')
         db.session.commit()
         
         return jsonify(rito.to_dict())
     except Exception as e:
-        print(f"Erro ao atualizar rito: {str(e)}")
+        logger.exception('Erro ao atualizar rito')
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/<int:id>', methods=['DELETE'])
-@jwt_required()
+@admin_required('Apenas administradores podem deletar ritos')
 def delete_rito(id):
     try:
-        user = User.query.get(get_jwt_identity())
-        if not user.is_admin:
-            return jsonify({'error': 'Apenas administradores podem deletar ritos'}), 403
-        
         rito = Rito.query.get_or_404(id)
         db.session.delete(rito)
+        reference_cache.invalidate('ritos')
         db.session.commit()
         
         return jsonify({'message': 'Rito deletado com sucesso'})
     except Exception as e:
-        print(f"Erro ao deletar rito: {str(e)}")
+        logger.exception('Erro ao deletar rito')
         db.session.rollback()
         return jsonify({'error': str(e)}), 500 
\ No newline at end of file
@@ -1,61 +1,55 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Sessao, User
+from flask_jwt_extended import jwt_required
+from app.models import Sessao
 from app import db
+from app.utils.auth import admin_required
+from app.utils.cache import reference_cache
 
 bp = Blueprint('sessoes', __name__, url_prefix='/api/sessoes')
 
 @bp.route('', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_sessoes():
-    sessoes = Sessao.query.all()
-    return jsonify([sessao.to_dict() for sessao in sessoes])
+    return jsonify(reference_cache.all('sessoes'))
 
 @bp.route('/<int:id>', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_sessao(id):
-    sessao = Sessao.query.get_or_404(id)
-    return jsonify(sessao.to_dict())
+    sessao = reference_cache.get('sessoes', id)
+    if not sessao:
+        return jsonify({'error': 'Sessão não encontrada'}), 404
+    return jsonify(sessao)
 
 @bp.route('', methods=['POST'], strict_slashes=False)
-@jwt_required()
+@admin_required('Apenas administradores podem criar sessões')
 def create_sessao():
-    user = User.query.get(get_jwt_identity())
-    if not user.is_admin:
-        return jsonify({'error': 'Apenas administradores podem criar sessões'}), 403
-    
     data = request.get_json()
     sessao = Sessao(descricao=data['descricao'])
     
     db.session.add(sessao)
+    reference_cache.invalidate('sessoes')
     db.session.commit()
     
     return jsonify(sessao.to_dict()), 201
 
 @bp.route('/<int:id>', methods=['PUT'], strict_slashes=False)
-@jwt_required()
+@admin_required('Apenas administradores podem atualizar sessões')
 def update_sessao(id):
-    user = User.query.get(get_jwt_identity())
-    if not user.is_admin:
-        return jsonify({'error': 'Apenas administradores podem atualizar sessões'}), 403
-    
     sessao = Sessao.query.get_or_404(id)
     data = request.get_json()
     
     sessao.descricao = data.get('descricao', sessao.descricao)
+    reference_cache.invalidate('sessoes')
     db.session.commit()
     
     return jsonify(sessao.to_dict())
 
 @bp.route('/<int:id>', methods=['DELETE'], strict_slashes=False)
-@jwt_required()
+@admin_required('Apenas administradores podem deletar sessões')
 def delete_sessao(id):
-    user = User.query.get(get_jwt_identity())
-    if not user.is_admin:
-        return jsonify({'error': 'Apenas administradores podem deletar sessões'}), 403
-    
     sessao = Sessao.query.get_or_404(id)
     db.session.delete(sessao)
+    reference_cache.invalidate('sessoes')
     db.session.commit()
     
     return jsonify({'message': 'Sessão deletada com sucesso'}) 
\ No newline at end of file
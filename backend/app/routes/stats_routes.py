@@ -0,0 +1,60 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, current_user
+from sqlalchemy import func, select
+from app.models import EstatisticaVisita, Loja
+from app import db
+from app.utils.cache import reference_cache
+import logging
+
+bp = Blueprint('stats', __name__, url_prefix='/api/stats')
+logger = logging.getLogger(__name__)
+
+def _com_nomes(totais, colecao, campo_nome):
+    """Associa os totais por id aos nomes vindos do cache de referência"""
+    itens = []
+    for chave, total in sorted(totais.items(), key=lambda item: -item[1]):
+        item = reference_cache.get(colecao, int(chave))
+        itens.append({'id': int(chave), 'nome': item[campo_nome] if item else None, 'total': total})
+    return itens
+
+@bp.route('', methods=['GET'], strict_slashes=False)
+@jwt_required()
+def get_stats():
+    """Estatísticas das visitas do usuário (ou de todos, para administradores).
+
+    Lê apenas as tabelas de estatísticas, então o custo depende do número de
+    faixas (meses, lojas, potências...) e não do número de visitas.
+    """
+    try:
+        query = (select(EstatisticaVisita.dimensao, EstatisticaVisita.chave, func.sum(EstatisticaVisita.total))
+                 .group_by(EstatisticaVisita.dimensao, EstatisticaVisita.chave))
+        if not current_user.is_admin:
+            query = query.where(EstatisticaVisita.user_id == current_user.id)
+
+        faixas = {}
+        for dimensao, chave, total in db.session.execute(query):
+            if total:
+                faixas.setdefault(dimensao, {})[chave] = total
+
+        por_loja = faixas.get('loja', {})
+        nomes_lojas = dict(db.session.execute(
+            select(Loja.id, Loja.nome).where(Loja.id.in_([int(chave) for chave in por_loja]))
+        ).all()) if por_loja else {}
+
+        por_mes = faixas.get('mes', {})
+        return jsonify({
+            'total_visitas': sum(por_mes.values()),
+            'certificados_pendentes': faixas.get('certificado_pendente', {}).get('', 0),
+            'lojas_visitadas': len(por_loja),
+            'por_mes': [{'mes': mes, 'total': total} for mes, total in sorted(por_mes.items())],
+            'por_loja': [
+                {'id': int(chave), 'nome': nomes_lojas.get(int(chave)), 'total': total}
+                for chave, total in sorted(por_loja.items(), key=lambda item: -item[1])
+            ],
+            'por_potencia': _com_nomes(faixas.get('potencia', {}), 'potencias', 'nome'),
+            'por_grau': _com_nomes(faixas.get('grau', {}), 'graus', 'descricao'),
+            'por_rito': _com_nomes(faixas.get('rito', {}), 'ritos', 'nome')
+        })
+    except Exception as e:
+        logger.exception('Erro ao calcular estatísticas')
+        return jsonify({'error': 'Erro ao calcular estatísticas'}), 500
@@ -1,50 +1,530 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Visita, User
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, current_user
+from sqlalchemy import and_, or_, delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import Visita, Loja, Sessao, Grau, Rito, Potencia, Certificado, User
 from app import db
+from app.utils import certificados, condicional, estatisticas, jobs, serializacao
+from app.routes.job_routes import resposta_aceita
+from app.utils.sql import insert_on_conflict
+from app.utils.visitas import carregar_ids_validos, ler_registros, validar_visita
 from datetime import datetime
+import base64
+import csv
+import io
+import json
+import logging
+import os
+import shutil
+import uuid
 
 bp = Blueprint('visitas', __name__, url_prefix='/api/visitas')
+logger = logging.getLogger(__name__)
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+FILTROS_ID = ('loja_id', 'potencia_id', 'grau_id', 'rito_id', 'sessao_id')
+
+# Coleções do reference_cache que entram aninhadas na listagem (ETag)
+COLECOES_ANINHADAS = ('lojas', 'sessoes', 'graus', 'ritos', 'potencias', 'orientes')
+
+# Listagem: as tabelas de domínio são pequenas e entram no mesmo SELECT;
+# as lojas se repetem entre visitas e são buscadas uma única vez via IN.
+CARREGAMENTO_LISTA = (
+    joinedload(Visita.sessao),
+    joinedload(Visita.grau),
+    joinedload(Visita.rito),
+    joinedload(Visita.potencia),
+    selectinload(Visita.loja).options(
+        joinedload(Loja.potencia),
+        joinedload(Loja.rito),
+        joinedload(Loja.oriente)
+    )
+)
+
+# Detalhe: uma única linha, tudo em um SELECT só
+CARREGAMENTO_DETALHE = (
+    joinedload(Visita.sessao),
+    joinedload(Visita.grau),
+    joinedload(Visita.rito),
+    joinedload(Visita.potencia),
+    joinedload(Visita.loja).options(
+        joinedload(Loja.potencia),
+        joinedload(Loja.rito),
+        joinedload(Loja.oriente)
+    )
+)
+
+def _parse_data(valor, campo):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f'Parâmetro {campo} inválido, use o formato AAAA-MM-DD')
+
+def _filtrar_visitas(query, args):
+    """Aplica os filtros de loja, potência, grau, rito, sessão e período"""
+    for campo in FILTROS_ID:
+        if args.get(campo):
+            try:
+                valor = int(args[campo])
+            except ValueError:
+                raise ValueError(f'Parâmetro {campo} deve ser um valor inteiro')
+            query = query.filter(getattr(Visita, campo) == valor)
+
+    if args.get('data_inicio'):
+        query = query.filter(Visita.data_visita >= _parse_data(args['data_inicio'], 'data_inicio'))
+    if args.get('data_fim'):
+        query = query.filter(Visita.data_visita <= _parse_data(args['data_fim'], 'data_fim'))
+    return query
+
+# Colunas da exportação, já com os nomes das tabelas relacionadas via JOIN
+COLUNAS_EXPORTACAO = (
+    Visita.id,
+    Visita.data_visita,
+    Loja.nome.label('loja'),
+    Loja.numero.label('loja_numero'),
+    Sessao.descricao.label('sessao'),
+    Grau.numero.label('grau_numero'),
+    Grau.descricao.label('grau'),
+    Rito.nome.label('rito'),
+    Potencia.nome.label('potencia'),
+    Potencia.sigla.label('potencia_sigla'),
+    Visita.prancha_presenca,
+    Visita.possui_certificado,
+    Visita.registro_loja,
+    Visita.data_entrega_certificado,
+    Visita.certificado_scaniado,
+    Visita.observacoes,
+    Visita.user_id
+)
+LOTE_EXPORTACAO = 1000
+
+def _consulta_exportacao(usuario, args):
+    """SELECT da exportação com os filtros de ``args``; só as visitas do usuário, exceto para administradores"""
+    stmt = (select(*COLUNAS_EXPORTACAO)
+            .join(Loja, Visita.loja_id == Loja.id)
+            .join(Sessao, Visita.sessao_id == Sessao.id)
+            .join(Grau, Visita.grau_id == Grau.id)
+            .join(Rito, Visita.rito_id == Rito.id)
+            .join(Potencia, Visita.potencia_id == Potencia.id))
+    if not usuario.is_admin:
+        stmt = stmt.where(Visita.user_id == usuario.id)
+    return _filtrar_visitas(stmt, args).order_by(Visita.data_visita, Visita.id)
+
+def _linhas_exportacao(stmt):
+    """Percorre o resultado em lotes com cursor no servidor (yield_per)"""
+    resultado = db.session.execute(stmt.execution_options(yield_per=LOTE_EXPORTACAO))
+    for lote in resultado.partitions():
+        yield lote
+
+def _exportar_csv(stmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([coluna.key for coluna in COLUNAS_EXPORTACAO])
+    for lote in _linhas_exportacao(stmt):
+        writer.writerows(
+            [valor.isoformat() if hasattr(valor, 'isoformat') else valor for valor in linha]
+            for linha in lote
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def _exportar_ndjson(stmt):
+    for lote in _linhas_exportacao(stmt):
+        yield ''.join(
+            json.dumps(linha._asdict(), default=lambda valor: valor.isoformat(), ensure_ascii=False) + '\n'
+            for linha in lote
+        )
+
+FORMATOS_EXPORTACAO = {
+    'csv': (_exportar_csv, 'text/csv'),
+    'ndjson': (_exportar_ndjson, 'application/x-ndjson')
+}
+
+LOTE_IMPORTACAO = 1000
+MAX_REJEICOES_RELATADAS = 1000
+
+def _inferir_formato(nome_arquivo, mimetype):
+    nome_arquivo = (nome_arquivo or '').lower()
+    if nome_arquivo.endswith('.csv') or mimetype == 'text/csv':
+        return 'csv'
+    if nome_arquivo.endswith(('.ndjson', '.jsonl')) or mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return 'ndjson'
+    return None
+
+def _inserir_lote(lote):
+    """Insere o lote com executemany e confirma, em uma transação por lote"""
+    db.session.execute(insert(Visita), lote)
+    estatisticas.registrar(lote)
+    db.session.commit()
+
+MAX_OPERACOES_LOTE = 1000
+
+def _validar_operacoes(operacoes):
+    """Valida as operações do lote sem aplicar nada.
+
+    Retorna (resultados, creates, updates, deletes); cada resultado traz o
+    índice da operação e, se inválida, o motivo.
+    """
+    ids_referenciados = [op.get('id') for op in operacoes
+                         if isinstance(op, dict) and op.get('op') in ('update', 'delete')]
+    # type() e não isinstance(): true também é int e apontaria para a visita 1
+    ids_inteiros = [id for id in ids_referenciados if type(id) is int]
+    # Uma única consulta confirma quais visitas pertencem ao usuário
+    proprias = set(db.session.scalars(
+        select(Visita.id).where(Visita.id.in_(ids_inteiros), Visita.user_id == current_user.id)
+    )) if ids_inteiros else set()
+    ids = carregar_ids_validos() if any(
+        isinstance(op, dict) and op.get('op') in ('create', 'update') for op in operacoes
+    ) else None
+
+    resultados, creates, updates, deletes = [], [], [], []
+    vistos = set()
+    for indice, operacao in enumerate(operacoes):
+        resultado = {'index': indice}
+        resultados.append(resultado)
+        try:
+            if not isinstance(operacao, dict) or operacao.get('op') not in ('create', 'update', 'delete'):
+                raise ValueError('Operação deve ser create, update ou delete')
+            resultado['op'] = tipo = operacao['op']
+
+            if tipo != 'create':
+                id = operacao.get('id')
+                if type(id) is not int:
+                    raise ValueError('O campo id é obrigatório')
+                if id in vistos:
+                    raise ValueError('Visita referenciada mais de uma vez no lote')
+                if id not in proprias:
+                    raise ValueError('Visita não encontrada')
+                vistos.add(id)
+                resultado['id'] = id
+
+            if tipo == 'delete':
+                deletes.append(operacao['id'])
+            else:
+                visita = validar_visita(operacao.get('data'), ids)
+                if tipo == 'create':
+                    visita['user_id'] = current_user.id
+                    creates.append((resultado, visita))
+                else:
+                    visita['id'] = operacao['id']
+                    updates.append(visita)
+        except ValueError as e:
+            resultado['status'] = 'rejected'
+            resultado['error'] = str(e)
+    return resultados, creates, updates, deletes
+
+def _carregar_visita(id):
+    """Recarrega a visita com todos os relacionamentos em um único SELECT"""
+    return Visita.query.options(*CARREGAMENTO_DETALHE).filter_by(id=id).one()
+
+def _codificar_cursor(visita):
+    bruto = f'{visita.data_visita.isoformat()}|{visita.id}'
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+def _decodificar_cursor(cursor):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        data, id = bruto.split('|')
+        return datetime.strptime(data, '%Y-%m-%d').date(), int(id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
 
 @bp.route('', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_visitas():
+    """Lista as visitas em páginas ordenadas por (data_visita, id) decrescente.
+
+    Parâmetros: cursor, limite, total=1, loja_id, potencia_id, grau_id,
+    rito_id, sessao_id, data_inicio e data_fim (AAAA-MM-DD).
+    """
     try:
-        print("Listando visitas...")
-        user_id = get_jwt_identity()
-        print(f"ID do usuário obtido do token: {user_id}")
-        
-        user = User.query.get(user_id)
-        print(f"Usuário encontrado: {user}")
-        
-        if not user:
-            print("Usuário não encontrado")
-            return jsonify({'error': 'Usuário não encontrado'}), 404
-            
-        # Se for admin, retorna todas as visitas
-        if user.is_admin:
-            visitas = Visita.query.all()
-        else:
-            # Se não for admin, retorna apenas as visitas do usuário
-            visitas = Visita.query.filter_by(user_id=user_id).all()
+        logger.debug('Listando visitas...')
+        user = current_user
+
+        try:
+            limite = min(max(int(request.args.get('limite', LIMITE_PADRAO)), 1), LIMITE_MAXIMO)
+        except ValueError:
+            return jsonify({'error': 'Parâmetro limite deve ser um valor inteiro'}), 400
+
+        query = Visita.query
+        # Se não for admin, retorna apenas as visitas do usuário
+        if not user.is_admin:
+            query = query.filter(Visita.user_id == user.id)
+
+        try:
+            query = _filtrar_visitas(query, request.args)
+            cursor = _decodificar_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Nada mudou no escopo do usuário: 304 sem carregar nenhuma linha
+        etag = condicional.etag(Visita, user, COLECOES_ANINHADAS, request.query_string.decode())
+        nao_modificado = condicional.nao_modificado(etag)
+        if nao_modificado is not None:
+            return nao_modificado
+
+        total = None
+        if request.args.get('total') in ('1', 'true'):
+            total = query.order_by(None).count()
+
+        if cursor:
+            data, id = cursor
+            query = query.filter(or_(
+                Visita.data_visita < data,
+                and_(Visita.data_visita == data, Visita.id < id)
+            ))
+
+        # Busca um registro a mais para saber se existe próxima página
+        visitas = (query.options(*CARREGAMENTO_LISTA)
+                   .order_by(Visita.data_visita.desc(), Visita.id.desc())
+                   .limit(limite + 1)
+                   .all())
+        has_more = len(visitas) > limite
+        visitas = visitas[:limite]
             
-        print(f"Encontradas {len(visitas)} visitas")
-        return jsonify([visita.to_dict() for visita in visitas])
+        logger.debug('Encontradas %s visitas', len(visitas))
+        resposta = {
+            'items': serializacao.lista(Visita.to_json, visitas),
+            'next_cursor': _codificar_cursor(visitas[-1]) if has_more else None,
+            'has_more': has_more
+        }
+        if total is not None:
+            resposta['total'] = total
+        return condicional.com_etag(serializacao.resposta(resposta), etag)
     except Exception as e:
-        print(f"Erro ao listar visitas: {str(e)}")
+        logger.exception('Erro ao listar visitas')
         return jsonify({'error': 'Erro ao listar visitas'}), 500
 
+@bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_visitas():
+    """Exporta as visitas em CSV ou NDJSON (?format=), com os mesmos filtros da listagem.
+
+    As linhas são geradas em lotes e enviadas conforme são lidas, então a
+    memória usada não depende do tamanho da exportação.
+    """
+    formato = request.args.get('format', 'csv')
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({'error': 'Formato inválido, use csv ou ndjson'}), 400
+    try:
+        stmt = _consulta_exportacao(current_user, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    gerar, mimetype = FORMATOS_EXPORTACAO[formato]
+    response = Response(stream_with_context(gerar(stmt)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=visitas.{formato}'
+    return response
+
+def _validar_exportacao(parametros):
+    formato = parametros.get('format', 'csv')
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError('Formato inválido, use csv ou ndjson')
+    filtros = parametros.get('filtros') or {}
+    if not isinstance(filtros, dict):
+        raise ValueError('filtros deve ser um objeto')
+    filtros = {campo: str(valor) for campo, valor in filtros.items() if campo in FILTROS_ID + ('data_inicio', 'data_fim')}
+    _filtrar_visitas(select(Visita.id), filtros)
+    return {'format': formato, 'filtros': filtros}
+
+@jobs.tarefa('visitas.exportar', validar=_validar_exportacao)
+def _job_exportar(contexto, format='csv', filtros=None):
+    """Exportação em segundo plano: grava o arquivo em JOBS_DIR para download em /api/jobs/<id>/resultado"""
+    usuario = db.session.get(User, contexto.user_id)
+    stmt = _consulta_exportacao(usuario, filtros or {})
+    total = db.session.scalar(select(db.func.count()).select_from(stmt.order_by(None).subquery()))
+    contexto.progresso(0, total)
+
+    gerar, mimetype = FORMATOS_EXPORTACAO[format]
+    destino = jobs.arquivo(contexto.job_id, format)
+    temporario = f'{destino}.tmp'
+    escritas = 0
+    with open(temporario, 'w', encoding='utf-8', newline='') as saida:
+        for parte in gerar(stmt):
+            saida.write(parte)
+            escritas = min(total, escritas + LOTE_EXPORTACAO)
+            contexto.progresso(escritas)
+    os.replace(temporario, destino)
+    return {
+        'arquivo': os.path.basename(destino),
+        'content_type': mimetype,
+        'download_name': f'visitas.{format}',
+        'linhas': total
+    }
+
+@bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_visitas():
+    """Importa visitas de um arquivo CSV ou JSON-lines.
+
+    Aceita upload multipart (campo ``arquivo``) ou o arquivo no corpo da
+    requisição. O formato vem de ?format=, da extensão ou do Content-Type.
+    As linhas válidas são gravadas em lotes; as inválidas voltam no
+    relatório com o número da linha e o motivo.
+    """
+    arquivo = request.files.get('arquivo')
+    if arquivo:
+        stream, formato = arquivo.stream, _inferir_formato(arquivo.filename, arquivo.mimetype)
+    else:
+        stream, formato = request.stream, _inferir_formato(None, request.mimetype)
+    formato = request.args.get('format', formato)
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Formato inválido, use csv ou ndjson'}), 400
+
+    if request.args.get('async') in ('1', 'true'):
+        # Grava o arquivo antes de criar o job e responde 202; a importação segue em segundo plano
+        destino = jobs.arquivo(f'importacao-{uuid.uuid4().hex}', formato)
+        try:
+            with open(destino, 'wb') as saida:
+                shutil.copyfileobj(stream, saida, 64 * 1024)
+        except BaseException:
+            os.unlink(destino)
+            raise
+        job = jobs.enfileirar('visitas.importar', {'formato': formato, 'arquivo': os.path.basename(destino)},
+                              user_id=current_user.id)
+        return resposta_aceita(job)
+
+    relatorio, erro, status = _importar(stream, formato, current_user.id)
+    if erro:
+        return jsonify({'error': erro, **relatorio}), status
+    return jsonify(relatorio)
+
+def _importar(stream, formato, user_id, contexto=None):
+    """Lê e grava as visitas em lotes.
+
+    Retorna (relatório, mensagem de erro ou None, status HTTP do erro): 400
+    para arquivo inválido e 500 se o banco recusar um lote. Os lotes já
+    gravados continuam gravados e contam em ``accepted``.
+    """
+    ids = carregar_ids_validos()
+    aceitas = 0
+    rejeitadas = []
+    total_rejeitadas = 0
+    lote = []
+    try:
+        for linha, registro, erro in ler_registros(stream, formato):
+            try:
+                if erro:
+                    raise ValueError(erro)
+                visita = validar_visita(registro, ids)
+            except ValueError as e:
+                total_rejeitadas += 1
+                if len(rejeitadas) < MAX_REJEICOES_RELATADAS:
+                    rejeitadas.append({'line': linha, 'reason': str(e)})
+                continue
+
+            visita['user_id'] = user_id
+            lote.append(visita)
+            if len(lote) >= LOTE_IMPORTACAO:
+                _inserir_lote(lote)
+                aceitas += len(lote)
+                lote = []
+                if contexto:
+                    contexto.progresso(aceitas + total_rejeitadas)
+
+        if lote:
+            _inserir_lote(lote)
+            aceitas += len(lote)
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        erro, status = f'Arquivo inválido: {str(e)}', 400
+    except SQLAlchemyError:
+        db.session.rollback()
+        logger.exception('Erro ao gravar lote da importação de visitas')
+        erro, status = 'Erro ao gravar as visitas', 500
+    else:
+        erro, status = None, None
+    return {'accepted': aceitas, 'rejected_count': total_rejeitadas, 'rejected': rejeitadas}, erro, status
+
+@jobs.tarefa('visitas.importar', api=False, max_tentativas=1)
+def _job_importar(contexto, formato, arquivo):
+    """Importação em segundo plano de um arquivo gravado por POST /import?async=1.
+
+    Sem novas tentativas: os lotes já gravados seriam importados de novo.
+    """
+    caminho = os.path.join(current_app.config['JOBS_DIR'], arquivo)
+    try:
+        with open(caminho, 'rb') as entrada:
+            relatorio, erro, _ = _importar(entrada, formato, contexto.user_id, contexto)
+    finally:
+        if os.path.exists(caminho):
+            os.unlink(caminho)
+    if erro:
+        raise jobs.ErroPermanente(f"{erro} ({relatorio['accepted']} visitas importadas antes do erro)")
+    return relatorio
+
+@bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_visitas():
+    """Aplica um lote de operações create/update/delete em uma única transação.
+
+    Corpo: {"operations": [{"op": "create", "data": {...}},
+    {"op": "update", "id": 1, "data": {...}}, {"op": "delete", "id": 2}]}.
+    Se alguma operação for inválida, nenhuma é aplicada.
+    """
+    data = request.get_json(silent=True)
+    operacoes = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operacoes, list) or not operacoes:
+        return jsonify({'error': 'O campo operations é obrigatório e deve ser uma lista'}), 400
+    if len(operacoes) > MAX_OPERACOES_LOTE:
+        return jsonify({'error': f'O lote pode ter no máximo {MAX_OPERACOES_LOTE} operações'}), 400
+
+    resultados, creates, updates, deletes = _validar_operacoes(operacoes)
+    if any(resultado.get('status') == 'rejected' for resultado in resultados):
+        for resultado in resultados:
+            resultado.setdefault('status', 'skipped')
+        return jsonify({'error': 'Nenhuma operação foi aplicada', 'results': resultados}), 400
+
+    try:
+        # Estado anterior das visitas alteradas, para ajustar as estatísticas
+        alteradas = [visita['id'] for visita in updates] + deletes
+        anteriores = db.session.execute(
+            select(*(getattr(Visita, campo) for campo in estatisticas.CAMPOS_ESTATISTICA))
+            .where(Visita.id.in_(alteradas))
+        ).mappings().all() if alteradas else []
+
+        if creates:
+            novos_ids = db.session.scalars(
+                insert(Visita).returning(Visita.id, sort_by_parameter_order=True),
+                [visita for _, visita in creates]
+            ).all()
+            for (resultado, _), id in zip(creates, novos_ids):
+                resultado['id'] = id
+        if updates:
+            db.session.execute(update(Visita), updates)
+        if deletes:
+            db.session.execute(
+                delete(Visita).where(Visita.id.in_(deletes), Visita.user_id == current_user.id)
+            )
+        estatisticas.registrar(anteriores, -1)
+        estatisticas.registrar([visita for _, visita in creates])
+        estatisticas.registrar([{**visita, 'user_id': current_user.id} for visita in updates])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Erro ao aplicar lote de visitas')
+        return jsonify({'error': 'Erro ao aplicar lote de visitas'}), 500
+
+    for resultado in resultados:
+        resultado['status'] = 'ok'
+    return jsonify({'results': resultados})
+
 @bp.route('/<int:id>', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_visita(id):
-    user_id = get_jwt_identity()
-    visita = Visita.query.filter_by(id=id, user_id=user_id).first_or_404()
+    user_id = current_user.id
+    visita = Visita.query.options(*CARREGAMENTO_DETALHE).filter_by(id=id, user_id=user_id).first_or_404()
     return jsonify(visita.to_dict())
 
 @bp.route('', methods=['POST'], strict_slashes=False)
 @jwt_required()
 def create_visita():
-    user_id = get_jwt_identity()
+    user_id = current_user.id
     data = request.get_json()
     
     visita = Visita(
@@ -64,16 +544,18 @@ def create_visita():
     )
     
     db.session.add(visita)
+    estatisticas.registrar([visita])
     db.session.commit()
     
-    return jsonify(visita.to_dict()), 201
+    return jsonify(_carregar_visita(visita.id).to_dict()), 201
 
 @bp.route('/<int:id>', methods=['PUT'], strict_slashes=False)
 @jwt_required()
 def update_visita(id):
-    user_id = get_jwt_identity()
+    user_id = current_user.id
     visita = Visita.query.filter_by(id=id, user_id=user_id).first_or_404()
     data = request.get_json()
+    anterior = estatisticas.snapshot(visita)
     
     visita.data_visita = datetime.strptime(data['data_visita'], '%Y-%m-%d').date()
     visita.loja_id = data['loja_id']
@@ -88,16 +570,103 @@ def update_visita(id):
     visita.certificado_scaniado = data.get('certificado_scaniado', False)
     visita.observacoes = data.get('observacoes')
     
+    estatisticas.atualizar(anterior, visita)
     db.session.commit()
-    return jsonify(visita.to_dict())
+    return jsonify(_carregar_visita(visita.id).to_dict())
 
 @bp.route('/<int:id>', methods=['DELETE'], strict_slashes=False)
 @jwt_required()
 def delete_visita(id):
-    user_id = get_jwt_identity()
+    user_id = current_user.id
     visita = Visita.query.filter_by(id=id, user_id=user_id).first_or_404()
     
     db.session.delete(visita)
+    estatisticas.registrar([visita], -1)
     db.session.commit()
     
-    return jsonify({'message': 'Visita deletada com sucesso'}) 
\ No newline at end of file
+    return jsonify({'message': 'Visita deletada com sucesso'}) 
+
+@bp.route('/<int:id>/certificado', methods=['POST'])
+@jwt_required()
+def upload_certificado(id):
+    """Recebe a digitalização do certificado da visita.
+
+    O arquivo pode vir no corpo da requisição (preferível, gravado direto
+    em disco em blocos) ou em upload multipart no campo ``arquivo``. O
+    arquivo é guardado pelo sha256 do conteúdo, marca a visita como
+    certificado_scaniado e as miniaturas são geradas em segundo plano.
+    """
+    user_id = current_user.id
+    Visita.query.filter_by(id=id, user_id=user_id).first_or_404()
+    # Não segura transação nem conexão do pool enquanto o arquivo chega
+    db.session.rollback()
+
+    maximo = current_app.config['CERTIFICADO_MAX_BYTES']
+    if request.content_length and request.content_length > maximo:
+        return jsonify({'error': f'Arquivo maior que o limite de {maximo // (1024 * 1024)} MB'}), 413
+
+    arquivo = request.files.get('arquivo')
+    try:
+        sha256, content_type, tamanho, novo = certificados.salvar(arquivo.stream if arquivo else request.stream)
+    except certificados.ArquivoMuitoGrande:
+        return jsonify({'error': f'Arquivo maior que o limite de {maximo // (1024 * 1024)} MB'}), 413
+    except certificados.FormatoInvalido:
+        return jsonify({'error': 'Formato não suportado, envie JPEG, PNG, WEBP ou PDF'}), 415
+
+    db.session.execute(
+        insert_on_conflict(Certificado)
+        .values(sha256=sha256, content_type=content_type, tamanho=tamanho)
+        .on_conflict_do_nothing(index_elements=['sha256'])
+    )
+    visita = Visita.query.filter_by(id=id, user_id=user_id).first_or_404()
+    visita.certificado_sha256 = sha256
+    visita.certificado_scaniado = True
+    db.session.commit()
+    logger.info('Certificado %s gravado para a visita %s (%s bytes, novo=%s)', sha256, id, tamanho, novo)
+
+    miniaturas = certificados.agendar_variantes(sha256, content_type)
+    return jsonify({
+        'visita_id': id,
+        'certificado': {'sha256': sha256, 'content_type': content_type, 'tamanho': tamanho},
+        'duplicado': not novo,
+        'miniaturas': 'pendentes' if miniaturas else 'indisponiveis'
+    }), 201
+
+@bp.route('/<int:id>/certificado', methods=['GET'])
+@jwt_required()
+def get_certificado(id):
+    """Envia o certificado da visita, ou uma miniatura com ?variante=preview|thumb.
+
+    Aceita Range e requisições condicionais; o ETag é o hash do conteúdo.
+    """
+    nome = request.args.get('variante')
+    if nome is not None and nome not in certificados.VARIANTES:
+        return jsonify({'error': f"Variante inválida, use {', '.join(certificados.VARIANTES)}"}), 400
+
+    certificado = db.session.execute(
+        select(Certificado.sha256, Certificado.content_type)
+        .join(Visita, Visita.certificado_sha256 == Certificado.sha256)
+        .where(Visita.id == id, Visita.user_id == current_user.id)
+    ).first()
+    db.session.rollback()
+    if certificado is None:
+        return jsonify({'error': 'Certificado não encontrado'}), 404
+
+    sha256, content_type = certificado
+    original = certificados.caminho(current_app.config['CERTIFICADOS_DIR'], sha256)
+    try:
+        if nome is None:
+            return certificados.enviar(original, content_type, sha256)
+        if not content_type.startswith('image/'):
+            return jsonify({'error': 'Este certificado não tem miniaturas'}), 404
+        try:
+            arquivo = certificados.variante(sha256, nome)
+        except FileNotFoundError:
+            raise
+        except certificados.ERROS_IMAGEM:
+            logger.exception('Não foi possível gerar a variante %s do certificado %s; enviando o original', nome, sha256)
+            return certificados.enviar(original, content_type, sha256)
+        return certificados.enviar(arquivo, 'image/jpeg', f'{sha256}.{nome}')
+    except FileNotFoundError:
+        logger.error('Arquivo do certificado %s não encontrado em disco', sha256)
+        return jsonify({'error': 'Certificado não encontrado'}), 404
@@ -0,0 +1,66 @@
+"""Jobs de manutenção que não pertencem a nenhum blueprint.
+
+As tarefas de importação e exportação de visitas ficam em visita_routes,
+junto das funções que elas reaproveitam.
+"""
+from sqlalchemy import func, select, update
+from app import db
+from app.models import User, Loja, Visita
+from app.utils import estatisticas
+from app.utils.cache import reference_cache
+from app.utils.jobs import ErroPermanente, tarefa
+
+LOTE_TRANSFERENCIA = 1000
+
+@tarefa('estatisticas.rebuild', admin=True)
+def recalcular_estatisticas(contexto):
+    """Equivalente a ``flask stats rebuild``"""
+    estatisticas.rebuild()
+    return {'message': 'Estatísticas recalculadas com sucesso'}
+
+def _validar_transferencia(parametros):
+    try:
+        origem, destino = int(parametros['de_user_id']), int(parametros['para_user_id'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('Informe de_user_id e para_user_id inteiros')
+    if origem == destino:
+        raise ValueError('Origem e destino devem ser usuários diferentes')
+    if db.session.scalar(select(func.count(User.id)).where(User.id.in_([origem, destino]))) != 2:
+        raise ValueError('Usuário não encontrado')
+    return {'de_user_id': origem, 'para_user_id': destino}
+
+@tarefa('usuarios.transferir', admin=True, validar=_validar_transferencia)
+def transferir_registros(contexto, de_user_id, para_user_id):
+    """Passa as lojas e visitas de um usuário para outro, como fazia o reset_admin.py.
+
+    As visitas vão em lotes, cada um em sua transação e com as estatísticas
+    dos dois usuários ajustadas; o job pode ser cancelado entre os lotes e,
+    se repetido, continua de onde parou.
+    """
+    if db.session.get(User, para_user_id) is None:
+        raise ErroPermanente('Usuário de destino não encontrado')
+
+    total = db.session.scalar(select(func.count(Visita.id)).where(Visita.user_id == de_user_id))
+    contexto.progresso(0, total)
+    movidas = 0
+    while True:
+        visitas = db.session.execute(
+            select(*(getattr(Visita, campo) for campo in ('id',) + estatisticas.CAMPOS_ESTATISTICA))
+            .where(Visita.user_id == de_user_id)
+            .order_by(Visita.id)
+            .limit(LOTE_TRANSFERENCIA)
+        ).mappings().all()
+        if not visitas:
+            break
+        ids = [visita['id'] for visita in visitas]
+        db.session.execute(update(Visita).where(Visita.id.in_(ids)).values(user_id=para_user_id))
+        estatisticas.registrar(visitas, -1)
+        estatisticas.registrar([{**visita, 'user_id': para_user_id} for visita in visitas])
+        db.session.commit()
+        movidas += len(ids)
+        contexto.progresso(movidas)
+
+    lojas = db.session.execute(update(Loja).where(Loja.user_id == de_user_id).values(user_id=para_user_id)).rowcount
+    reference_cache.invalidate('lojas')
+    db.session.commit()
+    return {'visitas': movidas, 'lojas': lojas}
@@ -0,0 +1,71 @@
+from collections import namedtuple
+from functools import wraps
+from flask import current_app, g, jsonify
+from flask_jwt_extended import current_user, jwt_required
+from app import db, jwt
+from app.utils.cache import TTLCache
+import time
+
+# Dados mínimos do usuário autenticado, sem vínculo com a sessão do banco
+UsuarioAtual = namedtuple('UsuarioAtual', ['id', 'username', 'is_admin'])
+
+def init_app(app):
+    app.config.setdefault('JWT_USER_CACHE_TTL', 60)
+    app.config.setdefault('JWT_USER_CACHE_SIZE', 4096)
+    app.extensions['usuarios_cache'] = TTLCache(
+        maxsize=app.config['JWT_USER_CACHE_SIZE'],
+        ttl=app.config['JWT_USER_CACHE_TTL']
+    )
+
+def access_token_claims(user):
+    """Claims adicionais gravados no access token no login"""
+    return {'username': user.username, 'is_admin': bool(user.is_admin)}
+
+def forget_user(user_id):
+    """Descarta o usuário do cache deste processo (ex.: após alterar permissões)"""
+    current_app.extensions['usuarios_cache'].pop(str(user_id))
+
+@jwt.user_lookup_loader
+def load_user(jwt_header, jwt_data):
+    """Resolve ``current_user`` sem consultar o banco no caminho comum.
+
+    Um token emitido há menos de JWT_USER_CACHE_TTL segundos reflete o banco
+    no momento do login, então seus claims são usados diretamente. Fora
+    dessa janela o usuário é relido do banco e mantido em um LRU com o mesmo
+    TTL: exclusões e rebaixamentos valem em no máximo TTL segundos.
+    """
+    cache = current_app.extensions['usuarios_cache']
+    user_id = jwt_data['sub']
+    g.user_id = user_id  # contexto dos logs da requisição
+    usuario = cache.get(user_id)
+    if usuario is not None:
+        return usuario
+
+    idade = time.time() - jwt_data.get('iat', 0)
+    if 'is_admin' in jwt_data and idade < cache.ttl:
+        usuario = UsuarioAtual(int(user_id), jwt_data.get('username'), bool(jwt_data['is_admin']))
+        cache.set(user_id, usuario, ttl=cache.ttl - idade)
+        return usuario
+
+    from app.models import User
+    user = db.session.get(User, int(user_id))
+    if user is None:
+        return None
+    usuario = UsuarioAtual(user.id, user.username, bool(user.is_admin))
+    cache.set(user_id, usuario)
+    return usuario
+
+@jwt.user_lookup_error_loader
+def user_not_found(jwt_header, jwt_data):
+    return jsonify({'error': 'Usuário não encontrado'}), 404
+
+def admin_required(mensagem='Apenas administradores podem realizar esta operação'):
+    """Exige um token válido de um usuário administrador"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_user.is_admin:
+                return jsonify({'error': mensagem}), 403
+            return fn(*args, **kwargs)
+        return jwt_required()(wrapper)
+    return decorator
@@ -0,0 +1,107 @@
+from bisect import bisect_left
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.utils.cache import reference_cache
+from app.utils.texto import normalizar
+import re
+import threading
+
+def chaves(entradas):
+    """Pares (chave, id) ordenados: cada item entra com o texto completo e
+    com cada uma das palavras, para que "frat" encontre "União e Fraternidade"
+    """
+    pares = set()
+    for id_, textos in entradas:
+        for texto in textos:
+            chave = normalizar(texto)
+            if not chave:
+                continue
+            pares.add((chave, id_))
+            pares.update((palavra, id_) for palavra in re.findall(r'\w+', chave) if palavra != chave)
+    return sorted(pares)
+
+class IndicePrefixo:
+    """Vetor ordenado de (chave, id) consultado por prefixo com bisect"""
+
+    def __init__(self, pares):
+        self.chaves = [chave for chave, _ in pares]
+        self.ids = [id_ for _, id_ in pares]
+
+    @classmethod
+    def de_entradas(cls, entradas):
+        return cls(chaves(entradas))
+
+    def buscar(self, prefixo, limite):
+        """Até ``limite`` ids cujas chaves começam com o prefixo, em ordem alfabética"""
+        prefixo = normalizar(prefixo)
+        encontrados = {}
+        posicao = bisect_left(self.chaves, prefixo)
+        while posicao < len(self.chaves) and len(encontrados) < limite:
+            if not self.chaves[posicao].startswith(prefixo):
+                break
+            encontrados.setdefault(self.ids[posicao], None)
+            posicao += 1
+        return list(encontrados)
+
+class Autocompletar:
+    """Índices de prefixo em memória para lojas e orientes.
+
+    Cada índice é guardado junto com a versão da coleção em
+    ``versoes_referencia`` e é construído na primeira consulta depois que a
+    versão muda. Os handlers de escrita incrementam a versão com
+    ``reference_cache.invalidate`` antes do commit, assim todos os workers
+    reconstroem o índice na consulta seguinte. As lojas têm um índice por
+    dono, além do índice completo usado pelos administradores.
+    """
+
+    def init_app(self, app):
+        app.extensions['autocompletar'] = {'lock': threading.Lock(), 'indices': {}}
+
+    @property
+    def _estado(self):
+        return current_app.extensions['autocompletar']
+
+    def _indice(self, nome, construir):
+        versao = reference_cache.version(nome)
+        estado = self._estado
+        entrada = estado['indices'].get(nome)
+        if entrada is None or entrada[0] != versao:
+            entrada = (versao, *construir())
+            with estado['lock']:
+                estado['indices'][nome] = entrada
+        return entrada
+
+    @staticmethod
+    def _construir_orientes():
+        itens = {item['id']: item for item in reference_cache.all('orientes')}
+        return IndicePrefixo.de_entradas((id_, (item['nome'],)) for id_, item in itens.items()), itens
+
+    @staticmethod
+    def _construir_lojas():
+        from app.models import Loja
+        linhas = db.session.execute(select(Loja.id, Loja.nome, Loja.numero, Loja.user_id)).all()
+        itens = {id_: {'id': id_, 'nome': nome, 'numero': numero} for id_, nome, numero, _ in linhas}
+        dono = {id_: user_id for id_, _, _, user_id in linhas}
+        # Os índices por dono são fatias do vetor completo, que já está ordenado
+        pares = chaves((id_, (nome, numero)) for id_, nome, numero, _ in linhas)
+        por_dono = {}
+        for par in pares:
+            por_dono.setdefault(dono[par[1]], []).append(par)
+        indices = {user_id: IndicePrefixo(pares_dono) for user_id, pares_dono in por_dono.items()}
+        indices[None] = IndicePrefixo(pares)
+        return indices, itens
+
+    def orientes(self, prefixo, limite):
+        _, indice, itens = self._indice('orientes', self._construir_orientes)
+        return [itens[id_] for id_ in indice.buscar(prefixo, limite)]
+
+    def lojas(self, prefixo, limite, user_id=None):
+        """Lojas do usuário (ou todas, com user_id=None) que começam com o prefixo"""
+        _, indices, itens = self._indice('lojas', self._construir_lojas)
+        indice = indices.get(user_id)
+        if indice is None:
+            return []
+        return [itens[id_] for id_ in indice.buscar(prefixo, limite)]
+
+autocompletar = Autocompletar()
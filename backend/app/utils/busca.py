@@ -0,0 +1,114 @@
+from sqlalchemy import event, or_, select, text
+from app import db
+import re
+
+# Índices FTS5 de conteúdo externo: guardam só os termos, o texto continua
+# nas tabelas de origem. remove_diacritics faz "São" casar com "sao".
+TOKENIZADOR = 'unicode61 remove_diacritics 2'
+
+# Índice -> (tabela de origem, colunas indexadas, pesos do bm25)
+INDICES = {
+    'busca_visitas': ('visitas', ('observacoes',), (1.0,)),
+    'busca_lojas': ('lojas', ('nome', 'numero'), (2.0, 1.0)),
+    'busca_orientes': ('orientes', ('nome',), (1.0,))
+}
+
+MAX_TERMOS = 8
+
+def ddl():
+    """Comandos que criam os índices e os triggers que os mantêm em dia"""
+    comandos = []
+    for indice, (tabela, colunas, _) in INDICES.items():
+        lista = ', '.join(colunas)
+        novos = ', '.join(f'new.{coluna}' for coluna in colunas)
+        antigos = ', '.join(f'old.{coluna}' for coluna in colunas)
+        comandos += [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5("
+            f"{lista}, content='{tabela}', content_rowid='id', tokenize='{TOKENIZADOR}')",
+            f"CREATE TRIGGER IF NOT EXISTS {indice}_ai AFTER INSERT ON {tabela} BEGIN "
+            f"INSERT INTO {indice}(rowid, {lista}) VALUES (new.id, {novos}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {indice}_ad AFTER DELETE ON {tabela} BEGIN "
+            f"INSERT INTO {indice}({indice}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {indice}_au AFTER UPDATE OF {lista} ON {tabela} BEGIN "
+            f"INSERT INTO {indice}({indice}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); "
+            f"INSERT INTO {indice}(rowid, {lista}) VALUES (new.id, {novos}); END"
+        ]
+    return comandos
+
+def ddl_remocao():
+    comandos = []
+    for indice, (tabela, _, _) in INDICES.items():
+        comandos += [f'DROP TRIGGER IF EXISTS {indice}_{sufixo}' for sufixo in ('ai', 'ad', 'au')]
+        comandos.append(f'DROP TABLE IF EXISTS {indice}')
+    return comandos
+
+def incluir_nome(nome, tipo, pais):
+    """Filtro do autogenerate: os índices FTS não fazem parte dos modelos"""
+    return not (tipo == 'table' and nome.startswith('busca_'))
+
+def disponivel(conexao=None):
+    return (conexao or db.engine).dialect.name == 'sqlite'
+
+def rebuild():
+    """Recria os índices a partir das tabelas de origem.
+
+    Também recria os triggers que faltarem: uma migração em batch que
+    reconstrua visitas, lojas ou orientes no SQLite os descarta.
+    """
+    with db.engine.begin() as conn:
+        for comando in ddl():
+            conn.exec_driver_sql(comando)
+        for indice in INDICES:
+            conn.exec_driver_sql(f"INSERT INTO {indice}({indice}) VALUES ('rebuild')")
+
+def expressao(consulta):
+    """Converte o texto digitado em uma expressão FTS5 segura.
+
+    Cada palavra vira um prefixo entre aspas ("lu"* casa com "Luz"), e as
+    palavras são combinadas com AND. Retorna None se não sobrar nenhuma.
+    """
+    termos = re.findall(r'\w+', consulta or '')[:MAX_TERMOS]
+    if not termos:
+        return None
+    return ' '.join(f'"{termo}"*' for termo in termos)
+
+def buscar_ids(indice, consulta, limite, user_id=None):
+    """Ids da tabela de origem que casam com a consulta, do mais relevante ao menos.
+
+    Com user_id, restringe às linhas do usuário (visitas e lojas).
+    """
+    tabela, colunas, pesos = INDICES[indice]
+    if not disponivel():
+        return _buscar_ids_like(tabela, colunas, consulta, limite, user_id)
+
+    sql = (f"SELECT {tabela}.id FROM {indice} JOIN {tabela} ON {tabela}.id = {indice}.rowid "
+           f"WHERE {indice} MATCH :expressao")
+    if user_id is not None:
+        sql += f' AND {tabela}.user_id = :user_id'
+    sql += f" ORDER BY bm25({indice}, {', '.join(map(str, pesos))}) LIMIT :limite"
+    parametros = {'expressao': expressao(consulta), 'user_id': user_id, 'limite': limite}
+    return list(db.session.scalars(text(sql), parametros))
+
+def _buscar_ids_like(tabela, colunas, consulta, limite, user_id):
+    # Sem FTS5 (PostgreSQL): ILIKE por palavra, sem ranking
+    modelo = db.metadata.tables[tabela]
+    query = select(modelo.c.id)
+    for termo in re.findall(r'\w+', consulta or '')[:MAX_TERMOS]:
+        query = query.where(or_(*(modelo.c[coluna].icontains(termo, autoescape=True) for coluna in colunas)))
+    if user_id is not None:
+        query = query.where(modelo.c.user_id == user_id)
+    return list(db.session.scalars(query.order_by(modelo.c.id).limit(limite)))
+
+@event.listens_for(db.metadata, 'after_create')
+def _criar(metadata, conexao, **kwargs):
+    # Mantém db.create_all() (usado nos testes) com os mesmos índices das migrações
+    nomes = {tabela.name for tabela in kwargs.get('tables') or metadata.tables.values()}
+    if disponivel(conexao) and {tabela for tabela, _, _ in INDICES.values()} <= nomes:
+        for comando in ddl():
+            conexao.exec_driver_sql(comando)
+
+@event.listens_for(db.metadata, 'before_drop')
+def _remover(metadata, conexao, **kwargs):
+    if disponivel(conexao):
+        for comando in ddl_remocao():
+            conexao.exec_driver_sql(comando)
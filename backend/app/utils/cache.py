@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, select
+from app import db
+import threading
+import time
+
+class TTLCache:
+    """Dicionário LRU limitado em tamanho, com expiração por entrada"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave, padrao=None):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return padrao
+            valor, expira_em = item
+            if expira_em < time.monotonic():
+                del self._dados[chave]
+                return padrao
+            self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor, ttl=None):
+        expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._dados[chave] = (valor, expira_em)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+
+    def pop(self, chave, padrao=None):
+        with self._lock:
+            item = self._dados.pop(chave, None)
+        return padrao if item is None else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
+
+class ReferenceCache:
+    """Cache em memória das tabelas de referência.
+
+    Cada coleção é guardada junto com a versão lida de ``versoes_referencia``.
+    A tabela de versões é consultada uma vez por requisição (um SELECT só para
+    todas as coleções), então um processo nunca serve dados de outro worker
+    que já tenham sido alterados. Os handlers de escrita chamam ``invalidate``
+    antes do commit, o que incrementa a versão na mesma transação; até o
+    commit, o que essa sessão ler da coleção não entra no cache.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['reference_cache'] = {'lock': threading.Lock(), 'entradas': {}}
+        # O contexto da aplicação pode ser reaproveitado entre requisições
+        # (ex.: testes), então a leitura das versões é descartada a cada uma
+        app.before_request(self._descartar_versoes)
+
+    @staticmethod
+    def _descartar_versoes():
+        g.pop('versoes_referencia', None)
+
+    @staticmethod
+    def _modelos():
+        from app.models import Potencia, Rito, Grau, Sessao, Oriente
+        return {
+            'potencias': Potencia,
+            'ritos': Rito,
+            'graus': Grau,
+            'sessoes': Sessao,
+            'orientes': Oriente
+        }
+
+    @property
+    def _estado(self):
+        return current_app.extensions['reference_cache']
+
+    def versions(self):
+        """Versões atuais de todas as coleções, lidas uma vez por requisição"""
+        if 'versoes_referencia' not in g:
+            from app.models import VersaoReferencia
+            linhas = db.session.execute(select(VersaoReferencia.nome, VersaoReferencia.versao)).all()
+            g.versoes_referencia = dict(linhas)
+        return g.versoes_referencia
+
+    def version(self, nome):
+        return self.versions().get(nome, 0)
+
+    def _entrada(self, nome):
+        model = self._modelos()[nome]
+        versao = self.version(nome)
+        estado = self._estado
+        # Com um invalidate ainda não confirmado nesta sessão, as linhas e a
+        # versão lidas podem sumir num rollback: servem só a esta transação
+        pendente = nome in db.session.info.get(PENDENTES, ())
+        entrada = None if pendente else estado['entradas'].get(nome)
+        if entrada is None or entrada[0] != versao:
+            itens = [item.to_dict() for item in model.query.order_by(model.id).all()]
+            entrada = (versao, itens, {item['id']: item for item in itens})
+            if not pendente:
+                with estado['lock']:
+                    estado['entradas'][nome] = entrada
+        return entrada
+
+    def all(self, nome):
+        """Lista serializada da coleção"""
+        return self._entrada(nome)[1]
+
+    def get(self, nome, id):
+        """Item serializado pelo id, ou None se não existir"""
+        return self._entrada(nome)[2].get(id)
+
+    def invalidate(self, nome):
+        """Incrementa a versão da coleção na transação atual e descarta a cópia local.
+
+        Deve ser chamado antes do ``db.session.commit()`` do handler.
+        """
+        from app.models import VersaoReferencia
+        from app.utils.sql import insert_on_conflict
+
+        stmt = insert_on_conflict(VersaoReferencia).values(nome=nome, versao=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['nome'],
+            set_={'versao': VersaoReferencia.versao + 1}
+        )
+        db.session.execute(stmt)
+        db.session.info.setdefault(PENDENTES, set()).add(nome)
+
+        estado = self._estado
+        with estado['lock']:
+            estado['entradas'].pop(nome, None)
+        g.pop('versoes_referencia', None)
+
+# Coleções invalidadas na transação em aberto da sessão (session.info)
+PENDENTES = 'referencias_pendentes'
+
+@event.listens_for(db.session, 'after_transaction_end')
+def _fim_da_transacao(session, transacao):
+    """Commit ou rollback: as versões lidas durante a transação deixam de valer"""
+    if transacao.parent is None and session.info.pop(PENDENTES, None) and has_app_context():
+        g.pop('versoes_referencia', None)
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,312 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, request
+from PIL import Image, ImageOps
+from werkzeug.utils import send_file
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Assinaturas dos formatos aceitos; o Content-Type enviado pelo cliente não é confiável
+ASSINATURAS = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'%PDF-', 'application/pdf'),
+)
+TAMANHO_CABECALHO = 16
+
+# Variante -> lado máximo em pixels, da maior para a menor
+VARIANTES = {'preview': 1280, 'thumb': 256}
+
+# Um acesso só renova a posição da variante no LRU se a última renovação
+# tiver mais que isto, para não escrever metadados a cada miniatura servida
+INTERVALO_TOQUE = 60
+
+class ArquivoMuitoGrande(Exception):
+    """O corpo passou de CERTIFICADO_MAX_BYTES"""
+
+class FormatoInvalido(Exception):
+    """O conteúdo não é um dos formatos aceitos"""
+
+class PoolVariantes:
+    """Gera miniaturas em segundo plano, com fila limitada.
+
+    A requisição de upload só agenda o trabalho e retorna. Acima de ``fila``
+    tarefas pendentes, ``agendar`` devolve None em vez de acumular memória;
+    a variante que faltar é gerada quando for pedida pela primeira vez.
+    """
+
+    def __init__(self, workers, fila):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='certificados')
+        self.vagas = threading.BoundedSemaphore(workers + fila)
+
+    def agendar(self, funcao, *args):
+        if not self.vagas.acquire(blocking=False):
+            return None
+        try:
+            futuro = self.executor.submit(funcao, *args)
+        except Exception:
+            self.vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self.vagas.release())
+        return futuro
+
+class CacheVariantes:
+    """Cache LRU em disco das miniaturas, limitado em bytes.
+
+    A ordem de uso é o mtime dos arquivos: um acerto renova o mtime e, quando
+    o total passa do limite, as variantes menos usadas são removidas até
+    sobrar 90% do limite. O total é mantido em memória e recalculado do
+    disco a cada limpeza, o que corrige as escritas feitas por outros
+    workers. Uma variante removida é gerada de novo no próximo acesso.
+    """
+
+    def __init__(self, raiz, limite):
+        self.raiz = raiz
+        self.limite = limite
+        self.total = None
+        self.lock = threading.Lock()
+        # Trava por certificado, para não gerar a mesma variante duas vezes
+        self.travas = [threading.Lock() for _ in range(16)]
+
+    def caminho(self, sha256, variante):
+        return os.path.join(self.raiz, sha256[:2], f'{sha256}.{variante}.jpg')
+
+    def trava(self, sha256):
+        return self.travas[int(sha256[:2], 16) % len(self.travas)]
+
+    def obter(self, sha256, variante):
+        """Caminho da variante se ela estiver no cache, renovando seu uso"""
+        destino = self.caminho(sha256, variante)
+        try:
+            mtime = os.stat(destino).st_mtime
+        except FileNotFoundError:
+            return None
+        agora = time.time()
+        if agora - mtime > INTERVALO_TOQUE:
+            try:
+                os.utime(destino, (agora, agora))
+            except FileNotFoundError:
+                return None
+        return destino
+
+    def registrar(self, tamanho):
+        with self.lock:
+            if self.total is None:
+                self.total = sum(arquivo[1] for arquivo in self._arquivos())
+            else:
+                self.total += tamanho
+            if self.total > self.limite:
+                self._limpar()
+
+    def _arquivos(self):
+        for pasta, _, nomes in os.walk(self.raiz):
+            for nome in nomes:
+                if not nome.endswith('.jpg'):
+                    continue
+                arquivo = os.path.join(pasta, nome)
+                try:
+                    info = os.stat(arquivo)
+                except FileNotFoundError:
+                    continue
+                yield info.st_mtime, info.st_size, arquivo
+
+    def _limpar(self):
+        arquivos = sorted(self._arquivos())
+        self.total = sum(tamanho for _, tamanho, _ in arquivos)
+        alvo = self.limite * 0.9
+        for _, tamanho, arquivo in arquivos:
+            if self.total <= alvo:
+                break
+            try:
+                os.unlink(arquivo)
+            except FileNotFoundError:
+                pass
+            self.total -= tamanho
+
+def init_app(app, instance_path):
+    pasta = app.config['UPLOAD_FOLDER']
+    if not os.path.isabs(pasta):
+        pasta = os.path.join(instance_path, pasta)
+    app.config.setdefault('CERTIFICADOS_DIR', os.environ.get('CERTIFICADOS_DIR', os.path.join(pasta, 'certificados')))
+    app.config.setdefault('CERTIFICADO_MAX_BYTES', int(os.environ.get('CERTIFICADO_MAX_BYTES', 20 * 1024 * 1024)))
+    app.config.setdefault('CERTIFICADO_CHUNK', 64 * 1024)
+    app.config.setdefault('CERTIFICADO_WORKERS', int(os.environ.get('CERTIFICADO_WORKERS', 2)))
+    app.config.setdefault('CERTIFICADO_QUEUE', 64)
+    app.config.setdefault('CERTIFICADOS_CACHE_DIR', os.environ.get(
+        'CERTIFICADOS_CACHE_DIR', os.path.join(app.config['CERTIFICADOS_DIR'], 'variantes')
+    ))
+    app.config.setdefault('CERTIFICADOS_CACHE_MAX_BYTES', int(os.environ.get('CERTIFICADOS_CACHE_MAX_BYTES', 256 * 1024 * 1024)))
+    # Prefixo de uma location "internal" do nginx que aponta para
+    # CERTIFICADOS_DIR; com ele a resposta leva X-Accel-Redirect
+    app.config.setdefault('CERTIFICADOS_ACCEL_REDIRECT', os.environ.get('CERTIFICADOS_ACCEL_REDIRECT'))
+    # Location do cache de miniaturas, necessária quando CERTIFICADOS_CACHE_DIR
+    # fica fora de CERTIFICADOS_DIR
+    app.config.setdefault('CERTIFICADOS_CACHE_ACCEL_REDIRECT', os.environ.get('CERTIFICADOS_CACHE_ACCEL_REDIRECT'))
+    if os.environ.get('USE_X_SENDFILE'):
+        app.config['USE_X_SENDFILE'] = os.environ['USE_X_SENDFILE'].lower() in ('1', 'true', 'yes')
+    app.extensions['certificados'] = {
+        'pool': PoolVariantes(app.config['CERTIFICADO_WORKERS'], app.config['CERTIFICADO_QUEUE']),
+        'cache': CacheVariantes(app.config['CERTIFICADOS_CACHE_DIR'], app.config['CERTIFICADOS_CACHE_MAX_BYTES'])
+    }
+
+def tipo_do_conteudo(cabecalho):
+    for assinatura, tipo in ASSINATURAS:
+        if cabecalho.startswith(assinatura):
+            return tipo
+    if cabecalho[:4] == b'RIFF' and cabecalho[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+def caminho(raiz, sha256):
+    """Caminho do original em raiz/ab/cd/abcd..."""
+    return os.path.join(raiz, sha256[:2], sha256[2:4], sha256)
+
+def salvar(stream):
+    """Grava o stream em disco em blocos, calculando o sha256 no caminho.
+
+    O arquivo vai primeiro para um temporário no mesmo diretório raiz e só
+    então é renomeado para o caminho do hash; se ele já existir, o
+    temporário é descartado (deduplicação). Retorna (sha256, content_type,
+    tamanho, novo).
+    """
+    config = current_app.config
+    raiz, maximo, bloco_max = config['CERTIFICADOS_DIR'], config['CERTIFICADO_MAX_BYTES'], config['CERTIFICADO_CHUNK']
+    temporarios = os.path.join(raiz, 'tmp')
+    os.makedirs(temporarios, exist_ok=True)
+
+    sha256 = hashlib.sha256()
+    tamanho, cabecalho, tipo = 0, b'', None
+    fd, temporario = tempfile.mkstemp(dir=temporarios)
+    try:
+        with os.fdopen(fd, 'wb') as destino:
+            while True:
+                bloco = stream.read(bloco_max)
+                if not bloco:
+                    break
+                tamanho += len(bloco)
+                if tamanho > maximo:
+                    raise ArquivoMuitoGrande()
+                if tipo is None:
+                    cabecalho += bloco[:TAMANHO_CABECALHO]
+                    if len(cabecalho) >= TAMANHO_CABECALHO:
+                        tipo = tipo_do_conteudo(cabecalho)
+                        if tipo is None:
+                            raise FormatoInvalido()
+                sha256.update(bloco)
+                destino.write(bloco)
+        if tipo is None:
+            tipo = tipo_do_conteudo(cabecalho)
+            if tipo is None:
+                raise FormatoInvalido()
+
+        sha256 = sha256.hexdigest()
+        final = caminho(raiz, sha256)
+        if os.path.exists(final):
+            os.unlink(temporario)
+            return sha256, tipo, tamanho, False
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(temporario, final)
+        return sha256, tipo, tamanho, True
+    except BaseException:
+        if os.path.exists(temporario):
+            os.unlink(temporario)
+        raise
+
+def gerar_variantes(raiz, cache, sha256, nomes=VARIANTES):
+    """Gera no cache as miniaturas JPEG que faltam. Não usa o contexto da aplicação."""
+    with cache.trava(sha256):
+        faltando = {nome: VARIANTES[nome] for nome in nomes if cache.obter(sha256, nome) is None}
+        if not faltando:
+            return
+        with Image.open(caminho(raiz, sha256)) as imagem:
+            # Em JPEG, decodifica direto em escala reduzida
+            maior = max(faltando.values())
+            imagem.draft('RGB', (maior, maior))
+            imagem = ImageOps.exif_transpose(imagem).convert('RGB')
+            for nome, lado in sorted(faltando.items(), key=lambda item: -item[1]):
+                imagem.thumbnail((lado, lado))
+                destino = cache.caminho(sha256, nome)
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                temporario = f'{destino}.{threading.get_ident()}.tmp'
+                imagem.save(temporario, 'JPEG', quality=82, optimize=True)
+                os.replace(temporario, destino)
+                cache.registrar(os.path.getsize(destino))
+
+def _gerar_variantes_com_log(raiz, cache, sha256):
+    try:
+        gerar_variantes(raiz, cache, sha256)
+    except Exception:
+        logger.exception('Erro ao gerar miniaturas do certificado %s', sha256)
+
+def agendar_variantes(sha256, content_type):
+    """Agenda as miniaturas de uma imagem; retorna False se a fila estiver cheia"""
+    if not content_type.startswith('image/'):
+        return False
+    estado = current_app.extensions['certificados']
+    futuro = estado['pool'].agendar(
+        _gerar_variantes_com_log, current_app.config['CERTIFICADOS_DIR'], estado['cache'], sha256
+    )
+    if futuro is None:
+        logger.warning('Fila de miniaturas cheia; certificado %s fica sem miniaturas por ora', sha256)
+        return False
+    return True
+
+# Falhas ao decodificar um original corrompido ou num formato que o Pillow não lê
+ERROS_IMAGEM = (OSError, Image.DecompressionBombError)
+
+def variante(sha256, nome):
+    """Caminho da variante no cache, gerada agora se ainda não existir"""
+    cache = current_app.extensions['certificados']['cache']
+    destino = cache.obter(sha256, nome)
+    if destino is None:
+        gerar_variantes(current_app.config['CERTIFICADOS_DIR'], cache, sha256, (nome,))
+        destino = cache.caminho(sha256, nome)
+    return destino
+
+def _accel_redirect(arquivo, config):
+    """URI interna do nginx para o arquivo, pela raiz que de fato o contém, ou None"""
+    raizes = (
+        (config['CERTIFICADOS_CACHE_DIR'], config['CERTIFICADOS_CACHE_ACCEL_REDIRECT']),
+        (config['CERTIFICADOS_DIR'], config['CERTIFICADOS_ACCEL_REDIRECT'])
+    )
+    arquivo = os.path.abspath(arquivo)
+    for raiz, prefixo in raizes:
+        raiz = os.path.abspath(raiz)
+        if prefixo and os.path.commonpath([arquivo, raiz]) == raiz:
+            relativo = os.path.relpath(arquivo, raiz)
+            return f"{prefixo.rstrip('/')}/{relativo.replace(os.sep, '/')}"
+    return None
+
+def enviar(arquivo, content_type, etag):
+    """Resposta com o arquivo, sem lê-lo no Python.
+
+    Sem proxy, o corpo é o próprio arquivo (wsgi.file_wrapper, que o
+    gunicorn envia com sendfile). Com USE_X_SENDFILE ou
+    CERTIFICADOS_ACCEL_REDIRECT, só os cabeçalhos saem daqui e o servidor
+    web envia o arquivo e trata o Range. Em todos os casos a aplicação
+    responde 304 para If-None-Match/If-Modified-Since.
+    """
+    config = current_app.config
+    accel = None
+    if config['CERTIFICADOS_ACCEL_REDIRECT'] or config['CERTIFICADOS_CACHE_ACCEL_REDIRECT']:
+        accel = _accel_redirect(arquivo, config)
+        if accel is None:
+            logger.warning('Arquivo %s fora das locations do X-Accel-Redirect; enviado pela aplicação', arquivo)
+    delegado = bool(accel or config['USE_X_SENDFILE'])
+    environ = request.environ
+    if delegado:
+        environ = {chave: valor for chave, valor in environ.items() if chave not in ('HTTP_RANGE', 'HTTP_IF_RANGE')}
+    resposta = send_file(
+        arquivo, environ, mimetype=content_type, use_x_sendfile=delegado,
+        response_class=current_app.response_class, conditional=True, etag=etag
+    )
+    resposta.cache_control.private = True
+    if accel and 'X-Sendfile' in resposta.headers:
+        del resposta.headers['X-Sendfile']
+        resposta.headers['X-Accel-Redirect'] = accel
+    return resposta
@@ -0,0 +1,125 @@
+"""Compressão das respostas negociada pelo Accept-Encoding.
+
+Respostas de texto (JSON, CSV, NDJSON...) acima de COMPRESSAO_MIN_BYTES saem
+em brotli, se o módulo estiver instalado e o cliente aceitar, ou em gzip.
+Respostas em streaming (exportações) são comprimidas bloco a bloco, com
+flush a cada bloco, então o cliente continua recebendo os dados conforme
+são gerados. Arquivos enviados com send_file (certificados), conteúdo já
+comprimido e respostas parciais passam direto.
+
+Respostas com ETag (coleções de referência) têm a forma comprimida guardada
+em cache pelo ETag: a mesma versão não é comprimida de novo. O ETag vira
+fraco na resposta comprimida, como no nginx, e as rotas comparam o
+If-None-Match com ``contains_weak``.
+"""
+from flask import current_app, request
+from app.utils.cache import TTLCache
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+TIPOS_COMPRIMIVEIS = (
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml', 'image/svg+xml'
+)
+
+class _Gzip:
+    def __init__(self, nivel):
+        self._compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def bloco(self, dados):
+        return self._compressor.compress(dados) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def fim(self):
+        return self._compressor.flush()
+
+class _Brotli:
+    def __init__(self, nivel):
+        self._compressor = brotli.Compressor(quality=nivel)
+
+    def bloco(self, dados):
+        return self._compressor.process(dados) + self._compressor.flush()
+
+    def fim(self):
+        return self._compressor.finish()
+
+def codificacoes():
+    """Codificações suportadas, da preferida para a menos preferida"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def _compressor(codificacao):
+    config = current_app.config
+    if codificacao == 'br':
+        return _Brotli(config['COMPRESSAO_NIVEL_BROTLI'])
+    return _Gzip(config['COMPRESSAO_NIVEL_GZIP'])
+
+def comprimir(dados, codificacao):
+    compressor = _compressor(codificacao)
+    return compressor.bloco(dados) + compressor.fim()
+
+def _em_streaming(iteravel, compressor):
+    try:
+        for parte in iteravel:
+            if isinstance(parte, str):
+                parte = parte.encode()
+            if parte:
+                yield compressor.bloco(parte)
+        yield compressor.fim()
+    finally:
+        if hasattr(iteravel, 'close'):
+            iteravel.close()
+
+def _comprimivel(response):
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in TIPOS_COMPRIMIVEIS
+
+def _aplicar(response):
+    if not _comprimivel(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.cache_control.no_transform):
+        return response
+
+    codificacao = request.accept_encodings.best_match(codificacoes())
+    if codificacao is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _em_streaming(response.response, _compressor(codificacao))
+        response.headers.pop('Content-Length', None)
+    else:
+        dados = response.get_data()
+        if len(dados) < current_app.config['COMPRESSAO_MIN_BYTES']:
+            return response
+        etag, fraco = response.get_etag()
+        cache = current_app.extensions['compressao']
+        chave = (etag, codificacao) if etag and not fraco else None
+        comprimido = cache.get(chave) if chave else None
+        if comprimido is None:
+            comprimido = comprimir(dados, codificacao)
+            if chave:
+                cache.set(chave, comprimido)
+        response.set_data(comprimido)
+        if etag:
+            response.set_etag(etag, weak=True)
+
+    response.headers['Content-Encoding'] = codificacao
+    return response
+
+def init_app(app):
+    app.config.setdefault('COMPRESSAO_ATIVA', os.environ.get('COMPRESSAO_ATIVA', '1').lower() in ('1', 'true', 'yes'))
+    app.config.setdefault('COMPRESSAO_MIN_BYTES', int(os.environ.get('COMPRESSAO_MIN_BYTES', 1024)))
+    app.config.setdefault('COMPRESSAO_NIVEL_GZIP', 6)
+    app.config.setdefault('COMPRESSAO_NIVEL_BROTLI', 5)
+    app.config.setdefault('COMPRESSAO_CACHE_SIZE', 256)
+    app.config.setdefault('COMPRESSAO_CACHE_TTL', 3600)
+    app.extensions['compressao'] = TTLCache(maxsize=app.config['COMPRESSAO_CACHE_SIZE'],
+                                            ttl=app.config['COMPRESSAO_CACHE_TTL'])
+    if app.config['COMPRESSAO_ATIVA']:
+        app.after_request(_aplicar)
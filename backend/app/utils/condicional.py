@@ -0,0 +1,48 @@
+"""GET condicional (ETag / If-None-Match) das listagens por usuário.
+
+O ETag é calculado antes de carregar qualquer linha: para a tabela listada,
+count, max(id) e max(updated_at) do escopo do usuário, lidos pelo índice
+(user_id, updated_at); para as tabelas que entram aninhadas na resposta, as
+versões do ``reference_cache``. Inserções e alterações mudam max(updated_at)
+(gravado com microssegundos, ver ``sql.agora_utc``) e remoções mudam o count.
+"""
+from flask import Response, request
+from sqlalchemy import func, select
+from app import db
+from app.utils.cache import reference_cache
+import hashlib
+
+CACHE_CONTROL = 'private, no-cache'
+
+def versao_escopo(modelo, user):
+    """count, max(id) e max(updated_at) das linhas visíveis para ``user``"""
+    query = select(func.count(modelo.id), func.max(modelo.id), func.max(modelo.updated_at))
+    if not user.is_admin:
+        query = query.where(modelo.user_id == user.id)
+    return db.session.execute(query).one()
+
+def etag(modelo, user, colecoes=(), *partes):
+    """ETag da listagem de ``modelo`` para ``user``.
+
+    ``colecoes`` são as coleções do reference_cache que aparecem na resposta;
+    ``partes`` são o que mais muda o corpo, como a query string.
+    """
+    valores = [modelo.__tablename__, 'admin' if user.is_admin else str(user.id)]
+    valores.extend(str(valor) for valor in versao_escopo(modelo, user))
+    valores.extend(f'{nome}={reference_cache.version(nome)}' for nome in colecoes)
+    valores.extend(str(parte) for parte in partes)
+    return hashlib.sha1('|'.join(valores).encode()).hexdigest()
+
+def nao_modificado(valor):
+    """Resposta 304 se o If-None-Match casa com ``valor``, senão None.
+
+    A comparação é fraca porque a versão comprimida sai com o ETag fraco.
+    """
+    if request.if_none_match.contains_weak(valor):
+        return com_etag(Response(status=304), valor)
+    return None
+
+def com_etag(response, valor):
+    response.set_etag(valor)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
@@ -0,0 +1,86 @@
+from collections import Counter
+from collections.abc import Mapping
+from sqlalchemy import String, cast, delete, func, insert, literal, select
+from app import db
+from app.utils.sql import insert_on_conflict
+
+# Dimensão da estatística -> coluna da visita usada como chave
+DIMENSOES_ID = {
+    'loja': 'loja_id',
+    'potencia': 'potencia_id',
+    'grau': 'grau_id',
+    'rito': 'rito_id'
+}
+CAMPOS_ESTATISTICA = ('user_id', 'data_visita', 'possui_certificado') + tuple(DIMENSOES_ID.values())
+
+def snapshot(visita):
+    """Copia os campos de uma visita (objeto ou mapeamento) que afetam as estatísticas"""
+    if isinstance(visita, Mapping):
+        return {campo: visita.get(campo) for campo in CAMPOS_ESTATISTICA}
+    return {campo: getattr(visita, campo) for campo in CAMPOS_ESTATISTICA}
+
+def _faixas(visita):
+    yield 'mes', visita['data_visita'].strftime('%Y-%m')
+    for dimensao, campo in DIMENSOES_ID.items():
+        yield dimensao, str(visita[campo])
+    if not visita['possui_certificado']:
+        yield 'certificado_pendente', ''
+
+def registrar(visitas, sinal=1):
+    """Soma (ou subtrai, com sinal=-1) as visitas nas estatísticas.
+
+    Deve ser chamado antes do commit, na mesma transação da alteração. Todas
+    as faixas afetadas são atualizadas com um único upsert em executemany.
+    """
+    deltas = Counter()
+    for visita in visitas:
+        visita = snapshot(visita)
+        for dimensao, chave in _faixas(visita):
+            deltas[(int(visita['user_id']), dimensao, chave)] += sinal
+
+    linhas = [
+        {'user_id': user_id, 'dimensao': dimensao, 'chave': chave, 'total': delta}
+        for (user_id, dimensao, chave), delta in deltas.items() if delta
+    ]
+    if not linhas:
+        return
+
+    from app.models import EstatisticaVisita
+    stmt = insert_on_conflict(EstatisticaVisita.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'dimensao', 'chave'],
+        set_={'total': EstatisticaVisita.__table__.c.total + stmt.excluded.total}
+    )
+    db.session.execute(stmt, linhas)
+
+def atualizar(anterior, atual):
+    """Move uma visita alterada das faixas antigas para as novas"""
+    registrar([anterior], -1)
+    registrar([atual])
+
+def _mes(coluna):
+    if db.engine.dialect.name == 'sqlite':
+        return func.strftime('%Y-%m', coluna)
+    return func.to_char(coluna, 'YYYY-MM')
+
+def rebuild():
+    """Recalcula todas as estatísticas a partir da tabela de visitas com INSERT ... SELECT"""
+    from app.models import EstatisticaVisita, Visita
+
+    db.session.execute(delete(EstatisticaVisita))
+    # (dimensão, expressão da chave, agrupar pela chave?, filtro)
+    consultas = [
+        ('mes', _mes(Visita.data_visita), True, None),
+        *((dimensao, cast(getattr(Visita, campo), String), True, None)
+          for dimensao, campo in DIMENSOES_ID.items()),
+        ('certificado_pendente', literal(''), False, Visita.possui_certificado.isnot(True))
+    ]
+    for dimensao, chave, agrupar, condicao in consultas:
+        consulta = select(Visita.user_id, literal(dimensao), chave, func.count())
+        consulta = consulta.group_by(Visita.user_id, chave) if agrupar else consulta.group_by(Visita.user_id)
+        if condicao is not None:
+            consulta = consulta.where(condicao)
+        db.session.execute(
+            insert(EstatisticaVisita).from_select(['user_id', 'dimensao', 'chave', 'total'], consulta)
+        )
+    db.session.commit()
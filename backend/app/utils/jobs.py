@@ -0,0 +1,283 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update
+from app import db
+from app.models import Job
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TERMINAIS = ('concluido', 'falhou', 'cancelado')
+
+Tarefa = namedtuple('Tarefa', 'funcao admin api max_tentativas validar')
+
+# Tipo do job -> Tarefa; preenchido pelo decorator ``tarefa`` na importação dos módulos
+TAREFAS = {}
+
+class JobCancelado(Exception):
+    """O cancelamento do job foi pedido durante a execução"""
+
+class ErroPermanente(Exception):
+    """Falha que não adianta repetir, como um arquivo inválido"""
+
+def tarefa(nome, admin=False, api=True, max_tentativas=None, validar=None):
+    """Registra uma função como tipo de job.
+
+    A função recebe o ``Contexto`` e os parâmetros do job como argumentos
+    nomeados e retorna o resultado (serializável em JSON). ``api`` diz se o
+    tipo pode ser criado por ``POST /api/jobs``; ``validar`` recebe os
+    parâmetros vindos da API e devolve os normalizados ou levanta ValueError.
+    """
+    def registrar(funcao):
+        TAREFAS[nome] = Tarefa(funcao, admin, api, max_tentativas, validar)
+        return funcao
+    return registrar
+
+class Contexto:
+    """O que a tarefa em execução sabe do seu job"""
+
+    def __init__(self, job, intervalo):
+        self.job_id = job.id
+        self.user_id = job.user_id
+        self.tentativa = job.tentativas
+        self.intervalo = intervalo
+        self._ultimo = 0
+
+    def progresso(self, feito, total=None):
+        """Registra o progresso e levanta JobCancelado se o cancelamento foi pedido.
+
+        Grava em transação própria, no máximo a cada JOBS_PROGRESS_INTERVAL
+        segundos, e também renova o heartbeat do job. No SQLite, chame fora
+        de uma transação de escrita da tarefa (depois do commit do lote).
+        """
+        agora = time.monotonic()
+        if total is None and agora - self._ultimo < self.intervalo:
+            return
+        self._ultimo = agora
+        valores = {'progresso': feito, 'heartbeat': agora_utc()}
+        if total is not None:
+            valores['total'] = total
+        with db.engine.begin() as conn:
+            cancelar = conn.execute(
+                update(Job).where(Job.id == self.job_id).values(**valores).returning(Job.cancelar)
+            ).scalar()
+        if cancelar:
+            raise JobCancelado()
+
+def agora_utc():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def init_app(app, instance_path):
+    app.config.setdefault('JOBS_DIR', os.environ.get('JOBS_DIR', os.path.join(instance_path, 'jobs')))
+    # Com JOBS_EMBUTIDO, o próprio processo web executa os jobs em threads;
+    # desligue quando houver processos ``flask worker`` dedicados
+    app.config.setdefault('JOBS_EMBUTIDO', os.environ.get('JOBS_EMBUTIDO', '1').lower() in ('1', 'true', 'yes'))
+    app.config.setdefault('JOBS_WORKERS', int(os.environ.get('JOBS_WORKERS', 1)))
+    app.config.setdefault('JOBS_POLL', 2.0)
+    app.config.setdefault('JOBS_LEASE', int(os.environ.get('JOBS_LEASE', 600)))
+    app.config.setdefault('JOBS_MAX_TENTATIVAS', 3)
+    app.config.setdefault('JOBS_RETRY_DELAY', 10)
+    app.config.setdefault('JOBS_PROGRESS_INTERVAL', 1.0)
+    app.extensions['jobs'] = Executor(app)
+    # Registra as tarefas que não pertencem a nenhum blueprint
+    from app import tarefas  # noqa: F401
+
+def arquivo(job_id, extensao):
+    """Caminho de um arquivo produzido pelo job, em JOBS_DIR"""
+    from flask import current_app
+    pasta = current_app.config['JOBS_DIR']
+    os.makedirs(pasta, exist_ok=True)
+    return os.path.join(pasta, f'{job_id}.{extensao}')
+
+def enfileirar(tipo, parametros=None, user_id=None):
+    """Cria o job pendente, confirma e acorda o executor local"""
+    from flask import current_app
+    job = Job(
+        tipo=tipo,
+        user_id=user_id,
+        parametros=parametros or {},
+        max_tentativas=TAREFAS[tipo].max_tentativas or current_app.config['JOBS_MAX_TENTATIVAS'],
+        executar_apos=agora_utc()
+    )
+    db.session.add(job)
+    db.session.commit()
+    if current_app.config['JOBS_EMBUTIDO']:
+        current_app.extensions['jobs'].acordar()
+    return job
+
+def cancelar(job):
+    """Cancela um job pendente na hora; um em execução para no próximo progresso.
+
+    Retorna o status em que o job foi encontrado ('pendente' ou 'executando'),
+    ou None se ele já terminou. O status do job recarregado pode já ser
+    'cancelado' mesmo quando ele estava em execução.
+    """
+    encontrado = None
+    if db.session.execute(
+        update(Job).where(Job.id == job.id, Job.status == 'pendente')
+        .values(status='cancelado', cancelar=True, concluido_em=agora_utc())
+        .execution_options(synchronize_session=False)
+    ).rowcount:
+        encontrado = 'pendente'
+    elif db.session.execute(
+        update(Job).where(Job.id == job.id, Job.status == 'executando').values(cancelar=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount:
+        encontrado = 'executando'
+    db.session.commit()
+    db.session.refresh(job)
+    return encontrado
+
+def reservar(worker):
+    """Marca o próximo job pendente como deste worker e retorna seu id, ou None.
+
+    O UPDATE só vale se o job ainda estiver pendente, então dois workers
+    nunca executam o mesmo job; no PostgreSQL as linhas travadas por outro
+    worker são puladas.
+    """
+    agora = agora_utc()
+    proximo = (select(Job.id)
+               .where(Job.status == 'pendente', Job.executar_apos <= agora)
+               .order_by(Job.executar_apos, Job.id)
+               .limit(1)
+               .with_for_update(skip_locked=True)
+               .scalar_subquery())
+    job_id = db.session.execute(
+        update(Job).where(Job.id == proximo, Job.status == 'pendente')
+        .values(status='executando', worker=worker, heartbeat=agora, iniciado_em=agora,
+                tentativas=Job.tentativas + 1)
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.session.commit()
+    return job_id
+
+def recuperar_expirados(lease):
+    """Devolve à fila os jobs cujo worker parou de dar sinal há mais de ``lease`` segundos"""
+    agora = agora_utc()
+    limite = agora - timedelta(seconds=lease)
+    perdidos = (Job.status == 'executando', Job.heartbeat < limite)
+    devolvidos = db.session.execute(
+        update(Job).where(*perdidos, Job.tentativas < Job.max_tentativas)
+        .values(status='pendente', worker=None, executar_apos=agora, erro='Worker interrompido durante a execução')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    falhos = db.session.execute(
+        update(Job).where(*perdidos)
+        .values(status='falhou', concluido_em=agora, erro='Worker interrompido durante a execução')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if devolvidos or falhos:
+        logger.warning('Jobs expirados: %s devolvidos à fila, %s marcados como falhos', devolvidos, falhos)
+
+def _finalizar(job_id, dono, **valores):
+    # Só grava se o job ainda for deste worker (o lease pode ter expirado)
+    db.session.execute(
+        update(Job).where(Job.id == job_id, Job.worker == dono, Job.status == 'executando').values(**valores)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+def executar(job_id, worker, config):
+    """Executa um job já reservado e registra o resultado, a falha ou a nova tentativa"""
+    job = db.session.get(Job, job_id)
+    tipo, parametros, tentativas, max_tentativas = job.tipo, dict(job.parametros or {}), job.tentativas, job.max_tentativas
+    contexto = Contexto(job, config['JOBS_PROGRESS_INTERVAL'])
+    cancelamento_pedido = job.cancelar
+    db.session.commit()
+
+    inicio = time.perf_counter()
+    try:
+        if tipo not in TAREFAS:
+            raise ErroPermanente(f'Tipo de job desconhecido: {tipo}')
+        if cancelamento_pedido:
+            raise JobCancelado()
+        resultado = TAREFAS[tipo].funcao(contexto, **parametros)
+        db.session.commit()
+    except JobCancelado:
+        db.session.rollback()
+        _finalizar(job_id, worker, status='cancelado', concluido_em=agora_utc())
+        logger.info('Job %s (%s) cancelado', job_id, tipo)
+        return
+    except Exception as e:
+        db.session.rollback()
+        erro = str(e) or e.__class__.__name__
+        if isinstance(e, ErroPermanente) or tentativas >= max_tentativas:
+            logger.exception('Job %s (%s) falhou na tentativa %s', job_id, tipo, tentativas)
+            _finalizar(job_id, worker, status='falhou', erro=erro, concluido_em=agora_utc())
+        else:
+            espera = config['JOBS_RETRY_DELAY'] * 2 ** (tentativas - 1)
+            logger.warning('Job %s (%s) falhou na tentativa %s, nova tentativa em %ss: %s', job_id, tipo, tentativas, espera, erro)
+            _finalizar(job_id, worker, status='pendente', erro=erro, worker=None,
+                       executar_apos=agora_utc() + timedelta(seconds=espera))
+        return
+
+    job = db.session.get(Job, job_id)
+    _finalizar(job_id, worker, status='concluido', resultado=resultado, erro=None,
+               progresso=job.total if job.total is not None else job.progresso, concluido_em=agora_utc())
+    logger.info('Job %s (%s) concluído', job_id, tipo,
+                extra={'duration_ms': round((time.perf_counter() - inicio) * 1000, 1)})
+
+def trabalhar(app, worker, burst=False, parar=None, evento=None):
+    """Laço de um worker: reserva e executa jobs até ``parar`` ser sinalizado.
+
+    Com ``burst``, volta assim que não houver job pronto para executar.
+    Sem job, espera JOBS_POLL segundos ou até ``evento`` ser sinalizado.
+    """
+    config = app.config
+    proxima_recuperacao = 0
+    while parar is None or not parar.is_set():
+        job_id = None
+        try:
+            with app.app_context():
+                if time.monotonic() >= proxima_recuperacao:
+                    recuperar_expirados(config['JOBS_LEASE'])
+                    proxima_recuperacao = time.monotonic() + 60
+                job_id = reservar(worker)
+                if job_id is not None:
+                    executar(job_id, worker, config)
+        except Exception:
+            logger.exception('Erro no worker de jobs %s', worker)
+        if job_id is None:
+            if burst:
+                return
+            if evento is not None:
+                evento.wait(config['JOBS_POLL'])
+                evento.clear()
+            else:
+                time.sleep(config['JOBS_POLL'])
+
+def nome_worker(sufixo=''):
+    return f'{socket.gethostname()}:{os.getpid()}{sufixo}'
+
+class Executor:
+    """Threads que executam os jobs dentro do processo web (JOBS_EMBUTIDO).
+
+    Só começam no primeiro job enfileirado por este processo, então a
+    inicialização não acessa o banco e nada roda no master do gunicorn.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.evento = threading.Event()
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def acordar(self):
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    for i in range(self.app.config['JOBS_WORKERS']):
+                        threading.Thread(
+                            target=trabalhar,
+                            kwargs={'app': self.app, 'worker': nome_worker(f':{i}'), 'evento': self.evento},
+                            name=f'jobs-{i}',
+                            daemon=True
+                        ).start()
+                    self.pid = os.getpid()
+        self.evento.set()
@@ -0,0 +1,178 @@
+from collections import OrderedDict, deque
+import math
+import os
+import sqlite3
+import threading
+import time
+
+class LimitadorMemoria:
+    """Janela deslizante de tentativas por chave, com backoff exponencial.
+
+    Cada tentativa admitida é registrada antes da verificação da senha, de
+    modo que uma rajada simultânea também conta. Ao atingir ``maximo``
+    tentativas dentro da janela a chave fica bloqueada por
+    ``backoff_base * 2**excesso`` segundos, limitado a ``backoff_max``.
+    As chaves são mantidas em um LRU de até ``maxsize`` entradas.
+    """
+
+    def __init__(self, janela, backoff_base, backoff_max, maxsize=10000):
+        self.janela = janela
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.maxsize = maxsize
+        self._estado = OrderedDict()  # chave -> [deque de instantes, bloqueado_ate]
+        self._lock = threading.Lock()
+
+    def _backoff(self, excesso):
+        return min(self.backoff_max, self.backoff_base * 2 ** min(excesso, 32))
+
+    def tentar(self, limites):
+        """Registra uma tentativa para cada (chave, maximo).
+
+        Retorna 0 se a tentativa foi admitida ou os segundos de espera se
+        alguma das chaves está bloqueada (nesse caso nada é registrado).
+        """
+        agora = time.monotonic()
+        with self._lock:
+            espera = 0
+            for chave, _ in limites:
+                estado = self._estado.get(chave)
+                if estado is not None and estado[1] > agora:
+                    espera = max(espera, estado[1] - agora)
+            if espera:
+                return espera
+
+            for chave, maximo in limites:
+                estado = self._estado.get(chave)
+                if estado is None:
+                    estado = self._estado[chave] = [deque(maxlen=maximo + 32), 0]
+                self._estado.move_to_end(chave)
+                instantes = estado[0]
+                while instantes and instantes[0] <= agora - self.janela:
+                    instantes.popleft()
+                instantes.append(agora)
+                excesso = len(instantes) - maximo
+                if excesso >= 0:
+                    estado[1] = agora + self._backoff(excesso)
+
+            while len(self._estado) > self.maxsize:
+                self._estado.popitem(last=False)
+            return 0
+
+    def sucesso(self, limites):
+        """Após um login válido: zera a primeira chave (o usuário) e desconta
+        a tentativa das demais (o IP), que só acumulam falhas"""
+        (chave_limpa, _), *devolvidas = limites
+        with self._lock:
+            self._estado.pop(chave_limpa, None)
+            for chave, _ in devolvidas:
+                estado = self._estado.get(chave)
+                if estado is not None and estado[0]:
+                    estado[0].pop()
+
+class LimitadorSQLite(LimitadorMemoria):
+    """Mesma política do LimitadorMemoria, com estado em um arquivo SQLite local.
+
+    Permite que todos os workers de uma máquina compartilhem os contadores.
+    O arquivo é um rascunho independente do banco da aplicação e é criado
+    na primeira tentativa de login, não na inicialização.
+    """
+
+    LIMPEZA_A_CADA = 1000
+
+    def __init__(self, caminho, janela, backoff_base, backoff_max):
+        super().__init__(janela, backoff_base, backoff_max)
+        self.caminho = caminho
+        self._local = threading.local()
+        self._contador = 0
+
+    def _conexao(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS tentativas_login (chave TEXT NOT NULL, instante REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_tentativas_login_chave ON tentativas_login (chave, instante)')
+            conn.execute('CREATE TABLE IF NOT EXISTS bloqueios_login (chave TEXT PRIMARY KEY, ate REAL NOT NULL)')
+            self._local.conn = conn
+        return conn
+
+    def _transacao(self, funcao):
+        conn = self._conexao()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            resultado = funcao(conn)
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return resultado
+
+    def tentar(self, limites):
+        agora = time.time()
+
+        def registrar(conn):
+            marcadores = ','.join('?' * len(limites))
+            ate = conn.execute(f'SELECT MAX(ate) FROM bloqueios_login WHERE chave IN ({marcadores})',
+                               [chave for chave, _ in limites]).fetchone()[0]
+            if ate is not None and ate > agora:
+                return ate - agora
+
+            for chave, maximo in limites:
+                conn.execute('DELETE FROM tentativas_login WHERE chave = ? AND instante <= ?',
+                             (chave, agora - self.janela))
+                conn.execute('INSERT INTO tentativas_login (chave, instante) VALUES (?, ?)', (chave, agora))
+                total = conn.execute('SELECT COUNT(*) FROM tentativas_login WHERE chave = ?', (chave,)).fetchone()[0]
+                excesso = total - maximo
+                if excesso >= 0:
+                    conn.execute('INSERT OR REPLACE INTO bloqueios_login (chave, ate) VALUES (?, ?)',
+                                 (chave, agora + self._backoff(excesso)))
+
+            self._contador += 1
+            if self._contador % self.LIMPEZA_A_CADA == 0:
+                # Chaves que não voltaram a tentar não são limpas pelo DELETE acima
+                conn.execute('DELETE FROM tentativas_login WHERE instante <= ?', (agora - self.janela,))
+                conn.execute('DELETE FROM bloqueios_login WHERE ate <= ?', (agora,))
+            return 0
+
+        return self._transacao(registrar)
+
+    def sucesso(self, limites):
+        (chave_limpa, _), *devolvidas = limites
+
+        def registrar(conn):
+            conn.execute('DELETE FROM tentativas_login WHERE chave = ?', (chave_limpa,))
+            conn.execute('DELETE FROM bloqueios_login WHERE chave = ?', (chave_limpa,))
+            for chave, _ in devolvidas:
+                conn.execute('DELETE FROM tentativas_login WHERE rowid = '
+                             '(SELECT MAX(rowid) FROM tentativas_login WHERE chave = ?)', (chave,))
+
+        self._transacao(registrar)
+
+def retry_after(espera):
+    return str(max(1, math.ceil(espera)))
+
+def limites_login(app, username, ip):
+    """Chaves e limites de uma tentativa de login"""
+    return [
+        (f"usuario:{str(username).strip().lower()}", app.config['LOGIN_MAX_ATTEMPTS_USER']),
+        (f'ip:{ip}', app.config['LOGIN_MAX_ATTEMPTS_IP'])
+    ]
+
+def init_app(app):
+    app.config.setdefault('LOGIN_WINDOW', 15 * 60)
+    app.config.setdefault('LOGIN_MAX_ATTEMPTS_USER', 5)
+    app.config.setdefault('LOGIN_MAX_ATTEMPTS_IP', 50)
+    app.config.setdefault('LOGIN_BACKOFF_BASE', 1)
+    app.config.setdefault('LOGIN_BACKOFF_MAX', 15 * 60)
+    app.config.setdefault('LOGIN_LIMITER_SIZE', 10000)
+    # Caminho de um arquivo SQLite para compartilhar os contadores entre workers
+    app.config.setdefault('LOGIN_LIMITER_DB', os.environ.get('LOGIN_LIMITER_DB'))
+
+    politica = (app.config['LOGIN_WINDOW'], app.config['LOGIN_BACKOFF_BASE'], app.config['LOGIN_BACKOFF_MAX'])
+    if app.config['LOGIN_LIMITER_DB']:
+        limitador = LimitadorSQLite(app.config['LOGIN_LIMITER_DB'], *politica)
+    else:
+        limitador = LimitadorMemoria(*politica, maxsize=app.config['LOGIN_LIMITER_SIZE'])
+    app.extensions['limite_login'] = limitador
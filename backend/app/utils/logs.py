@@ -0,0 +1,136 @@
+from flask import g, has_request_context, request
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime, timezone
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+
+access_logger = logging.getLogger('app.access')
+
+# Atributos padrão de um LogRecord; o que sobrar veio de extra=
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+_formatador = logging.Formatter()
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos de contexto da requisição"""
+
+    def format(self, record):
+        dados = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO and valor is not None:
+                dados[chave] = valor
+        if record.exc_info:
+            dados['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            dados['exc'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+class ContextoFilter(logging.Filter):
+    """Anexa request_id e user_id da requisição corrente ao registro"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.user_id = g.get('user_id')
+        return True
+
+class AmostragemFilter(logging.Filter):
+    """Deixa passar só uma fração dos registros DEBUG; os demais níveis passam sempre"""
+
+    def __init__(self, taxa):
+        super().__init__()
+        self.taxa = taxa
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.taxa >= 1:
+            return True
+        return random.random() < self.taxa
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Só interpola a mensagem na thread de origem (os args podem mudar
+        # depois); o JSON e a escrita ficam para a thread do listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formatador.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class _StdoutHandler(logging.StreamHandler):
+    """Escreve no sys.stdout corrente, mesmo que ele seja trocado depois"""
+
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+def _handler_saida(formato):
+    saida = _StdoutHandler()
+    if formato == 'json':
+        saida.setFormatter(JsonFormatter())
+    else:
+        saida.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s',
+                                             defaults={'request_id': '-'}))
+    return saida
+
+def _configurar(app):
+    raiz = logging.getLogger('app')
+    raiz.setLevel(app.config['LOG_LEVEL'])
+    raiz.propagate = False
+
+    # O pacote é configurado uma só vez por processo, mesmo com várias apps
+    for handler in raiz.handlers:
+        if isinstance(handler, _QueueHandler):
+            handler.amostragem.taxa = app.config['LOG_DEBUG_SAMPLE_RATE']
+            return handler.listener
+
+    fila = queue.SimpleQueue()
+    handler = _QueueHandler(fila)
+    handler.amostragem = AmostragemFilter(app.config['LOG_DEBUG_SAMPLE_RATE'])
+    handler.addFilter(ContextoFilter())
+    handler.addFilter(handler.amostragem)
+    handler.listener = QueueListener(fila, _handler_saida(app.config['LOG_FORMAT']), respect_handler_level=True)
+    handler.listener.start()
+    atexit.register(handler.listener.stop)
+    raiz.addHandler(handler)
+    return handler.listener
+
+def _iniciar_requisicao():
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g.user_id = None
+    g.inicio_requisicao = time.perf_counter()
+
+def _finalizar_requisicao(response):
+    if 'request_id' not in g:
+        return response
+    response.headers['X-Request-ID'] = g.request_id
+    if access_logger.isEnabledFor(logging.INFO):
+        access_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.inicio_requisicao) * 1000, 2)
+        })
+    return response
+
+def init_app(app):
+    app.config.setdefault('LOG_LEVEL', os.environ.get('LOG_LEVEL', 'INFO').upper())
+    app.config.setdefault('LOG_FORMAT', os.environ.get('LOG_FORMAT', 'json'))
+    app.config.setdefault('LOG_DEBUG_SAMPLE_RATE', float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 0.1)))
+
+    app.extensions['logs'] = _configurar(app)
+    app.before_request(_iniciar_requisicao)
+    app.after_request(_finalizar_requisicao)
@@ -0,0 +1,94 @@
+from flask import current_app
+from sqlalchemy import delete, select, update
+from app import db
+from app.models import Loja, Oriente
+from app.models.oriente import chave_oriente
+from app.utils.cache import TTLCache, reference_cache
+from app.utils.sql import insert_on_conflict
+import threading
+
+def init_app(app):
+    app.config.setdefault('ORIENTE_CACHE_SIZE', 4096)
+    app.config.setdefault('ORIENTE_CACHE_TTL', 3600)
+    app.extensions['orientes'] = {
+        'lock': threading.Lock(),
+        'versao': None,
+        'ids': TTLCache(maxsize=app.config['ORIENTE_CACHE_SIZE'], ttl=app.config['ORIENTE_CACHE_TTL'])
+    }
+
+def _ids():
+    """Mapa chave -> id válido para a versão atual dos orientes.
+
+    A versão já é lida uma vez por requisição pelo cache de referência;
+    qualquer alteração em orientes (inclusive mesclas) descarta o mapa.
+    """
+    estado = current_app.extensions['orientes']
+    versao = reference_cache.version('orientes')
+    if estado['versao'] != versao:
+        with estado['lock']:
+            estado['ids'].clear()
+            estado['versao'] = versao
+    return estado['ids']
+
+def obter_ou_criar(nome, uf):
+    """Id do oriente com a chave normalizada de (nome, uf), criado se preciso.
+
+    O caso comum, um oriente já conhecido, é resolvido pelo mapa em memória
+    sem consultas. A criação é um INSERT ... ON CONFLICT DO NOTHING sobre o
+    índice único da chave, então requisições simultâneas não geram
+    duplicatas. O commit fica com quem chama.
+    """
+    chave = chave_oriente(nome, uf)
+    ids = _ids()
+    id_ = ids.get(chave)
+    if id_ is not None:
+        return id_
+
+    id_ = db.session.scalar(select(Oriente.id).where(Oriente.chave == chave))
+    if id_ is None:
+        stmt = (insert_on_conflict(Oriente)
+                .values(nome=nome.strip(), uf=uf.strip().upper(), chave=chave)
+                .on_conflict_do_nothing(index_elements=['chave'])
+                .returning(Oriente.id))
+        id_ = db.session.scalar(stmt)
+        if id_ is not None:
+            # Ainda não commitado: só entra no mapa depois, pela leitura
+            reference_cache.invalidate('orientes')
+            return id_
+        # Outra requisição criou o mesmo oriente entre o SELECT e o INSERT
+        id_ = db.session.scalar(select(Oriente.id).where(Oriente.chave == chave))
+
+    ids.set(chave, id_)
+    return id_
+
+def mesclar_duplicados(aplicar=True):
+    """Une os orientes cuja chave normalizada coincide e recalcula as chaves.
+
+    Em cada grupo fica o oriente de menor id; as lojas dos demais passam
+    para ele e os demais são removidos. Com aplicar=False só calcula.
+    Retorna a lista de (id mantido, ids removidos) e o número de chaves
+    recalculadas.
+    """
+    linhas = db.session.execute(
+        select(Oriente.id, Oriente.nome, Oriente.uf, Oriente.chave).order_by(Oriente.id)
+    ).all()
+    grupos = {}
+    for linha in linhas:
+        grupos.setdefault(chave_oriente(linha.nome, linha.uf), []).append(linha)
+
+    mesclas = [(grupo[0].id, [linha.id for linha in grupo[1:]]) for grupo in grupos.values() if len(grupo) > 1]
+    chaves = {grupo[0].id: chave for chave, grupo in grupos.items() if grupo[0].chave != chave}
+    if not aplicar or not (mesclas or chaves):
+        return mesclas, len(chaves)
+
+    for mantido, removidos in mesclas:
+        db.session.execute(update(Loja).where(Loja.oriente_id.in_(removidos)).values(oriente_id=mantido))
+        db.session.execute(delete(Oriente).where(Oriente.id.in_(removidos)))
+    # Em duas etapas, para que uma chave nova não colida com a antiga de outro oriente
+    for id_ in chaves:
+        db.session.execute(update(Oriente).where(Oriente.id == id_).values(chave=f'#{id_}'))
+    for id_, chave in chaves.items():
+        db.session.execute(update(Oriente).where(Oriente.id == id_).values(chave=chave))
+    reference_cache.invalidate('orientes')
+    db.session.commit()
+    return mesclas, len(chaves)
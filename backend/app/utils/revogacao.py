@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import delete, select
+from app import db, jwt
+import hashlib
+import math
+import threading
+import time
+
+class BloomFilter:
+    """Conjunto probabilístico: sem falsos negativos, falsos positivos raros"""
+
+    def __init__(self, capacidade=100000, taxa_erro=0.01):
+        self.bits = max(8, int(-capacidade * math.log(taxa_erro) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacidade * math.log(2)))
+        self._dados = bytearray((self.bits + 7) // 8)
+
+    def _posicoes(self, chave):
+        # Hash duplo (Kirsch-Mitzenmacher) a partir de um único blake2b
+        digest = hashlib.blake2b(chave.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, chave):
+        for posicao in self._posicoes(chave):
+            self._dados[posicao >> 3] |= 1 << (posicao & 7)
+
+    def __contains__(self, chave):
+        return all(self._dados[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(chave))
+
+class ListaRevogacao:
+    """Lista de tokens revogados com um bloom filter local na frente da tabela.
+
+    A verificação de um token comum custa só o teste no filtro. Revogações
+    feitas por outros workers entram no filtro na sincronização incremental,
+    feita a cada JWT_DENYLIST_SYNC segundos; as deste processo entram na hora.
+    Um acerto no filtro é confirmado na tabela, que é a fonte da verdade.
+    Periodicamente os tokens já expirados são apagados e o filtro é refeito.
+    """
+
+    def __init__(self, intervalo, reconstrucao, capacidade):
+        self.intervalo = intervalo
+        self.reconstrucao = reconstrucao
+        self.capacidade = capacidade
+        self._filtro = None
+        self._ultimo_id = 0
+        self._sincronizado_em = 0
+        self._reconstruido_em = 0
+        self._lock = threading.Lock()
+
+    def _sincronizar(self):
+        from app.models import TokenRevogado
+        agora = time.monotonic()
+        if self._filtro is not None and agora - self._sincronizado_em < self.intervalo:
+            return
+
+        with self._lock:
+            if self._filtro is None or agora - self._reconstruido_em >= self.reconstrucao:
+                if self._filtro is not None:
+                    self.limpar_expirados()
+                filtro, ultimo_id = BloomFilter(self.capacidade), 0
+                self._reconstruido_em = agora
+            else:
+                filtro, ultimo_id = self._filtro, self._ultimo_id
+            novos = db.session.execute(
+                select(TokenRevogado.id, TokenRevogado.jti)
+                .where(TokenRevogado.id > ultimo_id)
+                .where(TokenRevogado.expira_em > _agora_utc())
+                .order_by(TokenRevogado.id)
+            ).all()
+            for id_, jti in novos:
+                filtro.add(jti)
+                ultimo_id = max(ultimo_id, id_)
+            self._filtro, self._ultimo_id = filtro, ultimo_id
+            self._sincronizado_em = agora
+
+    def contem(self, jti):
+        self._sincronizar()
+        if jti not in self._filtro:
+            return False
+        from app.models import TokenRevogado
+        return db.session.execute(select(TokenRevogado.id).where(TokenRevogado.jti == jti)).first() is not None
+
+    def revogar(self, dados_token):
+        """Revoga um token decodificado; o commit fica com quem chama"""
+        from app.models import TokenRevogado
+        self._sincronizar()
+        db.session.add(TokenRevogado(
+            jti=dados_token['jti'],
+            tipo=dados_token['type'],
+            user_id=int(dados_token['sub']),
+            expira_em=datetime.fromtimestamp(dados_token['exp'], timezone.utc).replace(tzinfo=None)
+        ))
+        self._filtro.add(dados_token['jti'])
+
+    def limpar_expirados(self):
+        """Apaga os tokens que já expiraram, em transação própria"""
+        from app.models import TokenRevogado
+        with db.engine.begin() as conn:
+            return conn.execute(delete(TokenRevogado).where(TokenRevogado.expira_em <= _agora_utc())).rowcount
+
+def _agora_utc():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def init_app(app):
+    app.config.setdefault('JWT_DENYLIST_SYNC', 5)
+    app.config.setdefault('JWT_DENYLIST_REBUILD', 3600)
+    app.config.setdefault('JWT_DENYLIST_CAPACITY', 100000)
+    app.extensions['revogacao'] = ListaRevogacao(
+        app.config['JWT_DENYLIST_SYNC'],
+        app.config['JWT_DENYLIST_REBUILD'],
+        app.config['JWT_DENYLIST_CAPACITY']
+    )
+
+@jwt.token_in_blocklist_loader
+def token_revogado(jwt_header, jwt_data):
+    return current_app.extensions['revogacao'].contem(jwt_data['jti'])
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+import os
+import threading
+
+class FilaSenhasCheia(Exception):
+    """Há mais hashes pendentes do que PASSWORD_HASH_QUEUE permite"""
+
+class PoolSenhas:
+    """Executa os hashes de senha em um pool de threads limitado.
+
+    hashlib libera o GIL durante o pbkdf2/scrypt, então as threads do pool
+    rodam em paralelo com as requisições; o limite de workers impede que uma
+    rajada de logins ocupe todos os núcleos. Acima de ``fila`` tarefas
+    pendentes, novas submissões falham com FilaSenhasCheia em vez de esperar.
+    """
+
+    def __init__(self, workers, fila):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='senhas')
+        self.vagas = threading.BoundedSemaphore(workers + fila)
+
+    def executar(self, funcao, *args):
+        if not self.vagas.acquire(blocking=False):
+            raise FilaSenhasCheia()
+        try:
+            futuro = self.executor.submit(funcao, *args)
+        except Exception:
+            self.vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self.vagas.release())
+        return futuro.result()
+
+def init_app(app):
+    app.config.setdefault('PASSWORD_HASH_METHOD', os.environ.get('PASSWORD_HASH_METHOD', f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'))
+    app.config.setdefault('PASSWORD_HASH_WORKERS', int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2))))
+    app.config.setdefault('PASSWORD_HASH_QUEUE', int(os.environ.get('PASSWORD_HASH_QUEUE', 32)))
+    app.config.setdefault('PASSWORD_HASH_RETRY_AFTER', 1)
+    app.extensions['senhas'] = PoolSenhas(app.config['PASSWORD_HASH_WORKERS'], app.config['PASSWORD_HASH_QUEUE'])
+
+def _normalizar(metodo):
+    """Forma completa do método, como o Werkzeug grava no hash"""
+    nome, *args = metodo.split(':')
+    if nome == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iteracoes = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iteracoes}'
+    if nome == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    return metodo
+
+def gerar_hash(senha):
+    metodo = current_app.config['PASSWORD_HASH_METHOD']
+    return current_app.extensions['senhas'].executar(generate_password_hash, senha, metodo)
+
+def verificar(hash_senha, senha):
+    if not hash_senha:
+        return False
+    return current_app.extensions['senhas'].executar(check_password_hash, hash_senha, senha)
+
+def precisa_rehash(hash_senha):
+    """Indica se o hash foi gerado com parâmetros diferentes dos atuais"""
+    metodo = hash_senha.split('$', 1)[0]
+    return _normalizar(metodo) != _normalizar(current_app.config['PASSWORD_HASH_METHOD'])
@@ -0,0 +1,180 @@
+"""Serialização JSON das respostas.
+
+``ProvedorJSON`` é o provedor JSON da aplicação: usa o orjson quando ele está
+instalado e o json da biblioteca padrão caso contrário, com a mesma saída
+nos dois casos (datas em ISO 8601, UTF-8 sem escapes, chaves na ordem de
+inserção).
+
+``serializador`` gera, uma vez por modelo, uma função que escreve a
+instância direto como texto JSON, sem o dict intermediário do ``to_dict``.
+As listagens grandes juntam esses textos com ``lista`` e respondem com
+``resposta``.
+"""
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from json.encoder import encode_basestring
+import dataclasses
+import datetime
+import decimal
+import json
+import os
+import uuid
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+MIMETYPE = 'application/json'
+
+def _padrao(o):
+    """Tipos que nenhum dos encoders serializa sozinho"""
+    if isinstance(o, (datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+def dumps(obj):
+    """Texto JSON compacto de ``obj``, pelo encoder mais rápido disponível"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_padrao, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=_padrao, ensure_ascii=False, separators=(',', ':'))
+
+class ProvedorJSON(DefaultJSONProvider):
+    """jsonify, request.get_json e afins com orjson quando disponível.
+
+    JSON_ORJSON=0 força a biblioteca padrão (útil para comparar as saídas).
+    """
+    sort_keys = False
+    ensure_ascii = False
+    default = staticmethod(_padrao)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.orjson = orjson if app.config['JSON_ORJSON'] else None
+
+    def dumps(self, obj, **kwargs):
+        if self.orjson is not None and not kwargs:
+            return self.orjson.dumps(obj, default=_padrao, option=self.orjson.OPT_NON_STR_KEYS).decode()
+        kwargs.setdefault('default', _padrao)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('sort_keys', False)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.orjson is not None and not kwargs:
+            return self.orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.orjson is not None:
+            corpo = self.orjson.dumps(obj, default=_padrao, option=self.orjson.OPT_NON_STR_KEYS)
+        else:
+            corpo = json.dumps(obj, default=_padrao, ensure_ascii=False, separators=(',', ':'))
+        return self._app.response_class(corpo, mimetype=self.mimetype)
+
+def init_app(app):
+    app.config.setdefault('JSON_ORJSON', os.environ.get('JSON_ORJSON', '1').lower() in ('1', 'true', 'yes'))
+    app.json = ProvedorJSON(app)
+
+class Json(str):
+    """Texto que já é JSON válido e entra na resposta como está"""
+
+BOOLEANOS = {True: 'true', False: 'false', None: 'null'}
+
+def _valor(o):
+    return 'null' if o is None else dumps(o)
+
+def _expressoes(modelo, campos, aninhados, ler):
+    """Partes da f-string que escreve o objeto; ``ler(campo)`` é a expressão que lê o campo"""
+    partes = []
+    for i, campo in enumerate(campos):
+        literal = ('{' if i == 0 else ',') + encode_basestring(campo) + ':'
+        partes.append(literal.replace('{', '{{').replace('}', '}}'))
+        v = f'v{i}'
+        if campo in aninhados:
+            # Objetos relacionados se repetem entre as linhas: cada um é escrito uma vez por chamada
+            partes.append(f'{{(_N if ({v} := {ler(campo)}) is None else (c.get(id({v})) or _m(c, {v}, _a{i})))}}')
+            continue
+
+        try:
+            tipo = modelo.__table__.c[campo].type.python_type
+        except NotImplementedError:
+            tipo = object
+        if tipo is bool:
+            partes.append(f'{{_B[{ler(campo)}]}}')
+        elif tipo is int:
+            partes.append(f'{{(_N if ({v} := {ler(campo)}) is None else {v})}}')
+        elif tipo is str:
+            partes.append(f'{{(_N if ({v} := {ler(campo)}) is None else _s({v}))}}')
+        elif tipo in (datetime.date, datetime.datetime):
+            partes.append(f'{{(_N if ({v} := {ler(campo)}) is None else _Q + {v}.isoformat() + _Q)}}')
+        else:
+            partes.append(f'{{_v({ler(campo)})}}')
+    partes.append('}}' if campos else '{{}}')
+    return ''.join(partes)
+
+def _memorizar(cache, objeto, serializar):
+    texto = cache[id(objeto)] = serializar(objeto, cache)
+    return texto
+
+def serializador(modelo, campos, **aninhados):
+    """Gera a função que escreve uma instância de ``modelo`` como texto JSON.
+
+    ``campos`` são os nomes das chaves, na ordem do ``to_dict``: colunas do
+    modelo ou relacionamentos listados em ``aninhados``, que mapeia o nome
+    para o serializador do modelo relacionado. Cada campo vira uma expressão
+    de uma única f-string, escolhida pelo tipo da coluna, e os valores já
+    carregados são lidos direto do ``__dict__`` da instância, sem passar pelos
+    descritores do SQLAlchemy; se algum faltar (expirado ou não carregado),
+    a versão com getattr é usada. A saída é equivalente a
+    ``dumps(obj.to_dict())``.
+    """
+    ambiente = {'_N': 'null', '_Q': '"', '_B': BOOLEANOS, '_s': encode_basestring, '_v': _valor, '_m': _memorizar}
+    for i, campo in enumerate(campos):
+        ambiente[f'_k{i}'] = campo
+        if campo in aninhados:
+            ambiente[f'_a{i}'] = aninhados[campo]
+    indices = {campo: i for i, campo in enumerate(campos)}
+    rapido = _expressoes(modelo, campos, aninhados, lambda campo: f'd[_k{indices[campo]}]')
+    lento = _expressoes(modelo, campos, aninhados, lambda campo: f'o.{campo}')
+
+    nome = f'serializar_{modelo.__tablename__}'
+    codigo = (
+        f"def {nome}(o, c=None):\n"
+        f"    if c is None:\n"
+        f"        c = {{}}\n"
+        f"    d = o.__dict__\n"
+        f"    try:\n"
+        f"        return f'{rapido}'\n"
+        f"    except KeyError:\n"
+        f"        return f'{lento}'\n"
+    )
+    exec(compile(codigo, f'<serializador {modelo.__name__}>', 'exec'), ambiente)
+    funcao = ambiente[nome]
+    funcao.__doc__ = f'Texto JSON de um(a) {modelo.__name__}, igual ao de to_dict()'
+    return funcao
+
+def lista(serializar, objetos):
+    """Array JSON com os objetos escritos por ``serializar``"""
+    cache = {}
+    return Json('[' + ','.join([serializar(objeto, cache) for objeto in objetos]) + ']')
+
+def resposta(valor, status=200):
+    """Resposta JSON em que os valores ``Json`` entram sem serializar de novo"""
+    if isinstance(valor, Json):
+        corpo = valor
+    elif isinstance(valor, dict):
+        corpo = '{' + ','.join(
+            encode_basestring(str(chave)) + ':' + (item if isinstance(item, Json) else _valor(item))
+            for chave, item in valor.items()
+        ) + '}'
+    else:
+        corpo = _valor(valor)
+    return current_app.response_class(corpo, status=status, mimetype=MIMETYPE)
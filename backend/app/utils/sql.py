@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+def insert_on_conflict(model):
+    """Retorna um INSERT com suporte a ON CONFLICT para o banco em uso.
+
+    SQLite e PostgreSQL expõem a mesma API (on_conflict_do_update /
+    on_conflict_do_nothing), então os chamadores não dependem do dialeto.
+    """
+    dialeto = db.engine.dialect.name
+    if dialeto == 'sqlite':
+        return sqlite.insert(model)
+    if dialeto == 'postgresql':
+        return postgresql.insert(model)
+    raise NotImplementedError(f'INSERT ... ON CONFLICT não suportado para {dialeto}')
+
+def agora_utc():
+    """Horário UTC sem fuso, com microssegundos.
+
+    Valor das colunas updated_at que entram nos ETags das listagens, na
+    inserção e na alteração: o CURRENT_TIMESTAMP do SQLite só tem segundos,
+    e duas alterações no mesmo segundo deixariam o ETag igual. Na inserção
+    também importa porque o SQLite reaproveita o maior id depois de uma
+    remoção.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,9 @@
+import unicodedata
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples: " São  Paulo" -> "sao paulo" """
+    texto = str(texto or '')
+    if not texto.isascii():
+        decomposto = unicodedata.normalize('NFKD', texto)
+        texto = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(texto.casefold().split())
@@ -0,0 +1,102 @@
+from datetime import datetime
+from sqlalchemy import select
+from app import db
+from app.utils.cache import reference_cache
+import csv
+import io
+import json
+
+# Chaves estrangeiras da visita e a coleção onde cada id deve existir
+CAMPOS_FK = {
+    'loja_id': 'lojas',
+    'sessao_id': 'sessoes',
+    'grau_id': 'graus',
+    'rito_id': 'ritos',
+    'potencia_id': 'potencias'
+}
+CAMPOS_BOOLEANOS = ('prancha_presenca', 'possui_certificado', 'registro_loja', 'certificado_scaniado')
+VALORES_VERDADEIROS = {'1', 'true', 'sim', 's', 'x', 'yes'}
+
+def carregar_ids_validos():
+    """Conjuntos de ids existentes para validar chaves estrangeiras sem consultar por linha"""
+    from app.models import Loja
+    ids = {nome: {item['id'] for item in reference_cache.all(nome)}
+           for nome in ('sessoes', 'graus', 'ritos', 'potencias')}
+    ids['lojas'] = set(db.session.scalars(select(Loja.id)))
+    return ids
+
+def _data(valor, campo, obrigatoria=False):
+    if valor in (None, ''):
+        if obrigatoria:
+            raise ValueError(f'O campo {campo} é obrigatório')
+        return None
+    try:
+        return datetime.strptime(str(valor).strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'O campo {campo} deve estar no formato AAAA-MM-DD')
+
+def _inteiro(valor, campo):
+    # bool é subclasse de int e float truncaria o id: só inteiros ou dígitos (CSV)
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return valor
+    if isinstance(valor, str) and valor.strip().isascii() and valor.strip().isdigit():
+        return int(valor)
+    raise ValueError(f'O campo {campo} deve ser um valor inteiro')
+
+def _booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    if valor is None:
+        return False
+    return str(valor).strip().lower() in VALORES_VERDADEIROS
+
+def validar_visita(dados, ids):
+    """Converte um registro de visita para os tipos do modelo.
+
+    Levanta ValueError com o motivo quando o registro é inválido.
+    """
+    if not isinstance(dados, dict):
+        raise ValueError('O registro deve ser um objeto')
+
+    visita = {'data_visita': _data(dados.get('data_visita'), 'data_visita', obrigatoria=True)}
+    for campo, colecao in CAMPOS_FK.items():
+        valor = dados.get(campo)
+        if valor in (None, ''):
+            raise ValueError(f'O campo {campo} é obrigatório')
+        valor = _inteiro(valor, campo)
+        if valor not in ids[colecao]:
+            raise ValueError(f'{campo} {valor} não encontrado')
+        visita[campo] = valor
+
+    for campo in CAMPOS_BOOLEANOS:
+        visita[campo] = _booleano(dados.get(campo))
+    visita['data_entrega_certificado'] = _data(dados.get('data_entrega_certificado'), 'data_entrega_certificado')
+    observacoes = dados.get('observacoes')
+    if observacoes is not None and not isinstance(observacoes, str):
+        raise ValueError('O campo observacoes deve ser texto')
+    visita['observacoes'] = observacoes or None
+    return visita
+
+def ler_registros(stream, formato):
+    """Lê um arquivo CSV ou JSON-lines de forma incremental.
+
+    Gera tuplas (linha, registro, erro); ``erro`` é preenchido quando a linha
+    não pôde ser interpretada.
+    """
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream)
+    texto = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if formato == 'csv':
+        reader = csv.DictReader(texto)
+        for registro in reader:
+            yield reader.line_num, registro, None
+        return
+
+    for numero, linha in enumerate(texto, 1):
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha), None
+        except json.JSONDecodeError:
+            yield numero, None, 'JSON inválido'
@@ -0,0 +1,78 @@
+"""Mede a serialização de uma página grande de visitas.
+
+Monta 10 mil visitas em memória, com loja, potência, rito, oriente, sessão e
+grau, como a listagem carrega, e compara:
+  - to_dict + json padrão: o caminho antigo (jsonify com o provedor do Flask)
+  - to_dict + orjson: só o provedor novo
+  - serializador gerado: Visita.to_json, sem dicts intermediários
+Todas as saídas são conferidas entre si antes da medição.
+
+Uso: python bench_json.py [visitas] [rodadas]
+"""
+import json
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from app.models import Visita, Loja, Potencia, Rito, Oriente, Sessao, Grau
+from app.utils import serializacao
+
+def _visitas(quantidade):
+    potencias = [Potencia(id=i, nome=f'Potência {i}', sigla=f'P{i}') for i in range(3)]
+    ritos = [Rito(id=i, nome=f'Rito {i}', descricao='Rito praticado no Brasil') for i in range(3)]
+    orientes = [Oriente(id=i, nome=f'São Paulo {i}', uf='SP') for i in range(20)]
+    lojas = [Loja(id=i, nome=f'Loja Fraternidade nº {i}', numero=str(i), potencia_id=i % 3, rito_id=i % 3,
+                  oriente_id=i % 20, user_id=1, potencia=potencias[i % 3], rito=ritos[i % 3], oriente=orientes[i % 20])
+             for i in range(200)]
+    sessoes = [Sessao(id=i, descricao=f'Sessão {i}') for i in range(3)]
+    graus = [Grau(id=i, numero=i, descricao=f'Grau {i}') for i in range(1, 4)]
+    return [
+        Visita(id=i, data_visita=date(2020, 1, 1) + timedelta(days=i % 1500), loja_id=i % 200, sessao_id=i % 3,
+               grau_id=i % 3 + 1, rito_id=i % 3, potencia_id=i % 3, prancha_presenca=i % 2 == 0,
+               possui_certificado=i % 3 == 0, registro_loja=False,
+               data_entrega_certificado=date(2024, 1, 1) if i % 4 == 0 else None, certificado_scaniado=False,
+               observacoes='Visita de instrução, ágape após a sessão' if i % 5 == 0 else None, user_id=1,
+               loja=lojas[i % 200], sessao=sessoes[i % 3], grau=graus[i % 3], rito=ritos[i % 3],
+               potencia=potencias[i % 3])
+        for i in range(quantidade)
+    ]
+
+def _medir(funcao, rodadas):
+    tempos = []
+    for _ in range(rodadas):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rodadas = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    app = create_app({'JSON_ORJSON': True})
+    visitas = _visitas(quantidade)
+    padrao = DefaultJSONProvider(app)
+
+    casos = {
+        'to_dict + json padrão': lambda: padrao.dumps([visita.to_dict() for visita in visitas]),
+        'serializador gerado': lambda: serializacao.lista(Visita.to_json, visitas),
+    }
+    if serializacao.orjson is not None:
+        casos['to_dict + orjson'] = lambda: app.json.dumps([visita.to_dict() for visita in visitas])
+    else:
+        print('orjson não instalado; o provedor usa o json padrão')
+
+    esperado = json.loads(casos['to_dict + json padrão']())
+    for nome, funcao in casos.items():
+        assert json.loads(funcao()) == esperado, nome
+
+    base = None
+    print(f'{quantidade} visitas, mediana de {rodadas} rodadas')
+    for nome, funcao in casos.items():
+        tempo = _medir(funcao, rodadas)
+        base = base or tempo
+        print(f'  {nome:<24} {tempo * 1000:8.1f} ms  {base / tempo:5.1f}x')
+
+if __name__ == '__main__':
+    main()
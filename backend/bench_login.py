@@ -0,0 +1,109 @@
+"""Mede o efeito de uma rajada de logins sobre os demais endpoints.
+
+Sobe a aplicação em um servidor com threads e, por alguns segundos, dispara
+logins concorrentes enquanto uma sonda mede a latência de GET /api/graus.
+Reporta a vazão de logins (sucessos e 503 da fila de hashes) e a latência da
+sonda com e sem a rajada.
+
+Uso: python bench_login.py [clientes] [segundos]
+Variáveis úteis: PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE, PASSWORD_HASH_METHOD
+"""
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from werkzeug.serving import make_server
+
+def _post(url, dados):
+    requisicao = urllib.request.Request(url, data=json.dumps(dados).encode(),
+                                        headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(requisicao) as resposta:
+            return resposta.status, json.loads(resposta.read())
+    except urllib.error.HTTPError as erro:
+        return erro.code, None
+
+def _get(url, token):
+    requisicao = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+    with urllib.request.urlopen(requisicao) as resposta:
+        resposta.read()
+
+def _sondar(base, token, parar):
+    latencias = []
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        _get(f'{base}/api/graus', token)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        time.sleep(0.02)
+    return latencias
+
+def _percentis(valores):
+    valores = sorted(valores)
+    def p(q):
+        return valores[min(len(valores) - 1, int(q * len(valores)))]
+    return f'p50 {statistics.median(valores):7.1f}  p95 {p(0.95):7.1f}  p99 {p(0.99):7.1f} ms'
+
+def main():
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        os.environ.setdefault('LOG_LEVEL', 'WARNING')
+        from app import create_app
+        from app.commands import seed_db
+        from flask_migrate import upgrade
+
+        app = create_app()
+        with app.app_context():
+            upgrade()
+            seed_db()
+
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        servidor = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{servidor.server_port}'
+        credenciais = {'username': 'admin', 'password': 'admin123'}
+        token = _post(f'{base}/api/auth/login', credenciais)[1]['access_token']
+
+        # Latência da sonda sem carga
+        parar = threading.Event()
+        threading.Timer(2, parar.set).start()
+        ociosa = _sondar(base, token, parar)
+
+        # Rajada de logins
+        resultados = {'ok': 0, 'ocupado': 0, 'outros': 0}
+        trava = threading.Lock()
+        parar = threading.Event()
+
+        def logar():
+            while not parar.is_set():
+                status, _ = _post(f'{base}/api/auth/login', credenciais)
+                chave = 'ok' if status == 200 else 'ocupado' if status == 503 else 'outros'
+                with trava:
+                    resultados[chave] += 1
+
+        threads = [threading.Thread(target=logar) for _ in range(clientes)]
+        for thread in threads:
+            thread.start()
+        threading.Timer(segundos, parar.set).start()
+        sob_carga = _sondar(base, token, parar)
+        for thread in threads:
+            thread.join()
+        servidor.shutdown()
+
+    print(f"workers={app.config['PASSWORD_HASH_WORKERS']} fila={app.config['PASSWORD_HASH_QUEUE']} "
+          f"método={app.config['PASSWORD_HASH_METHOD']} clientes={clientes}")
+    print(f"logins: {resultados['ok'] / segundos:.1f}/s ok, "
+          f"{resultados['ocupado'] / segundos:.1f}/s 503, {resultados['outros']} outros")
+    print(f'/api/graus ociosa:    {_percentis(ociosa)}')
+    print(f'/api/graus sob carga: {_percentis(sob_carga)}')
+
+if __name__ == '__main__':
+    main()
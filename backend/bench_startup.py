@@ -0,0 +1,68 @@
+"""Mede o tempo de inicialização da aplicação.
+
+Cada rodada é um processo novo (como um worker recém-criado) e reporta:
+  - import: tempo de ``import app``
+  - create_app: tempo da fábrica da aplicação
+  - primeira requisição: GET autenticado em /api/graus, incluindo a
+    primeira conexão com o banco
+
+Uso: python bench_startup.py [rodadas]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RODADA = r'''
+import json, time
+inicio = time.perf_counter()
+import app as pacote
+importado = time.perf_counter()
+app = pacote.create_app()
+criado = time.perf_counter()
+from flask_jwt_extended import create_access_token
+with app.app_context():
+    token = create_access_token(identity='1', additional_claims={'username': 'admin', 'is_admin': True})
+antes = time.perf_counter()
+resposta = app.test_client().get('/api/graus', headers={'Authorization': f'Bearer {token}'})
+fim = time.perf_counter()
+assert resposta.status_code == 200, resposta.status_code
+print(json.dumps({
+    'import': importado - inicio,
+    'create_app': criado - importado,
+    'primeira requisição': fim - antes,
+    'total': (criado - inicio) + (fim - antes)
+}))
+'''
+
+def _preparar(ambiente, diretorio):
+    # Migra e semeia uma vez, fora da medição; o cwd acha as migrações
+    for comando in (['db', 'upgrade'], ['seed']):
+        subprocess.run([sys.executable, '-m', 'flask', *comando], env=ambiente, cwd=diretorio,
+                       check=True, capture_output=True)
+
+def main():
+    rodadas = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ambiente = dict(os.environ, DATABASE_URL=f'sqlite:///{os.path.join(tmp, "bench.db")}')
+        ambiente['PYTHONPATH'] = diretorio
+        ambiente['FLASK_APP'] = 'app:create_app'
+        _preparar(ambiente, diretorio)
+
+        medidas = []
+        for _ in range(rodadas):
+            saida = subprocess.run([sys.executable, '-c', RODADA], env=ambiente, cwd=diretorio,
+                                   check=True, capture_output=True, text=True).stdout
+            medidas.append(json.loads(saida.strip().splitlines()[-1]))
+
+    print(f'{rodadas} rodadas (mediana / máximo, ms)')
+    for etapa in medidas[0]:
+        valores = [m[etapa] * 1000 for m in medidas]
+        print(f'  {etapa:<22} {statistics.median(valores):8.1f} {max(valores):8.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""esquema inicial
+
+Cria as tabelas e os índices usados pelas consultas de listagem. Bancos
+criados antes das migrações (via db.create_all) já têm as tabelas; nesse caso
+apenas os índices que faltam são adicionados, e ``flask db upgrade`` leva o
+banco ao mesmo estado de uma instalação nova.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2024-06-01 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _tabelas_existentes():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existentes = _tabelas_existentes()
+
+    def create_table(nome, *colunas):
+        if nome not in existentes:
+            op.create_table(nome, *colunas)
+
+    create_table('graus',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('numero', sa.Integer(), nullable=False),
+    sa.Column('descricao', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('orientes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=100), nullable=False),
+    sa.Column('uf', sa.String(length=2), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('potencias',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=100), nullable=False),
+    sa.Column('sigla', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('ritos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=100), nullable=False),
+    sa.Column('descricao', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('sessoes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('descricao', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('password_hash', sa.String(length=128), nullable=True),
+    sa.Column('is_admin', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+    create_table('versoes_referencia',
+    sa.Column('nome', sa.String(length=50), nullable=False),
+    sa.Column('versao', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('nome')
+    )
+    create_table('estatisticas_visitas',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('dimensao', sa.String(length=30), nullable=False),
+    sa.Column('chave', sa.String(length=30), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'dimensao', 'chave')
+    )
+    create_table('lojas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=100), nullable=False),
+    sa.Column('numero', sa.String(length=20), nullable=False),
+    sa.Column('potencia_id', sa.Integer(), nullable=False),
+    sa.Column('rito_id', sa.Integer(), nullable=False),
+    sa.Column('oriente_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['oriente_id'], ['orientes.id'], ),
+    sa.ForeignKeyConstraint(['potencia_id'], ['potencias.id'], ),
+    sa.ForeignKeyConstraint(['rito_id'], ['ritos.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('orientes', schema=None) as batch_op:
+        batch_op.create_index('uq_orientes_nome_uf', ['nome', 'uf'], unique=True, if_not_exists=True)
+
+    with op.batch_alter_table('lojas', schema=None) as batch_op:
+        batch_op.create_index('ix_lojas_oriente_id', ['oriente_id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_lojas_user_id_id', ['user_id', 'id'], unique=False, if_not_exists=True)
+
+    create_table('visitas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('data_visita', sa.Date(), nullable=False),
+    sa.Column('loja_id', sa.Integer(), nullable=False),
+    sa.Column('sessao_id', sa.Integer(), nullable=False),
+    sa.Column('grau_id', sa.Integer(), nullable=False),
+    sa.Column('rito_id', sa.Integer(), nullable=False),
+    sa.Column('potencia_id', sa.Integer(), nullable=False),
+    sa.Column('prancha_presenca', sa.Boolean(), nullable=True),
+    sa.Column('possui_certificado', sa.Boolean(), nullable=True),
+    sa.Column('registro_loja', sa.Boolean(), nullable=True),
+    sa.Column('data_entrega_certificado', sa.Date(), nullable=True),
+    sa.Column('certificado_scaniado', sa.Boolean(), nullable=True),
+    sa.Column('observacoes', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['grau_id'], ['graus.id'], ),
+    sa.ForeignKeyConstraint(['loja_id'], ['lojas.id'], ),
+    sa.ForeignKeyConstraint(['potencia_id'], ['potencias.id'], ),
+    sa.ForeignKeyConstraint(['rito_id'], ['ritos.id'], ),
+    sa.ForeignKeyConstraint(['sessao_id'], ['sessoes.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('visitas', schema=None) as batch_op:
+        batch_op.create_index('ix_visitas_data_visita_id', ['data_visita', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_visitas_grau_data_visita_id', ['grau_id', 'data_visita', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_visitas_loja_data_visita_id', ['loja_id', 'data_visita', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_visitas_potencia_data_visita_id', ['potencia_id', 'data_visita', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_visitas_rito_data_visita_id', ['rito_id', 'data_visita', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_visitas_sessao_data_visita_id', ['sessao_id', 'data_visita', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_visitas_user_data_visita_id', ['user_id', 'data_visita', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('visitas', schema=None) as batch_op:
+        batch_op.drop_index('ix_visitas_user_data_visita_id')
+        batch_op.drop_index('ix_visitas_sessao_data_visita_id')
+        batch_op.drop_index('ix_visitas_rito_data_visita_id')
+        batch_op.drop_index('ix_visitas_potencia_data_visita_id')
+        batch_op.drop_index('ix_visitas_loja_data_visita_id')
+        batch_op.drop_index('ix_visitas_grau_data_visita_id')
+        batch_op.drop_index('ix_visitas_data_visita_id')
+
+    op.drop_table('visitas')
+    with op.batch_alter_table('lojas', schema=None) as batch_op:
+        batch_op.drop_index('ix_lojas_user_id_id')
+        batch_op.drop_index('ix_lojas_oriente_id')
+
+    op.drop_table('lojas')
+    op.drop_table('estatisticas_visitas')
+    op.drop_table('versoes_referencia')
+    op.drop_table('users')
+    op.drop_table('sessoes')
+    op.drop_table('ritos')
+    op.drop_table('potencias')
+    with op.batch_alter_table('orientes', schema=None) as batch_op:
+        batch_op.drop_index('uq_orientes_nome_uf')
+
+    op.drop_table('orientes')
+    op.drop_table('graus')
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""amplia password_hash
+
+Hashes scrypt (PASSWORD_HASH_METHOD=scrypt) passam de 128 caracteres.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-15 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.VARCHAR(length=128),
+               type_=sa.String(length=256),
+               existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=256),
+               type_=sa.VARCHAR(length=128),
+               existing_nullable=True)
+
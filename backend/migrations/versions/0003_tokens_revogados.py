@@ -0,0 +1,39 @@
+"""tokens revogados
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-07-01 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tokens_revogados',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(length=36), nullable=False),
+    sa.Column('tipo', sa.String(length=10), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('expira_em', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('jti')
+    )
+    with op.batch_alter_table('tokens_revogados', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tokens_revogados_expira_em'), ['expira_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tokens_revogados', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tokens_revogados_expira_em'))
+
+    op.drop_table('tokens_revogados')
@@ -0,0 +1,68 @@
+"""índices de busca textual (FTS5)
+
+Índices de conteúdo externo sobre visitas.observacoes, lojas.nome/numero e
+orientes.nome, mantidos por triggers. Só existem no SQLite; em outros bancos
+a busca usa ILIKE e esta migração não faz nada.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-07-15 00:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+INDICES = ('busca_visitas', 'busca_lojas', 'busca_orientes')
+
+CRIACAO = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS busca_visitas USING fts5(observacoes, content='visitas', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    'CREATE TRIGGER IF NOT EXISTS busca_visitas_ai AFTER INSERT ON visitas BEGIN INSERT INTO busca_visitas(rowid, observacoes) VALUES (new.id, new.observacoes); END',
+    "CREATE TRIGGER IF NOT EXISTS busca_visitas_ad AFTER DELETE ON visitas BEGIN INSERT INTO busca_visitas(busca_visitas, rowid, observacoes) VALUES ('delete', old.id, old.observacoes); END",
+    "CREATE TRIGGER IF NOT EXISTS busca_visitas_au AFTER UPDATE OF observacoes ON visitas BEGIN INSERT INTO busca_visitas(busca_visitas, rowid, observacoes) VALUES ('delete', old.id, old.observacoes); INSERT INTO busca_visitas(rowid, observacoes) VALUES (new.id, new.observacoes); END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS busca_lojas USING fts5(nome, numero, content='lojas', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    'CREATE TRIGGER IF NOT EXISTS busca_lojas_ai AFTER INSERT ON lojas BEGIN INSERT INTO busca_lojas(rowid, nome, numero) VALUES (new.id, new.nome, new.numero); END',
+    "CREATE TRIGGER IF NOT EXISTS busca_lojas_ad AFTER DELETE ON lojas BEGIN INSERT INTO busca_lojas(busca_lojas, rowid, nome, numero) VALUES ('delete', old.id, old.nome, old.numero); END",
+    "CREATE TRIGGER IF NOT EXISTS busca_lojas_au AFTER UPDATE OF nome, numero ON lojas BEGIN INSERT INTO busca_lojas(busca_lojas, rowid, nome, numero) VALUES ('delete', old.id, old.nome, old.numero); INSERT INTO busca_lojas(rowid, nome, numero) VALUES (new.id, new.nome, new.numero); END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS busca_orientes USING fts5(nome, content='orientes', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    'CREATE TRIGGER IF NOT EXISTS busca_orientes_ai AFTER INSERT ON orientes BEGIN INSERT INTO busca_orientes(rowid, nome) VALUES (new.id, new.nome); END',
+    "CREATE TRIGGER IF NOT EXISTS busca_orientes_ad AFTER DELETE ON orientes BEGIN INSERT INTO busca_orientes(busca_orientes, rowid, nome) VALUES ('delete', old.id, old.nome); END",
+    "CREATE TRIGGER IF NOT EXISTS busca_orientes_au AFTER UPDATE OF nome ON orientes BEGIN INSERT INTO busca_orientes(busca_orientes, rowid, nome) VALUES ('delete', old.id, old.nome); INSERT INTO busca_orientes(rowid, nome) VALUES (new.id, new.nome); END"
+]
+
+REMOCAO = [
+    'DROP TRIGGER IF EXISTS busca_visitas_ai',
+    'DROP TRIGGER IF EXISTS busca_visitas_ad',
+    'DROP TRIGGER IF EXISTS busca_visitas_au',
+    'DROP TABLE IF EXISTS busca_visitas',
+    'DROP TRIGGER IF EXISTS busca_lojas_ai',
+    'DROP TRIGGER IF EXISTS busca_lojas_ad',
+    'DROP TRIGGER IF EXISTS busca_lojas_au',
+    'DROP TABLE IF EXISTS busca_lojas',
+    'DROP TRIGGER IF EXISTS busca_orientes_ai',
+    'DROP TRIGGER IF EXISTS busca_orientes_ad',
+    'DROP TRIGGER IF EXISTS busca_orientes_au',
+    'DROP TABLE IF EXISTS busca_orientes'
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for comando in CRIACAO:
+        op.execute(comando)
+    # Indexa as linhas que já existiam
+    for indice in INDICES:
+        op.execute(f"INSERT INTO {indice}({indice}) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for comando in REMOCAO:
+        op.execute(comando)
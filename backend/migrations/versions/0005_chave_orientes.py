@@ -0,0 +1,73 @@
+"""chave normalizada dos orientes
+
+Adiciona orientes.chave (nome sem acentos e em minúsculas, mais a UF), une
+os orientes que passam a ter a mesma chave e troca o índice único de
+(nome, uf) por um índice único na chave.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-07-22 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import unicodedata
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# O batch recria orientes no SQLite e descarta os triggers da busca (0004)
+TRIGGERS_BUSCA = [
+    'CREATE TRIGGER IF NOT EXISTS busca_orientes_ai AFTER INSERT ON orientes BEGIN INSERT INTO busca_orientes(rowid, nome) VALUES (new.id, new.nome); END',
+    "CREATE TRIGGER IF NOT EXISTS busca_orientes_ad AFTER DELETE ON orientes BEGIN INSERT INTO busca_orientes(busca_orientes, rowid, nome) VALUES ('delete', old.id, old.nome); END",
+    "CREATE TRIGGER IF NOT EXISTS busca_orientes_au AFTER UPDATE OF nome ON orientes BEGIN INSERT INTO busca_orientes(busca_orientes, rowid, nome) VALUES ('delete', old.id, old.nome); INSERT INTO busca_orientes(rowid, nome) VALUES (new.id, new.nome); END"
+]
+
+
+def _chave(nome, uf):
+    # Cópia de app.models.oriente.chave_oriente na data desta migração
+    texto = str(nome or '')
+    if not texto.isascii():
+        texto = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    return f"{' '.join(texto.casefold().split())}|{str(uf or '').strip().upper()}"
+
+
+def _recriar_triggers():
+    if op.get_bind().dialect.name == 'sqlite':
+        for comando in TRIGGERS_BUSCA:
+            op.execute(comando)
+
+
+def upgrade():
+    op.add_column('orientes', sa.Column('chave', sa.String(length=110), nullable=True))
+
+    conn = op.get_bind()
+    orientes = sa.table('orientes', sa.column('id'), sa.column('nome'), sa.column('uf'), sa.column('chave'))
+    lojas = sa.table('lojas', sa.column('oriente_id'))
+    grupos = {}
+    for id_, nome, uf in conn.execute(sa.select(orientes.c.id, orientes.c.nome, orientes.c.uf).order_by(orientes.c.id)):
+        grupos.setdefault(_chave(nome, uf), []).append(id_)
+    for chave, ids in grupos.items():
+        mantido, removidos = ids[0], ids[1:]
+        if removidos:
+            conn.execute(sa.update(lojas).where(lojas.c.oriente_id.in_(removidos)).values(oriente_id=mantido))
+            conn.execute(sa.delete(orientes).where(orientes.c.id.in_(removidos)))
+        conn.execute(sa.update(orientes).where(orientes.c.id == mantido).values(chave=chave))
+
+    with op.batch_alter_table('orientes', schema=None) as batch_op:
+        batch_op.alter_column('chave', existing_type=sa.String(length=110), nullable=False)
+        batch_op.drop_index('uq_orientes_nome_uf')
+        batch_op.create_index('uq_orientes_chave', ['chave'], unique=True)
+    _recriar_triggers()
+
+
+def downgrade():
+    with op.batch_alter_table('orientes', schema=None) as batch_op:
+        batch_op.drop_index('uq_orientes_chave')
+        batch_op.create_index('uq_orientes_nome_uf', ['nome', 'uf'], unique=True)
+        batch_op.drop_column('chave')
+    _recriar_triggers()
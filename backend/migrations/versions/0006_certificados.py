@@ -0,0 +1,57 @@
+"""certificados digitalizados
+
+Tabela de arquivos endereçados pelo sha256 e a referência da visita ao seu
+certificado.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-08-05 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# O batch recria visitas no SQLite e descarta os triggers da busca (0004)
+TRIGGERS_BUSCA = [
+    'CREATE TRIGGER IF NOT EXISTS busca_visitas_ai AFTER INSERT ON visitas BEGIN INSERT INTO busca_visitas(rowid, observacoes) VALUES (new.id, new.observacoes); END',
+    "CREATE TRIGGER IF NOT EXISTS busca_visitas_ad AFTER DELETE ON visitas BEGIN INSERT INTO busca_visitas(busca_visitas, rowid, observacoes) VALUES ('delete', old.id, old.observacoes); END",
+    "CREATE TRIGGER IF NOT EXISTS busca_visitas_au AFTER UPDATE OF observacoes ON visitas BEGIN INSERT INTO busca_visitas(busca_visitas, rowid, observacoes) VALUES ('delete', old.id, old.observacoes); INSERT INTO busca_visitas(rowid, observacoes) VALUES (new.id, new.observacoes); END"
+]
+
+
+def _recriar_triggers():
+    if op.get_bind().dialect.name == 'sqlite':
+        for comando in TRIGGERS_BUSCA:
+            op.execute(comando)
+
+
+def upgrade():
+    op.create_table('certificados',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('content_type', sa.String(length=50), nullable=False),
+    sa.Column('tamanho', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    with op.batch_alter_table('visitas', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('certificado_sha256', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_visitas_certificado_sha256'), ['certificado_sha256'], unique=False)
+        batch_op.create_foreign_key('fk_visitas_certificado_sha256', 'certificados', ['certificado_sha256'], ['sha256'])
+    _recriar_triggers()
+
+
+def downgrade():
+    with op.batch_alter_table('visitas', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_visitas_certificado_sha256', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_visitas_certificado_sha256'))
+        batch_op.drop_column('certificado_sha256')
+    _recriar_triggers()
+
+    op.drop_table('certificados')
@@ -0,0 +1,54 @@
+"""fila de jobs
+
+Tabela jobs, usada como fila durável das tarefas em segundo plano.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-08-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('parametros', sa.JSON(), nullable=False),
+    sa.Column('resultado', sa.JSON(), nullable=True),
+    sa.Column('erro', sa.Text(), nullable=True),
+    sa.Column('progresso', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('max_tentativas', sa.Integer(), nullable=False),
+    sa.Column('cancelar', sa.Boolean(), nullable=False),
+    sa.Column('executar_apos', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('heartbeat', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('iniciado_em', sa.DateTime(), nullable=True),
+    sa.Column('concluido_em', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_jobs_fila', ['status', 'executar_apos'], unique=False)
+        batch_op.create_index(batch_op.f('ix_jobs_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_jobs_user_id'))
+        batch_op.drop_index('ix_jobs_fila')
+
+    op.drop_table('jobs')
@@ -0,0 +1,30 @@
+"""índices do ETag das listagens
+
+Índices (user_id, updated_at) em visitas e lojas: o count, max(id) e
+max(updated_at) que validam o ETag de GET /api/visitas e /api/lojas são
+respondidos só pelo índice.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-09-02 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_visitas_user_id_updated_at', 'visitas', ['user_id', 'updated_at'], unique=False)
+    op.create_index('ix_lojas_user_id_updated_at', 'lojas', ['user_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_lojas_user_id_updated_at', table_name='lojas')
+    op.drop_index('ix_visitas_user_id_updated_at', table_name='visitas')
@@ -1,5 +1,6 @@
 from app import create_app, db
 from app.models import User, Loja, Visita
+from app.utils import estatisticas
 import uuid
 
 def reset_admin():
@@ -57,6 +58,9 @@ def reset_admin():
             db.session.delete(temp_admin)
             db.session.commit()
             
+            # As visitas mudaram de dono, então as estatísticas por usuário são refeitas
+            estatisticas.rebuild()
+            
             print("Novo usuário admin criado com sucesso")
             print("Username: admin")
             print("Password: admin123")
@@ -0,0 +1,99 @@
+import pytest
+from app import create_app, db
+from app.models import User, Potencia, Rito, Oriente, Loja
+from app.utils.autocompletar import IndicePrefixo
+from app.utils.texto import normalizar
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "autocomplete.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+def _login(client, username, is_admin=False):
+    user = User(username=username, email=f'{username}@test.com', is_admin=is_admin)
+    user.set_password('senha123')
+    db.session.add(user)
+    db.session.commit()
+    response = client.post('/api/auth/login', json={'username': username, 'password': 'senha123'})
+    assert response.status_code == 200
+    return user, {'Authorization': f"Bearer {response.json['access_token']}"}
+
+@pytest.fixture
+def dados(client):
+    dono, headers = _login(client, 'digitador')
+    outro, headers_outro = _login(client, 'vizinho')
+    _, headers_admin = _login(client, 'admin_auto', is_admin=True)
+    potencia = Potencia(nome='Potência Auto', sigla='PA')
+    rito = Rito(nome='Rito Auto')
+    orientes = [Oriente(nome='São Paulo', uf='SP'), Oriente(nome='Santos', uf='SP'),
+                Oriente(nome='Salvador', uf='BA')]
+    db.session.add_all([potencia, rito, *orientes])
+    db.session.flush()
+    lojas = [
+        Loja(nome='União e Fraternidade', numero='77', user_id=dono.id),
+        Loja(nome='Luz do Oriente', numero='1234', user_id=dono.id),
+        Loja(nome='Luz Alheia', numero='99', user_id=outro.id)
+    ]
+    for loja in lojas:
+        loja.potencia_id, loja.rito_id, loja.oriente_id = potencia.id, rito.id, orientes[0].id
+    db.session.add_all(lojas)
+    db.session.commit()
+    return {'headers': headers, 'headers_outro': headers_outro, 'headers_admin': headers_admin,
+            'potencia_id': potencia.id, 'rito_id': rito.id}
+
+def _nomes(client, colecao, headers, **params):
+    response = client.get(f'/api/autocomplete/{colecao}', query_string=params, headers=headers)
+    assert response.status_code == 200
+    return [item['nome'] for item in response.json]
+
+def test_normalizar():
+    assert normalizar('  São   JOÃO ') == 'sao joao'
+
+def test_indice_prefixo():
+    indice = IndicePrefixo.de_entradas([(1, ('União e Fraternidade',)), (2, ('Luz', '12')), (3, ('Lua Nova',))])
+    assert indice.buscar('lu', 10) == [3, 2]
+    assert indice.buscar('FRAT', 10) == [1]
+    assert indice.buscar('1', 10) == [2]
+    assert indice.buscar('lu', 1) == [3]
+    assert indice.buscar('x', 10) == []
+
+def test_orientes_sem_acento(client, dados):
+    assert _nomes(client, 'orientes', dados['headers'], q='sa') == ['Salvador', 'Santos', 'São Paulo']
+    assert _nomes(client, 'orientes', dados['headers'], q='SÃO') == ['São Paulo']
+    assert _nomes(client, 'orientes', dados['headers'], q='paul') == ['São Paulo']
+    assert _nomes(client, 'orientes', dados['headers'], q='sa', limite=2) == ['Salvador', 'Santos']
+
+def test_lojas_do_usuario(client, dados):
+    assert _nomes(client, 'lojas', dados['headers'], q='luz') == ['Luz do Oriente']
+    assert _nomes(client, 'lojas', dados['headers'], q='uniao') == ['União e Fraternidade']
+    assert _nomes(client, 'lojas', dados['headers'], q='12') == ['Luz do Oriente']
+    assert _nomes(client, 'lojas', dados['headers_outro'], q='luz') == ['Luz Alheia']
+    assert set(_nomes(client, 'lojas', dados['headers_admin'], q='luz')) == {'Luz Alheia', 'Luz do Oriente'}
+
+def test_indice_atualizado_nas_escritas(client, dados):
+    assert _nomes(client, 'lojas', dados['headers'], q='acacia') == []
+    response = client.post('/api/lojas', json={
+        'nome': 'Acácia', 'numero': '5', 'potencia_id': dados['potencia_id'], 'rito_id': dados['rito_id'],
+        'oriente_nome': 'Campinas', 'oriente_uf': 'SP'
+    }, headers=dados['headers'])
+    assert response.status_code == 201
+    loja_id = response.json['id']
+    assert _nomes(client, 'lojas', dados['headers'], q='acacia') == ['Acácia']
+    assert _nomes(client, 'orientes', dados['headers'], q='camp') == ['Campinas']
+
+    client.delete(f'/api/lojas/{loja_id}', headers=dados['headers'])
+    assert _nomes(client, 'lojas', dados['headers'], q='acacia') == []
+
+def test_limite_invalido(client, dados):
+    response = client.get('/api/autocomplete/lojas', query_string={'limite': 'x'}, headers=dados['headers'])
+    assert response.status_code == 400
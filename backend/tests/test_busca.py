@@ -0,0 +1,135 @@
+from datetime import date
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import text
+from app import create_app, db
+from app.models import User, Loja, Potencia, Rito, Oriente, Sessao, Grau, Visita
+from app.utils import busca
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "busca.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+def _login(client, username, is_admin=False):
+    user = User(username=username, email=f'{username}@test.com', is_admin=is_admin)
+    user.set_password('senha123')
+    db.session.add(user)
+    db.session.commit()
+    response = client.post('/api/auth/login', json={'username': username, 'password': 'senha123'})
+    assert response.status_code == 200
+    return user, {'Authorization': f"Bearer {response.json['access_token']}"}
+
+@pytest.fixture
+def dados(client):
+    dono, headers = _login(client, 'buscador')
+    outro, headers_outro = _login(client, 'intruso')
+    _, headers_admin = _login(client, 'chefe', is_admin=True)
+    potencia = Potencia(nome='Potência Busca', sigla='PB')
+    rito = Rito(nome='Rito Busca')
+    sessao = Sessao(descricao='Sessão Busca')
+    grau = Grau(numero=1, descricao='Aprendiz Busca')
+    sao_paulo = Oriente(nome='São Paulo', uf='SP')
+    niteroi = Oriente(nome='Niterói', uf='RJ')
+    db.session.add_all([potencia, rito, sessao, grau, sao_paulo, niteroi])
+    db.session.flush()
+
+    def loja(nome, numero, user, oriente):
+        return Loja(nome=nome, numero=numero, potencia_id=potencia.id, rito_id=rito.id,
+                    oriente_id=oriente.id, user_id=user.id)
+
+    luz = loja('Luz do Oriente', '1234', dono, sao_paulo)
+    uniao = loja('União e Fraternidade', '77', dono, niteroi)
+    alheia = loja('Luz Alheia', '1299', outro, sao_paulo)
+    db.session.add_all([luz, uniao, alheia])
+    db.session.flush()
+
+    def visita(loja, user, observacoes):
+        return Visita(data_visita=date(2024, 5, 1), loja_id=loja.id, sessao_id=sessao.id, grau_id=grau.id,
+                      rito_id=rito.id, potencia_id=potencia.id, user_id=user.id, observacoes=observacoes)
+
+    db.session.add_all([
+        visita(luz, dono, 'Palestra sobre a iniciação e o simbolismo'),
+        visita(uniao, dono, 'Sessão de iniciação com três candidatos; iniciação muito bonita'),
+        visita(alheia, outro, 'Iniciação de outro irmão')
+    ])
+    db.session.commit()
+    return {'headers': headers, 'headers_outro': headers_outro, 'headers_admin': headers_admin,
+            'luz': luz.id, 'uniao': uniao.id, 'alheia': alheia.id}
+
+def _buscar(client, headers, **params):
+    response = client.get('/api/search', query_string=params, headers=headers)
+    assert response.status_code == 200, response.json
+    return response.json
+
+def test_busca_sem_acentos_e_por_prefixo(client, dados):
+    resultado = _buscar(client, dados['headers'], q='uniao frat')
+    assert [loja['id'] for loja in resultado['lojas']] == [dados['uniao']]
+
+    resultado = _buscar(client, dados['headers'], q='sao', tipos='orientes')
+    assert [oriente['nome'] for oriente in resultado['orientes']] == ['São Paulo']
+    assert set(resultado) == {'orientes'}
+
+def test_busca_por_numero(client, dados):
+    resultado = _buscar(client, dados['headers'], q='12', tipos='lojas')
+    assert [loja['id'] for loja in resultado['lojas']] == [dados['luz']]
+
+def test_busca_ordenada_por_relevancia(client, dados):
+    resultado = _buscar(client, dados['headers'], q='iniciacao', tipos='visitas')
+    observacoes = [visita['observacoes'] for visita in resultado['visitas']]
+    assert len(observacoes) == 2
+    assert observacoes[0].startswith('Sessão de iniciação')
+
+def test_busca_respeita_dono(client, dados):
+    resultado = _buscar(client, dados['headers_outro'], q='luz')
+    assert [loja['id'] for loja in resultado['lojas']] == [dados['alheia']]
+
+    resultado = _buscar(client, dados['headers_admin'], q='luz', tipos='lojas')
+    assert {loja['id'] for loja in resultado['lojas']} == {dados['luz'], dados['alheia']}
+
+def test_triggers_acompanham_alteracoes(client, dados):
+    loja = db.session.get(Loja, dados['uniao'])
+    loja.nome = 'Acácia Dourada'
+    db.session.commit()
+    assert _buscar(client, dados['headers'], q='uniao', tipos='lojas')['lojas'] == []
+    assert [l['id'] for l in _buscar(client, dados['headers'], q='acacia', tipos='lojas')['lojas']] == [dados['uniao']]
+
+    Visita.query.filter_by(loja_id=dados['uniao']).delete()
+    db.session.delete(loja)
+    db.session.commit()
+    assert _buscar(client, dados['headers'], q='acacia', tipos='lojas')['lojas'] == []
+
+def test_consulta_invalida(client, dados):
+    for params in ({}, {'q': '"*()'}):
+        response = client.get('/api/search', query_string=params, headers=dados['headers'])
+        assert response.status_code == 400
+    response = client.get('/api/search', query_string={'q': 'luz', 'tipos': 'usuarios'}, headers=dados['headers'])
+    assert response.status_code == 400
+
+def test_rebuild(client, dados):
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO busca_lojas(busca_lojas) VALUES ('delete-all')")
+    assert _buscar(client, dados['headers'], q='luz', tipos='lojas')['lojas'] == []
+
+    resultado = client.application.test_cli_runner().invoke(args=['search', 'rebuild'])
+    assert 'recriados' in resultado.output
+    assert [l['id'] for l in _buscar(client, dados['headers'], q='luz', tipos='lojas')['lojas']] == [dados['luz']]
+
+def test_migracao_indexa_dados_existentes(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "migrado.db"}'})
+    with app.app_context():
+        upgrade(revision='0003')
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO orientes (nome, uf) VALUES ('Florianópolis', 'SC')"))
+        upgrade()
+        assert busca.buscar_ids('busca_orientes', 'florianopolis', 10) == [1]
@@ -0,0 +1,256 @@
+import io
+import os
+import time
+import pytest
+from datetime import date
+from PIL import Image
+from app import create_app, db
+from app.models import User, Visita, Loja, Potencia, Rito, Oriente, Sessao, Grau, Certificado
+from app.utils import certificados
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "certificados.db"}',
+        'CERTIFICADOS_DIR': str(tmp_path / 'certificados'),
+        'CERTIFICADO_MAX_BYTES': 512 * 1024,
+        'CERTIFICADO_CHUNK': 4096
+    })
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+@pytest.fixture
+def visitas(client):
+    user = User(username='visitante', email='visitante@test.com', is_admin=False)
+    user.set_password('visitante123')
+    outro = User(username='outro', email='outro@test.com', is_admin=False)
+    outro.set_password('outro123')
+    potencia, rito, oriente = Potencia(nome='Potência', sigla='P'), Rito(nome='Rito'), Oriente(nome='Campinas', uf='SP')
+    sessao, grau = Sessao(descricao='Sessão'), Grau(numero=1, descricao='Aprendiz')
+    db.session.add_all([user, outro, potencia, rito, oriente, sessao, grau])
+    db.session.flush()
+    loja = Loja(nome='Loja', numero='1', potencia_id=potencia.id, rito_id=rito.id, oriente_id=oriente.id, user_id=user.id)
+    db.session.add(loja)
+    db.session.flush()
+    ids = []
+    for dono in (user, user, outro):
+        visita = Visita(data_visita=date(2024, 1, 1), loja_id=loja.id, sessao_id=sessao.id, grau_id=grau.id,
+                        rito_id=rito.id, potencia_id=potencia.id, user_id=dono.id)
+        db.session.add(visita)
+        db.session.flush()
+        ids.append(visita.id)
+    db.session.commit()
+    return ids
+
+@pytest.fixture
+def headers(client, visitas):
+    response = client.post('/api/auth/login', json={'username': 'visitante', 'password': 'visitante123'})
+    return {'Authorization': f'Bearer {response.json["access_token"]}'}
+
+def _jpeg(tamanho=(2000, 1500)):
+    saida = io.BytesIO()
+    Image.new('RGB', tamanho, (200, 30, 30)).save(saida, 'JPEG')
+    return saida.getvalue()
+
+def _esperar(caminho, limite=10):
+    fim = time.monotonic() + limite
+    while not os.path.exists(caminho) and time.monotonic() < fim:
+        time.sleep(0.02)
+    return os.path.exists(caminho)
+
+def test_upload_no_corpo(client, visitas, headers):
+    conteudo = _jpeg()
+    response = client.post(f'/api/visitas/{visitas[0]}/certificado', data=conteudo,
+                           headers={**headers, 'Content-Type': 'image/jpeg'})
+    assert response.status_code == 201
+    sha256 = response.json['certificado']['sha256']
+    assert response.json['certificado'] == {'sha256': sha256, 'content_type': 'image/jpeg', 'tamanho': len(conteudo)}
+    assert response.json['duplicado'] is False
+    assert response.json['miniaturas'] == 'pendentes'
+
+    visita = db.session.get(Visita, visitas[0])
+    assert visita.certificado_sha256 == sha256
+    assert visita.certificado_scaniado is True
+
+    raiz = client.application.config['CERTIFICADOS_DIR']
+    cache = client.application.extensions['certificados']['cache']
+    with open(certificados.caminho(raiz, sha256), 'rb') as arquivo:
+        assert arquivo.read() == conteudo
+    for variante, lado in certificados.VARIANTES.items():
+        assert _esperar(cache.caminho(sha256, variante))
+        with Image.open(cache.caminho(sha256, variante)) as miniatura:
+            assert max(miniatura.size) == lado
+    assert os.listdir(os.path.join(raiz, 'tmp')) == []
+
+def test_upload_deduplicado(client, visitas, headers):
+    conteudo = _jpeg((300, 200))
+    primeiro = client.post(f'/api/visitas/{visitas[0]}/certificado', data=conteudo, headers=headers)
+    # Multipart também é aceito
+    segundo = client.post(f'/api/visitas/{visitas[1]}/certificado', headers=headers,
+                          data={'arquivo': (io.BytesIO(conteudo), 'certificado.jpg')})
+    assert primeiro.status_code == segundo.status_code == 201
+    assert segundo.json['duplicado'] is True
+    assert segundo.json['certificado']['sha256'] == primeiro.json['certificado']['sha256']
+    assert Certificado.query.count() == 1
+
+    raiz = client.application.config['CERTIFICADOS_DIR']
+    sha256 = primeiro.json['certificado']['sha256']
+    assert os.listdir(os.path.dirname(certificados.caminho(raiz, sha256))) == [sha256]
+
+def test_upload_pdf_sem_miniaturas(client, visitas, headers):
+    response = client.post(f'/api/visitas/{visitas[0]}/certificado', data=b'%PDF-1.4\n' + b'0' * 100, headers=headers)
+    assert response.status_code == 201
+    assert response.json['certificado']['content_type'] == 'application/pdf'
+    assert response.json['miniaturas'] == 'indisponiveis'
+
+def test_upload_muito_grande(client, visitas, headers):
+    response = client.post(f'/api/visitas/{visitas[0]}/certificado', data=b'\xff\xd8\xff' + b'0' * (600 * 1024),
+                           headers=headers)
+    assert response.status_code == 413
+    assert db.session.get(Visita, visitas[0]).certificado_sha256 is None
+    assert Certificado.query.count() == 0
+
+def test_upload_muito_grande_sem_content_length(client, visitas, headers):
+    # Corpo em chunked, já decodificado pelo servidor: o limite vale durante a leitura
+    corpo = io.BytesIO(b'\xff\xd8\xff' + b'0' * (800 * 1024))
+    response = client.post(f'/api/visitas/{visitas[0]}/certificado', input_stream=corpo,
+                           headers={**headers, 'Transfer-Encoding': 'chunked'},
+                           environ_overrides={'wsgi.input_terminated': True})
+    assert response.status_code == 413
+    assert os.listdir(os.path.join(client.application.config['CERTIFICADOS_DIR'], 'tmp')) == []
+
+def test_upload_formato_invalido(client, visitas, headers):
+    response = client.post(f'/api/visitas/{visitas[0]}/certificado', data=b'GIF89a' + b'0' * 100, headers=headers)
+    assert response.status_code == 415
+    assert Certificado.query.count() == 0
+
+def test_upload_visita_de_outro_usuario(client, visitas, headers):
+    response = client.post(f'/api/visitas/{visitas[2]}/certificado', data=_jpeg((50, 50)), headers=headers)
+    assert response.status_code == 404
+
+def test_fila_cheia():
+    pool = certificados.PoolVariantes(workers=1, fila=0)
+    liberar = __import__('threading').Event()
+    assert pool.agendar(liberar.wait) is not None
+    assert pool.agendar(liberar.wait) is None
+    liberar.set()
+
+def _enviar(client, headers, visita_id, conteudo):
+    response = client.post(f'/api/visitas/{visita_id}/certificado', data=conteudo, headers=headers)
+    assert response.status_code == 201
+    return response.json['certificado']['sha256']
+
+def test_download_range_e_condicional(client, visitas, headers):
+    conteudo = _jpeg((400, 300))
+    sha256 = _enviar(client, headers, visitas[0], conteudo)
+
+    response = client.get(f'/api/visitas/{visitas[0]}/certificado', headers=headers)
+    assert response.status_code == 200
+    assert response.data == conteudo
+    assert response.mimetype == 'image/jpeg'
+    assert response.headers['ETag'] == f'"{sha256}"'
+    assert 'private' in response.headers['Cache-Control']
+
+    response = client.get(f'/api/visitas/{visitas[0]}/certificado', headers={**headers, 'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.data == conteudo[10:20]
+    assert response.headers['Content-Range'] == f'bytes 10-19/{len(conteudo)}'
+
+    response = client.get(f'/api/visitas/{visitas[0]}/certificado', headers={**headers, 'If-None-Match': f'"{sha256}"'})
+    assert response.status_code == 304
+    assert response.data == b''
+
+def test_download_miniatura_sob_demanda(client, visitas, headers):
+    sha256 = _enviar(client, headers, visitas[0], _jpeg())
+    cache = client.application.extensions['certificados']['cache']
+    assert _esperar(cache.caminho(sha256, 'thumb'))
+    # Removida do cache, é gerada de novo no acesso
+    os.unlink(cache.caminho(sha256, 'thumb'))
+
+    response = client.get(f'/api/visitas/{visitas[0]}/certificado?variante=thumb', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert response.headers['ETag'] == f'"{sha256}.thumb"'
+    with Image.open(io.BytesIO(response.data)) as miniatura:
+        assert max(miniatura.size) == 256
+
+def test_download_erros(client, visitas, headers):
+    assert client.get(f'/api/visitas/{visitas[0]}/certificado', headers=headers).status_code == 404
+    _enviar(client, headers, visitas[0], b'%PDF-1.4\n' + b'0' * 100)
+    assert client.get(f'/api/visitas/{visitas[0]}/certificado?variante=thumb', headers=headers).status_code == 404
+    assert client.get(f'/api/visitas/{visitas[0]}/certificado?variante=grande', headers=headers).status_code == 400
+    assert client.get(f'/api/visitas/{visitas[2]}/certificado', headers=headers).status_code == 404
+
+def test_download_x_accel_redirect(client, visitas, headers):
+    conteudo = _jpeg((40, 30))
+    sha256 = _enviar(client, headers, visitas[0], conteudo)
+    client.application.config['CERTIFICADOS_ACCEL_REDIRECT'] = '/_certificados/'
+
+    response = client.get(f'/api/visitas/{visitas[0]}/certificado', headers={**headers, 'Range': 'bytes=0-9'})
+    # O nginx envia o arquivo e trata o Range
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'] == f'/_certificados/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+    assert 'X-Sendfile' not in response.headers
+
+    response = client.get(f'/api/visitas/{visitas[0]}/certificado', headers={**headers, 'If-None-Match': f'"{sha256}"'})
+    assert response.status_code == 304
+    assert 'X-Accel-Redirect' not in response.headers
+
+def test_download_x_accel_redirect_variantes(client, visitas, headers, tmp_path):
+    sha256 = _enviar(client, headers, visitas[0], _jpeg((400, 300)))
+    config = client.application.config
+    config['CERTIFICADOS_ACCEL_REDIRECT'] = '/_certificados/'
+    url = f'/api/visitas/{visitas[0]}/certificado?variante=thumb'
+
+    # Cache dentro de CERTIFICADOS_DIR: mesma location, caminho relativo a ela
+    response = client.get(url, headers=headers)
+    assert response.headers['X-Accel-Redirect'] == f'/_certificados/variantes/{sha256[:2]}/{sha256}.thumb.jpg'
+
+    # Cache fora: sem location própria, a aplicação envia o arquivo
+    fora = certificados.CacheVariantes(str(tmp_path / 'fora'), config['CERTIFICADOS_CACHE_MAX_BYTES'])
+    config['CERTIFICADOS_CACHE_DIR'] = fora.raiz
+    client.application.extensions['certificados']['cache'] = fora
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert 'X-Accel-Redirect' not in response.headers
+    assert response.data[:3] == b'\xff\xd8\xff'
+
+    config['CERTIFICADOS_CACHE_ACCEL_REDIRECT'] = '/_miniaturas'
+    response = client.get(url, headers=headers)
+    assert response.headers['X-Accel-Redirect'] == f'/_miniaturas/{sha256[:2]}/{sha256}.thumb.jpg'
+
+def test_variante_de_imagem_corrompida(client, visitas, headers):
+    conteudo = b'\xff\xd8\xff\xe0' + b'corrompido' * 100
+    _enviar(client, headers, visitas[0], conteudo)
+    # Sem como gerar a miniatura, o original é enviado
+    response = client.get(f'/api/visitas/{visitas[0]}/certificado?variante=preview', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert response.data == conteudo
+
+def test_cache_lru(tmp_path):
+    cache = certificados.CacheVariantes(str(tmp_path), limite=1000)
+    for i, sha256 in enumerate(('aa' * 32, 'bb' * 32, 'cc' * 32)):
+        destino = cache.caminho(sha256, 'thumb')
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, 'wb') as arquivo:
+            arquivo.write(b'0' * 400)
+        os.utime(destino, (1000 + i, 1000 + i))
+    # O mais antigo foi usado agora e passa a ser o mais recente
+    assert cache.obter('aa' * 32, 'thumb') is not None
+    cache.registrar(400)
+
+    assert os.path.exists(cache.caminho('aa' * 32, 'thumb'))
+    assert not os.path.exists(cache.caminho('bb' * 32, 'thumb'))
+    assert os.path.exists(cache.caminho('cc' * 32, 'thumb'))
+    assert cache.total == 800
@@ -0,0 +1,127 @@
+import gzip
+import io
+import zlib
+import pytest
+from datetime import date, timedelta
+from PIL import Image
+from app import create_app, db
+from app.models import User, Visita, Loja, Potencia, Rito, Oriente, Sessao, Grau
+from app.utils import compressao
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "compressao.db"}',
+        'CERTIFICADOS_DIR': str(tmp_path / 'certificados')
+    })
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+@pytest.fixture
+def visitas(client):
+    user = User(username='visitante', email='visitante@test.com', is_admin=False)
+    user.set_password('visitante123')
+    potencia, rito, oriente = Potencia(nome='Potência', sigla='P'), Rito(nome='Rito'), Oriente(nome='Campinas', uf='SP')
+    sessao, grau = Sessao(descricao='Sessão'), Grau(numero=1, descricao='Aprendiz')
+    db.session.add_all([user, potencia, rito, oriente, sessao, grau])
+    db.session.flush()
+    loja = Loja(nome='Loja', numero='1', potencia_id=potencia.id, rito_id=rito.id, oriente_id=oriente.id, user_id=user.id)
+    db.session.add(loja)
+    db.session.flush()
+    db.session.add_all(
+        Visita(data_visita=date(2024, 1, 1) + timedelta(days=i), loja_id=loja.id, sessao_id=sessao.id,
+               grau_id=grau.id, rito_id=rito.id, potencia_id=potencia.id, user_id=user.id,
+               observacoes=f'Visita {i}')
+        for i in range(50)
+    )
+    db.session.commit()
+    return user.id
+
+@pytest.fixture
+def headers(client, visitas):
+    response = client.post('/api/auth/login', json={'username': 'visitante', 'password': 'visitante123'})
+    return {'Authorization': f'Bearer {response.json["access_token"]}'}
+
+def test_listagem_comprimida(client, headers):
+    original = client.get('/api/visitas', headers=headers)
+    assert 'Content-Encoding' not in original.headers
+    assert 'Accept-Encoding' in original.headers['Vary']
+
+    response = client.get('/api/visitas', headers={**headers, 'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data) < len(original.data) / 3
+    assert gzip.decompress(response.data) == original.data
+
+def test_negociacao(client, headers):
+    # gzip recusado explicitamente e codificações desconhecidas
+    for aceitas in ('gzip;q=0', 'identity', 'compress'):
+        response = client.get('/api/visitas', headers={**headers, 'Accept-Encoding': aceitas})
+        assert 'Content-Encoding' not in response.headers
+    response = client.get('/api/visitas', headers={**headers, 'Accept-Encoding': '*'})
+    assert response.headers['Content-Encoding'] in compressao.codificacoes()
+
+def test_abaixo_do_limite(client, headers):
+    response = client.get('/api/visitas?limite=1', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+
+def test_streaming_comprimido(client, headers):
+    # Lê o corpo antes da próxima requisição: o gerador usa o contexto da sua
+    original = client.get('/api/visitas/export?format=ndjson', headers=headers).get_data()
+    response = client.get('/api/visitas/export?format=ndjson', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data) == original
+
+def test_streaming_envia_cada_bloco(app):
+    blocos = [b'{"a": 1}\n' * 100, b'{"b": 2}\n' * 100]
+    with app.app_context():
+        saida = compressao._em_streaming(iter(blocos), compressao._compressor('gzip'))
+        descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        # O primeiro bloco já pode ser descomprimido inteiro, sem esperar o resto
+        assert descompressor.decompress(next(saida)) == blocos[0]
+        assert descompressor.decompress(b''.join(saida)) == blocos[1]
+        assert descompressor.eof
+
+def test_certificado_nao_comprimido(client, visitas, headers):
+    visita_id = Visita.query.first().id
+    imagem = io.BytesIO()
+    Image.new('RGB', (400, 300), (200, 30, 30)).save(imagem, 'JPEG')
+    response = client.post(f'/api/visitas/{visita_id}/certificado', data=imagem.getvalue(),
+                           headers={**headers, 'Content-Type': 'image/jpeg'})
+    assert response.status_code == 201
+
+    response = client.get(f'/api/visitas/{visita_id}/certificado', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == imagem.getvalue()
+
+def test_lookups_reaproveitam_compressao(app, client, headers, monkeypatch):
+    app.config['COMPRESSAO_MIN_BYTES'] = 0
+    chamadas = []
+    comprimir = compressao.comprimir
+    monkeypatch.setattr(compressao, 'comprimir', lambda *args: chamadas.append(args) or comprimir(*args))
+    headers = {**headers, 'Accept-Encoding': 'gzip'}
+
+    primeira = client.get('/api/lookups', headers=headers)
+    segunda = client.get('/api/lookups', headers=headers)
+    assert primeira.headers['Content-Encoding'] == segunda.headers['Content-Encoding'] == 'gzip'
+    assert primeira.data == segunda.data
+    assert len(chamadas) == 1
+
+    # O ETag da versão comprimida é fraco e continua valendo para o 304
+    etag = primeira.headers['ETag']
+    assert etag.startswith('W/')
+    response = client.get('/api/lookups', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+from app import create_app, db
+from app.config.database import opcoes_engine
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "teste.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+def test_sqlite_pragmas(app):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+            assert conn.execute(text('PRAGMA foreign_keys')).scalar() == 1
+            assert conn.execute(text('PRAGMA cache_size')).scalar() == -20000
+
+def test_sqlite_pool(app):
+    with app.app_context():
+        assert isinstance(db.engine.pool, QueuePool)
+        assert db.engine.pool.size() == app.config['DB_POOL_SIZE']
+
+def test_opcoes_postgresql(app):
+    opcoes = opcoes_engine('postgresql://visitas@localhost/visitas', app.config)
+    assert opcoes['pool_pre_ping'] is True
+    assert opcoes['pool_recycle'] == app.config['DB_POOL_RECYCLE']
+    assert opcoes['connect_args']['application_name'] == 'visitas'
+
+def test_database_url(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "env.db"}')
+    app = create_app()
+    assert app.config['SQLALCHEMY_DATABASE_URI'].endswith('env.db')
+
+def test_sqlite_memoria_sem_pool(app):
+    assert opcoes_engine('sqlite:///:memory:', app.config) == {}
@@ -1,13 +1,13 @@
 import pytest
+from sqlalchemy import event
 from app import create_app, db
 from app.models import User, Grau
 from flask_jwt_extended import create_access_token
 
 @pytest.fixture
-def app():
-    app = create_app()
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "grau.db"}'})
     app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     return app
 
 @pytest.fixture
@@ -231,4 +231,49 @@ def test_delete_grau_as_regular_user(client, regular_user, test_grau):
     response = client.delete(f'/api/graus/{test_grau}',
         headers={'Authorization': f'Bearer {token}'}
     )
-    assert response.status_code == 403 
\ No newline at end of file
+    assert response.status_code == 403 
+def test_admin_check_does_not_query_users(client, admin_user):
+    response = client.post('/api/auth/login', json={
+        'username': 'admin',
+        'password': 'admin123'
+    })
+    token = response.json['access_token']
+
+    queries = []
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        response = client.post('/api/graus',
+            json={'numero': 4, 'descricao': 'Mestre Instalado'},
+            headers={'Authorization': f'Bearer {token}'}
+        )
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    assert response.status_code == 201
+    assert not any('FROM users' in query for query in queries)
+
+def test_demoted_admin_loses_access_after_ttl(app, client):
+    admin = User(username='rebaixado', email='rebaixado@test.com', is_admin=True)
+    admin.set_password('rebaixado123')
+    db.session.add(admin)
+    db.session.commit()
+    response = client.post('/api/auth/login', json={
+        'username': 'rebaixado',
+        'password': 'rebaixado123'
+    })
+    token = response.json['access_token']
+
+    admin.is_admin = False
+    db.session.commit()
+
+    # Simula o fim da janela do cache: o usuário é relido do banco
+    cache = app.extensions['usuarios_cache']
+    cache.clear()
+    cache.ttl = 0
+    response = client.post('/api/graus',
+        json={'numero': 4, 'descricao': 'Mestre Instalado'},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 403
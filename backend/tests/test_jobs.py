@@ -0,0 +1,260 @@
+import io
+import os
+import threading
+import time
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import update
+from app import create_app, db
+from app.models import User, Visita, Loja, Potencia, Rito, Oriente, Sessao, Grau, Job, EstatisticaVisita
+from app.utils import estatisticas, jobs
+
+@jobs.tarefa('teste.instavel', api=False)
+def _instavel(contexto, falhas):
+    if contexto.tentativa <= falhas:
+        raise RuntimeError(f'falha na tentativa {contexto.tentativa}')
+    return {'tentativa': contexto.tentativa}
+
+@jobs.tarefa('teste.permanente', api=False)
+def _permanente(contexto):
+    raise jobs.ErroPermanente('entrada inválida')
+
+@jobs.tarefa('teste.demorado', api=False)
+def _demorado(contexto):
+    fim = time.monotonic() + 10
+    passos = 0
+    while time.monotonic() < fim:
+        passos += 1
+        contexto.progresso(passos)
+        time.sleep(0.01)
+    return {'passos': passos}
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "jobs.db"}',
+        'JOBS_DIR': str(tmp_path / 'jobs'),
+        'JOBS_EMBUTIDO': False,
+        'JOBS_RETRY_DELAY': 0,
+        'JOBS_PROGRESS_INTERVAL': 0,
+        'JOBS_POLL': 0.05
+    })
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+@pytest.fixture
+def usuarios(client):
+    ids = {}
+    for nome, admin in (('admin', True), ('visitante', False), ('outro', False)):
+        user = User(username=nome, email=f'{nome}@test.com', is_admin=admin)
+        user.set_password(f'{nome}123')
+        db.session.add(user)
+        db.session.flush()
+        ids[nome] = user.id
+    db.session.commit()
+    return ids
+
+def _headers(client, nome):
+    response = client.post('/api/auth/login', json={'username': nome, 'password': f'{nome}123'})
+    return {'Authorization': f'Bearer {response.json["access_token"]}'}
+
+@pytest.fixture
+def dominio(client, usuarios):
+    potencia, rito, oriente = Potencia(nome='Potência', sigla='P'), Rito(nome='Rito'), Oriente(nome='Campinas', uf='SP')
+    sessao, grau = Sessao(descricao='Sessão'), Grau(numero=1, descricao='Aprendiz')
+    db.session.add_all([potencia, rito, oriente, sessao, grau])
+    db.session.flush()
+    loja = Loja(nome='Loja', numero='1', potencia_id=potencia.id, rito_id=rito.id, oriente_id=oriente.id,
+                user_id=usuarios['visitante'])
+    db.session.add(loja)
+    db.session.flush()
+    visitas = [
+        {'data_visita': date(2024, 1, 1) + timedelta(days=i), 'loja_id': loja.id, 'sessao_id': sessao.id,
+         'grau_id': grau.id, 'rito_id': rito.id, 'potencia_id': potencia.id, 'possui_certificado': i % 2 == 0,
+         'user_id': usuarios['visitante']}
+        for i in range(5)
+    ]
+    db.session.add_all(Visita(**visita) for visita in visitas)
+    estatisticas.registrar(visitas)
+    db.session.commit()
+    return {'loja_id': loja.id, 'ids': f'{sessao.id},{grau.id},{rito.id},{potencia.id}'}
+
+def _processar(app):
+    jobs.trabalhar(app, 'teste', burst=True)
+    db.session.expire_all()
+
+def test_exportacao_em_job(app, client, dominio):
+    headers = _headers(client, 'visitante')
+    response = client.post('/api/jobs', json={'tipo': 'visitas.exportar', 'parametros': {'format': 'csv'}},
+                           headers=headers)
+    assert response.status_code == 202
+    assert response.json['status'] == 'pendente'
+    assert response.headers['Location'] == f"/api/jobs/{response.json['id']}"
+
+    _processar(app)
+    status = client.get(response.headers['Location'], headers=headers).json
+    assert status['status'] == 'concluido'
+    assert status['progresso'] == status['total'] == 5
+    assert status['resultado']['linhas'] == 5
+
+    download = client.get(f"{response.headers['Location']}/resultado", headers=headers)
+    assert download.status_code == 200
+    assert download.mimetype == 'text/csv'
+    assert 'visitas.csv' in download.headers['Content-Disposition']
+    assert len(download.data.decode().strip().splitlines()) == 6
+
+    # Jobs são visíveis só para o dono
+    assert client.get(response.headers['Location'], headers=_headers(client, 'outro')).status_code == 404
+
+def test_submissao_invalida(client, usuarios):
+    headers = _headers(client, 'visitante')
+    assert client.post('/api/jobs', json={'tipo': 'nao.existe'}, headers=headers).status_code == 400
+    assert client.post('/api/jobs', json={'tipo': 'visitas.importar'}, headers=headers).status_code == 400
+    assert client.post('/api/jobs', json={'tipo': 'estatisticas.rebuild'}, headers=headers).status_code == 403
+    response = client.post('/api/jobs', json={'tipo': 'visitas.exportar', 'parametros': {'format': 'xml'}},
+                           headers=headers)
+    assert response.status_code == 400
+    response = client.post('/api/jobs', json={'tipo': 'visitas.exportar',
+                                              'parametros': {'filtros': {'data_inicio': 'ontem'}}}, headers=headers)
+    assert response.status_code == 400
+    assert Job.query.count() == 0
+
+def test_importacao_assincrona(app, client, dominio):
+    headers = _headers(client, 'visitante')
+    conteudo = '\n'.join([
+        'data_visita,loja_id,sessao_id,grau_id,rito_id,potencia_id,possui_certificado,observacoes',
+        f"2024-03-01,{dominio['loja_id']},{dominio['ids']},sim,Primeira",
+        f"2024-03-02,{dominio['loja_id']},{dominio['ids']},nao,Segunda",
+        f"2024-03-03,999999,{dominio['ids']},nao,Loja inexistente",
+    ])
+    response = client.post('/api/visitas/import?async=1', headers=headers,
+                           data={'arquivo': (io.BytesIO(conteudo.encode()), 'visitas.csv')})
+    assert response.status_code == 202
+    assert Visita.query.count() == 5
+
+    _processar(app)
+    job = db.session.get(Job, response.json['id'])
+    assert job.status == 'concluido'
+    assert job.resultado['accepted'] == 2
+    assert job.resultado['rejected_count'] == 1
+    assert Visita.query.filter_by(user_id=job.user_id).count() == 7
+    assert os.listdir(app.config['JOBS_DIR']) == []
+
+def test_novas_tentativas(app, client, usuarios):
+    job = jobs.enfileirar('teste.instavel', {'falhas': 1})
+    outro = jobs.enfileirar('teste.instavel', {'falhas': 5})
+    _processar(app)
+
+    job, outro = db.session.get(Job, job.id), db.session.get(Job, outro.id)
+    assert job.status == 'concluido'
+    assert job.tentativas == 2
+    assert job.resultado == {'tentativa': 2}
+    assert job.erro is None
+    assert outro.status == 'falhou'
+    assert outro.tentativas == outro.max_tentativas == 3
+    assert outro.erro == 'falha na tentativa 3'
+
+def test_erro_permanente_nao_repete(app, client, usuarios):
+    job = jobs.enfileirar('teste.permanente')
+    _processar(app)
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.tentativas, job.erro) == ('falhou', 1, 'entrada inválida')
+
+def test_retry_agendado_com_espera(app, client, usuarios):
+    app.config['JOBS_RETRY_DELAY'] = 60
+    job = jobs.enfileirar('teste.instavel', {'falhas': 1})
+    _processar(app)
+    job = db.session.get(Job, job.id)
+    # Volta para a fila, mas só depois da espera
+    assert job.status == 'pendente'
+    assert job.executar_apos > jobs.agora_utc() + timedelta(seconds=50)
+
+def test_cancelar_pendente(app, client, usuarios):
+    job = jobs.enfileirar('estatisticas.rebuild', user_id=usuarios['admin'])
+    headers = _headers(client, 'admin')
+    response = client.post(f'/api/jobs/{job.id}/cancel', headers=headers)
+    assert response.status_code == 200
+    assert response.json['status'] == 'cancelado'
+    assert client.post(f'/api/jobs/{job.id}/cancel', headers=headers).status_code == 409
+
+    _processar(app)
+    assert db.session.get(Job, job.id).iniciado_em is None
+
+def test_cancelar_em_execucao(app, client, usuarios):
+    job = jobs.enfileirar('teste.demorado', user_id=usuarios['visitante'])
+    worker = threading.Thread(target=jobs.trabalhar, args=(app, 'teste'), kwargs={'burst': True})
+    worker.start()
+    headers = _headers(client, 'visitante')
+    def status():
+        # O cliente de teste reaproveita a sessão; descarta o snapshot anterior
+        db.session.rollback()
+        return client.get(f'/api/jobs/{job.id}', headers=headers).json
+
+    fim = time.monotonic() + 5
+    while status()['progresso'] == 0 and time.monotonic() < fim:
+        time.sleep(0.01)
+
+    response = client.post(f'/api/jobs/{job.id}/cancel', headers=headers)
+    assert response.status_code == 202
+    assert response.json['cancelamento_solicitado'] is True
+    worker.join(5)
+    assert not worker.is_alive()
+    assert status()['status'] == 'cancelado'
+
+def test_lease_expirado_volta_para_fila(app, client, usuarios):
+    job = jobs.enfileirar('teste.instavel', {'falhas': 0})
+    assert jobs.reservar('worker-morto') == job.id
+    db.session.execute(update(Job).values(heartbeat=jobs.agora_utc() - timedelta(hours=1)))
+    db.session.commit()
+
+    _processar(app)
+    job = db.session.get(Job, job.id)
+    assert job.status == 'concluido'
+    assert job.tentativas == 2
+
+def test_transferir_registros(app, client, dominio, usuarios):
+    headers = _headers(client, 'admin')
+    response = client.post('/api/jobs', headers=headers, json={
+        'tipo': 'usuarios.transferir',
+        'parametros': {'de_user_id': usuarios['visitante'], 'para_user_id': usuarios['outro']}
+    })
+    assert response.status_code == 202
+    _processar(app)
+
+    job = db.session.get(Job, response.json['id'])
+    assert job.status == 'concluido'
+    assert job.resultado == {'visitas': 5, 'lojas': 1}
+    assert Visita.query.filter_by(user_id=usuarios['outro']).count() == 5
+    assert Loja.query.filter_by(user_id=usuarios['outro']).count() == 1
+
+    incrementais = {(e.user_id, e.dimensao, e.chave): e.total for e in EstatisticaVisita.query if e.total}
+    estatisticas.rebuild()
+    assert incrementais == {(e.user_id, e.dimensao, e.chave): e.total for e in EstatisticaVisita.query}
+
+def test_executor_embutido(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "embutido.db"}',
+        'JOBS_DIR': str(tmp_path / 'jobs'),
+        'JOBS_POLL': 0.05
+    })
+    with app.app_context():
+        db.create_all()
+        job = jobs.enfileirar('estatisticas.rebuild')
+        fim = time.monotonic() + 10
+        while time.monotonic() < fim:
+            db.session.expire_all()
+            if db.session.get(Job, job.id).status == 'concluido':
+                break
+            time.sleep(0.05)
+        assert db.session.get(Job, job.id).status == 'concluido'
+        db.session.remove()
+        db.drop_all()
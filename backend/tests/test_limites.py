@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User
+from app.utils import senhas
+from app.utils.limites import LimitadorMemoria, LimitadorSQLite
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "limites.db"}',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:2000',
+        'LOGIN_MAX_ATTEMPTS_USER': 3,
+        'LOGIN_MAX_ATTEMPTS_IP': 5
+    })
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='limitado', email='limitado@test.com', is_admin=False)
+            user.set_password('limitado123')
+            db.session.add(user)
+            db.session.commit()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+def login(client, username='limitado', password='errada'):
+    return client.post('/api/auth/login', json={'username': username, 'password': password})
+
+def test_bloqueio_por_usuario_sem_banco_nem_hash(client, monkeypatch):
+    for _ in range(3):
+        assert login(client).status_code == 401
+
+    queries = []
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+    def hash_proibido(*args):
+        raise AssertionError('hash calculado para login bloqueado')
+    monkeypatch.setattr(senhas, 'verificar', hash_proibido)
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        response = login(client, password='limitado123')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert queries == []
+
+def test_bloqueio_por_ip(client):
+    # Nomes diferentes, mesmo IP
+    for i in range(5):
+        assert login(client, username=f'inexistente{i}').status_code == 401
+    assert login(client, username='outro').status_code == 429
+
+def test_sucesso_zera_usuario(client):
+    for _ in range(2):
+        login(client)
+    assert login(client, password='limitado123').status_code == 200
+    for _ in range(2):
+        assert login(client).status_code == 401
+
+def test_backoff_exponencial(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr('app.utils.limites.time.monotonic', lambda: agora[0])
+    limitador = LimitadorMemoria(janela=3600, backoff_base=1, backoff_max=60)
+    limites = [('usuario:x', 2)]
+    assert limitador.tentar(limites) == 0
+    assert limitador.tentar(limites) == 0   # atinge o limite: 1s
+    assert limitador.tentar(limites) == pytest.approx(1)
+    agora[0] += 1
+    assert limitador.tentar(limites) == 0   # excesso 1: 2s
+    assert limitador.tentar(limites) == pytest.approx(2)
+    agora[0] += 2
+    assert limitador.tentar(limites) == 0   # excesso 2: 4s
+    assert limitador.tentar(limites) == pytest.approx(4)
+
+def test_lru_limita_memoria():
+    limitador = LimitadorMemoria(janela=60, backoff_base=1, backoff_max=60, maxsize=100)
+    for i in range(1000):
+        limitador.tentar([(f'ip:{i}', 5)])
+    assert len(limitador._estado) == 100
+
+def test_sqlite_compartilhado_entre_workers(tmp_path):
+    caminho = str(tmp_path / 'limites.sqlite')
+    worker_a = LimitadorSQLite(caminho, janela=60, backoff_base=10, backoff_max=60)
+    worker_b = LimitadorSQLite(caminho, janela=60, backoff_base=10, backoff_max=60)
+    limites = [('usuario:x', 3), ('ip:1.2.3.4', 10)]
+    assert worker_a.tentar(limites) == 0
+    assert worker_b.tentar(limites) == 0
+    assert worker_a.tentar(limites) == 0
+    assert worker_b.tentar(limites) > 0
+
+    worker_b.sucesso(limites)
+    assert worker_a.tentar(limites) == 0
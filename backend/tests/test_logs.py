@@ -0,0 +1,94 @@
+import json
+import logging
+import pytest
+from app import create_app, db
+from app.models import User
+from app.utils.logs import AmostragemFilter, JsonFormatter
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "logs.db"}',
+        'LOG_LEVEL': 'DEBUG',
+        'LOG_DEBUG_SAMPLE_RATE': 1.0
+    })
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='registrador', email='registrador@test.com', is_admin=False)
+            user.set_password('senha-secreta-123')
+            db.session.add(user)
+            db.session.commit()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+def registros(app, capsys):
+    # Parar o listener esvazia a fila antes de ler a saída
+    listener = app.extensions['logs']
+    listener.stop()
+    listener.start()
+    return [json.loads(linha) for linha in capsys.readouterr().out.splitlines() if linha.startswith('{')]
+
+def login(client):
+    response = client.post('/api/auth/login', json={
+        'username': 'registrador',
+        'password': 'senha-secreta-123'
+    })
+    assert response.status_code == 200
+    return response.json['access_token']
+
+def test_login_nao_registra_segredos(app, client, capsys):
+    token = login(client)
+    saida = json.dumps(registros(app, capsys))
+    assert 'senha-secreta-123' not in saida
+    assert token not in saida
+    assert 'pbkdf2' not in saida and 'scrypt' not in saida
+
+def test_access_log_com_contexto(app, client, capsys):
+    token = login(client)
+    response = client.get('/api/graus', headers={
+        'Authorization': f'Bearer {token}',
+        'X-Request-ID': 'req-123'
+    })
+    assert response.headers['X-Request-ID'] == 'req-123'
+
+    linhas = [r for r in registros(app, capsys) if r.get('request_id') == 'req-123']
+    acesso = [r for r in linhas if r['logger'] == 'app.access']
+    assert len(acesso) == 1
+    assert acesso[0]['status'] == 200
+    assert acesso[0]['path'] == '/api/graus'
+    assert acesso[0]['user_id'] == str(User.query.filter_by(username='registrador').one().id)
+    assert acesso[0]['duration_ms'] >= 0
+    # Os logs da rota herdam o mesmo request id
+    assert any(r['logger'] == 'app.routes.grau_routes' for r in linhas)
+
+def test_request_id_gerado(client):
+    response = client.post('/api/auth/login', json={})
+    assert len(response.headers['X-Request-ID']) == 32
+
+def test_json_formatter_excecao():
+    try:
+        raise ValueError('falhou')
+    except ValueError:
+        record = logging.getLogger('app.teste').makeRecord(
+            'app.teste', logging.ERROR, __file__, 1, 'Erro ao %s', ('processar',), __import__('sys').exc_info(),
+            extra={'loja_id': 7})
+    dados = json.loads(JsonFormatter().format(record))
+    assert dados['msg'] == 'Erro ao processar'
+    assert dados['loja_id'] == 7
+    assert 'ValueError: falhou' in dados['exc']
+
+def test_amostragem_debug():
+    filtro = AmostragemFilter(0.0)
+    debug = logging.LogRecord('app', logging.DEBUG, '', 0, 'x', None, None)
+    info = logging.LogRecord('app', logging.INFO, '', 0, 'x', None, None)
+    assert not filtro.filter(debug)
+    assert filtro.filter(info)
+    filtro.taxa = 1.0
+    assert filtro.filter(debug)
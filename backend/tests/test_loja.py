@@ -0,0 +1,149 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Loja, Potencia, Rito, Oriente
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "loja.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+@pytest.fixture
+def regular_user(app, client):
+    user = User(username='secretario', email='secretario@test.com', is_admin=False)
+    user.set_password('secretario123')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+@pytest.fixture
+def token(client, regular_user):
+    response = client.post('/api/auth/login', json={
+        'username': 'secretario',
+        'password': 'secretario123'
+    })
+    assert response.status_code == 200
+    return response.json['access_token']
+
+def criar_lojas(user_id, quantidade, inicio=0):
+    # Cada loja com potência, rito e oriente próprios, o pior caso para lazy loading
+    for i in range(inicio, inicio + quantidade):
+        potencia = Potencia(nome=f'Potência {i}', sigla=f'P{i}')
+        rito = Rito(nome=f'Rito {i}')
+        oriente = Oriente(nome=f'Oriente {i}', uf='SP')
+        db.session.add_all([potencia, rito, oriente])
+        db.session.flush()
+        db.session.add(Loja(nome=f'Loja {i}', numero=str(i), potencia_id=potencia.id,
+                            rito_id=rito.id, oriente_id=oriente.id, user_id=user_id))
+    db.session.commit()
+    db.session.expunge_all()
+
+def contar_queries_get(client, url, token):
+    queries = []
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        # A lista de revogação sincroniza no máximo a cada JWT_DENYLIST_SYNC segundos
+        if 'tokens_revogados' not in statement:
+            queries.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        response = client.get(url, headers={'Authorization': f'Bearer {token}'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    assert response.status_code == 200
+    return response, len(queries)
+
+def test_list_lojas_query_count_constant(client, token, regular_user):
+    criar_lojas(regular_user, 2)
+    response, poucas = contar_queries_get(client, '/api/lojas', token)
+    assert len(response.json) == 2
+
+    criar_lojas(regular_user, 10, inicio=2)
+    response, muitas = contar_queries_get(client, '/api/lojas', token)
+    assert len(response.json) == 12
+    assert all(loja['oriente'] and loja['potencia'] and loja['rito'] for loja in response.json)
+
+    assert muitas == poucas
+
+def test_get_loja(client, token, regular_user):
+    criar_lojas(regular_user, 1)
+    loja_id = Loja.query.filter_by(user_id=regular_user).first().id
+    db.session.expunge_all()
+    response, queries = contar_queries_get(client, f'/api/lojas/{loja_id}', token)
+    assert response.json['oriente']['nome'] == 'Oriente 0'
+    # Apenas a loja com seus relacionamentos; o usuário vem do token
+    assert queries == 1
+
+def contar_queries_post(client, url, token, dados):
+    queries = []
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if 'tokens_revogados' not in statement:
+            queries.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        response = client.post(url, json=dados, headers={'Authorization': f'Bearer {token}'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    return response, queries
+
+def test_create_loja_reaproveita_oriente_normalizado(client, token, regular_user):
+    criar_lojas(regular_user, 1)
+    potencia, rito = Potencia.query.first(), Rito.query.first()
+    dados = {'nome': 'Loja Nova', 'numero': '10', 'potencia_id': potencia.id, 'rito_id': rito.id,
+             'oriente_nome': 'São  Paulo', 'oriente_uf': 'sp'}
+
+    response, _ = contar_queries_post(client, '/api/lojas', token, dados)
+    assert response.status_code == 201
+    oriente_id = response.json['oriente_id']
+    assert response.json['oriente']['uf'] == 'SP'
+
+    # Mesma chave normalizada: mesmo oriente
+    response, _ = contar_queries_post(client, '/api/lojas', token,
+                                      {**dados, 'oriente_nome': 'sao paulo', 'oriente_uf': 'SP'})
+    assert response.status_code == 201
+    assert response.json['oriente_id'] == oriente_id
+    assert Oriente.query.filter_by(chave='sao paulo|SP').count() == 1
+
+    # Já no mapa em memória: nenhuma consulta a orientes
+    response, queries = contar_queries_post(client, '/api/lojas', token, {**dados, 'oriente_nome': 'SAO PAULO'})
+    assert response.json['oriente_id'] == oriente_id
+    assert not [q for q in queries if q.startswith(('SELECT orientes', 'INSERT INTO orientes'))]
+
+def test_list_lojas_not_modified(client, token, regular_user):
+    headers = {'Authorization': f'Bearer {token}'}
+    criar_lojas(regular_user, 2)
+    response = client.get('/api/lojas', headers=headers)
+    etag = response.headers['ETag']
+
+    queries = []
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        response = client.get('/api/lojas', headers={**headers, 'If-None-Match': etag})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    assert response.status_code == 304
+    # Só o validador (count/max pelo índice); nenhuma loja carregada
+    assert not [q for q in queries if 'lojas.nome' in q]
+
+    loja = Loja.query.filter_by(user_id=regular_user).first()
+    dados = {'numero': loja.numero, 'potencia_id': loja.potencia_id, 'rito_id': loja.rito_id,
+             'oriente_nome': 'Oriente 0', 'oriente_uf': 'SP'}
+    # Duas alterações seguidas, no mesmo segundo
+    for nome in ('Primeira', 'Segunda'):
+        response = client.put(f'/api/lojas/{loja.id}', json={**dados, 'nome': nome}, headers=headers)
+        assert response.status_code == 200
+        response = client.get('/api/lojas', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        etag = response.headers['ETag']
@@ -0,0 +1,169 @@
+import pytest
+from sqlalchemy import event, text
+from app import create_app, db
+from app.models import User, Grau, Sessao, Loja, Potencia, Rito, Oriente
+from app.utils.cache import reference_cache
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "lookups.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+@pytest.fixture
+def token(client):
+    user = User(username='consulta', email='consulta@test.com', is_admin=False)
+    user.set_password('consulta123')
+    db.session.add(user)
+    db.session.commit()
+    response = client.post('/api/auth/login', json={
+        'username': 'consulta',
+        'password': 'consulta123'
+    })
+    assert response.status_code == 200
+    return response.json['access_token']
+
+def test_lookups_bundle(client, token):
+    response = client.get('/api/lookups?include=graus,sessoes,lojas',
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 200
+    assert set(response.json) == {'graus', 'sessoes', 'lojas'}
+    assert len(response.json['graus']) == Grau.query.count()
+    assert len(response.json['sessoes']) == Sessao.query.count()
+    assert response.json['lojas'] == []
+    assert response.headers['ETag']
+
+def test_lookups_not_modified(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    response = client.get('/api/lookups?include=graus', headers=headers)
+    etag = response.headers['ETag']
+
+    response = client.get('/api/lookups?include=graus',
+        headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # Qualquer alteração na coleção invalida a versão
+    db.session.add(Grau(numero=4, descricao='Mestre Instalado'))
+    reference_cache.invalidate('graus')
+    db.session.commit()
+    response = client.get('/api/lookups?include=graus',
+        headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_lookups_lojas_nested_collections(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/api/lookups?include=lojas', headers=headers).headers['ETag']
+
+    # Cada loja traz potência, rito e oriente: mudar qualquer um invalida o bundle
+    for nome in ('potencias', 'ritos', 'orientes'):
+        reference_cache.invalidate(nome)
+        db.session.commit()
+        response = client.get('/api/lookups?include=lojas', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        etag = response.headers['ETag']
+
+def test_lookups_invalid_collection(client, token):
+    response = client.get('/api/lookups?include=graus,usuarios',
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 400
+    assert 'usuarios' in response.json['error']
+
+def test_reference_cache_avoids_table_reads(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    db.session.add(Grau(numero=1, descricao='Aprendiz'))
+    db.session.commit()
+    client.get('/api/graus', headers=headers)
+
+    queries = []
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        response = client.get('/api/graus', headers=headers)
+        client.get(f"/api/graus/{response.json[0]['id']}", headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    assert not any('FROM graus' in query for query in queries)
+
+def test_reference_cache_sees_other_worker_changes(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    antes = client.get('/api/sessoes', headers=headers).json
+
+    # Simula outro processo: altera a tabela e incrementa a versão via SQL
+    db.session.execute(text("INSERT INTO sessoes (descricao) VALUES ('Sessão Econômica')"))
+    db.session.execute(text(
+        "INSERT INTO versoes_referencia (nome, versao) VALUES ('sessoes', 100) "
+        "ON CONFLICT (nome) DO UPDATE SET versao = versao + 1"
+    ))
+    db.session.commit()
+
+    depois = client.get('/api/sessoes', headers=headers).json
+    assert len(depois) == len(antes) + 1
+    assert depois[-1]['descricao'] == 'Sessão Econômica'
+
+def _login(client, username, password):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f'Bearer {response.json["access_token"]}'}
+
+def test_lookups_lojas_oriente_renomeado(client, token):
+    admin = User(username='admin', email='admin@test.com', is_admin=True)
+    admin.set_password('admin123')
+    consulta = User.query.filter_by(username='consulta').first()
+    potencia, rito, oriente = Potencia(nome='Potência', sigla='P'), Rito(nome='Rito'), Oriente(nome='Campinas', uf='SP')
+    db.session.add_all([admin, potencia, rito, oriente])
+    db.session.flush()
+    db.session.add(Loja(nome='Loja', numero='1', potencia_id=potencia.id, rito_id=rito.id,
+                        oriente_id=oriente.id, user_id=consulta.id))
+    db.session.commit()
+    oriente_id = oriente.id
+
+    # O frontend pede as lojas sem a coleção de orientes
+    url = '/api/lookups?include=lojas,sessoes,graus,ritos,potencias'
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get(url, headers=headers).headers['ETag']
+
+    response = client.put(f'/api/orientes/{oriente_id}', json={'nome': 'Sorocaba'}, headers=_login(client, 'admin', 'admin123'))
+    assert response.status_code == 200
+
+    response = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['lojas'][0]['oriente']['nome'] == 'Sorocaba'
+
+def test_reference_cache_ignores_rolled_back_changes(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    antes = client.get('/api/graus', headers=headers).json
+
+    # Handler que invalida, lê a coleção e desfaz: nada disso pode ficar no cache
+    reference_cache.invalidate('graus')
+    db.session.add(Grau(numero=7, descricao='Desfeito'))
+    db.session.flush()
+    assert reference_cache.all('graus')[-1]['descricao'] == 'Desfeito'
+    db.session.rollback()
+
+    # Outro processo confirma uma alteração que reaproveita o número de versão
+    db.session.execute(text("INSERT INTO graus (numero, descricao) VALUES (8, 'Confirmado')"))
+    db.session.execute(text(
+        "INSERT INTO versoes_referencia (nome, versao) VALUES ('graus', 1) "
+        "ON CONFLICT (nome) DO UPDATE SET versao = versao + 1"
+    ))
+    db.session.commit()
+
+    depois = client.get('/api/graus', headers=headers).json
+    assert [grau['descricao'] for grau in depois] == [grau['descricao'] for grau in antes] + ['Confirmado']
@@ -0,0 +1,48 @@
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import upgrade, downgrade
+from flask import current_app
+from sqlalchemy import inspect
+from app import create_app, db
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "migracoes.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+def _diferencas():
+    with db.engine.connect() as conn:
+        contexto = MigrationContext.configure(conn, opts=current_app.extensions['migrate'].configure_args)
+        return compare_metadata(contexto, db.metadata)
+
+def test_migracoes_sem_drift(app):
+    """As migrações devem produzir exatamente o esquema dos modelos"""
+    with app.app_context():
+        upgrade()
+        assert _diferencas() == []
+
+def test_downgrade(app):
+    with app.app_context():
+        upgrade()
+        downgrade(revision='base')
+        assert inspect(db.engine).get_table_names() == ['alembic_version']
+
+def test_upgrade_banco_criado_sem_migracoes(app):
+    """Bancos criados com create_all recebem os índices que faltam"""
+    with app.app_context():
+        # O esquema da revisão 0001 é o que db.create_all criava antes das migrações
+        upgrade(revision='0001')
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('DROP TABLE alembic_version')
+            conn.exec_driver_sql('DROP INDEX ix_visitas_user_data_visita_id')
+            conn.exec_driver_sql('DROP INDEX uq_orientes_nome_uf')
+        upgrade()
+        assert _diferencas() == []
+
+def test_boot_sem_ddl(tmp_path):
+    create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "boot.db"}'})
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "boot.db"}'})
+    with app.app_context():
+        assert inspect(db.engine).get_table_names() == []
@@ -0,0 +1,83 @@
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import insert, text
+from sqlalchemy.exc import IntegrityError
+from app import create_app, db
+from app.models import User, Loja, Potencia, Rito, Oriente
+from app.models.oriente import chave_oriente
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "orientes.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+def test_chave_normalizada():
+    assert chave_oriente(' São  Paulo ', 'sp') == chave_oriente('sao paulo', 'SP') == 'sao paulo|SP'
+    assert Oriente(nome='Niterói', uf='rj').chave == 'niteroi|RJ'
+
+def test_indice_unico_na_chave(client):
+    db.session.add(Oriente(nome='São Paulo', uf='SP'))
+    db.session.commit()
+    db.session.add(Oriente(nome='SAO PAULO', uf='SP'))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+def _loja(nome, oriente_id):
+    user = User.query.first()
+    if user is None:
+        user = User(username='dono', email='dono@test.com', password_hash='x')
+        db.session.add(user)
+        db.session.add_all([Potencia(nome='Potência', sigla='P'), Rito(nome='Rito')])
+        db.session.flush()
+    return Loja(nome=nome, numero='1', potencia_id=Potencia.query.first().id, rito_id=Rito.query.first().id,
+                oriente_id=oriente_id, user_id=user.id)
+
+def test_merge_cli(client):
+    # Orientes gravados com uma regra de normalização antiga
+    ids = [db.session.execute(insert(Oriente).values(nome=nome, uf='SP', chave=chave)).inserted_primary_key[0]
+           for nome, chave in (('São Paulo', 'sao paulo|SP'), ('Sao Paulo', 'legado|SP'), ('Santos', 'santos antigo|SP'))]
+    db.session.add_all([_loja('Loja A', ids[0]), _loja('Loja B', ids[1])])
+    db.session.commit()
+
+    runner = client.application.test_cli_runner()
+    resultado = runner.invoke(args=['orientes', 'merge', '--dry-run'])
+    assert f'Oriente {ids[0]} <- {ids[1]}' in resultado.output
+    assert Oriente.query.count() == 3
+
+    resultado = runner.invoke(args=['orientes', 'merge'])
+    assert '1 grupos de duplicados unidos, 1 chaves recalculadas' in resultado.output
+    db.session.expire_all()
+    assert [o.id for o in Oriente.query.order_by(Oriente.id)] == [ids[0], ids[2]]
+    assert {loja.oriente_id for loja in Loja.query} == {ids[0]}
+    assert db.session.get(Oriente, ids[2]).chave == 'santos|SP'
+
+def test_migracao_une_duplicados(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "migrado.db"}'})
+    with app.app_context():
+        upgrade(revision='0004')
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (username, email) VALUES ('u', 'u@test.com')"))
+            conn.execute(text("INSERT INTO potencias (nome, sigla) VALUES ('P', 'P')"))
+            conn.execute(text("INSERT INTO ritos (nome) VALUES ('R')"))
+            conn.execute(text("INSERT INTO orientes (nome, uf) VALUES ('São Paulo', 'SP'), ('SAO PAULO', 'SP')"))
+            conn.execute(text("INSERT INTO lojas (nome, numero, potencia_id, rito_id, oriente_id, user_id) "
+                              "VALUES ('L1', '1', 1, 1, 1, 1), ('L2', '2', 1, 1, 2, 1)"))
+        upgrade()
+        with db.engine.connect() as conn:
+            assert conn.execute(text('SELECT id, chave FROM orientes')).all() == [(1, 'sao paulo|SP')]
+            assert conn.execute(text('SELECT DISTINCT oriente_id FROM lojas')).scalars().all() == [1]
+            # Os triggers da busca sobrevivem à recriação da tabela
+            conn.execute(text("UPDATE orientes SET nome = 'Sampa' WHERE id = 1"))
+            assert conn.execute(text("SELECT rowid FROM busca_orientes WHERE busca_orientes MATCH 'sampa'")).all() == [(1,)]
+            assert conn.execute(text('PRAGMA foreign_keys')).scalar() == 1
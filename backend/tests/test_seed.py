@@ -0,0 +1,35 @@
+import pytest
+from flask_migrate import upgrade
+from app import create_app
+from app.models import User, Grau, Oriente
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "seed.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+def test_boot_sem_acesso_ao_banco(app, tmp_path):
+    # O SQLite cria o arquivo na primeira conexão
+    assert not (tmp_path / 'seed.db').exists()
+
+def test_seed(app):
+    with app.app_context():
+        upgrade()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['seed', '--admin-password', 'segredo123'])
+    assert result.exit_code == 0
+    assert 'graus' in result.output
+    with app.app_context():
+        admin = User.query.filter_by(username='admin').one()
+        assert admin.is_admin and admin.check_password('segredo123')
+        assert Grau.query.count() == 3
+
+    # Idempotente: não duplica dados já existentes
+    result = runner.invoke(args=['seed'])
+    assert result.exit_code == 0
+    assert 'já inicializado' in result.output
+    with app.app_context():
+        assert Oriente.query.count() == 3
+        assert User.query.count() == 1
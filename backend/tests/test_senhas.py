@@ -0,0 +1,80 @@
+import threading
+import pytest
+from app import create_app, db
+from app.models import User
+from app.utils.senhas import FilaSenhasCheia, PoolSenhas, precisa_rehash
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "senhas.db"}',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:2000',
+        'PASSWORD_HASH_WORKERS': 1,
+        'PASSWORD_HASH_QUEUE': 0
+    })
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+def criar_usuario(app, metodo):
+    metodo_atual = app.config['PASSWORD_HASH_METHOD']
+    app.config['PASSWORD_HASH_METHOD'] = metodo
+    user = User(username='cifrado', email='cifrado@test.com', is_admin=False)
+    user.set_password('cifrado123')
+    db.session.add(user)
+    db.session.commit()
+    app.config['PASSWORD_HASH_METHOD'] = metodo_atual
+    return user
+
+def test_login_rehash_custo_antigo(app, client):
+    user = criar_usuario(app, 'pbkdf2:sha256:1000')
+    assert precisa_rehash(user.password_hash)
+
+    response = client.post('/api/auth/login', json={'username': 'cifrado', 'password': 'cifrado123'})
+    assert response.status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+    assert not precisa_rehash(user.password_hash)
+    assert user.check_password('cifrado123')
+
+def test_login_sem_rehash(app, client):
+    user = criar_usuario(app, 'pbkdf2:sha256:2000')
+    antes = user.password_hash
+    response = client.post('/api/auth/login', json={'username': 'cifrado', 'password': 'cifrado123'})
+    assert response.status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash == antes
+
+def test_login_fila_cheia(app, client):
+    criar_usuario(app, 'pbkdf2:sha256:2000')
+    pool = app.extensions['senhas']
+    assert pool.vagas.acquire(blocking=False)  # ocupa a única vaga
+    try:
+        response = client.post('/api/auth/login', json={'username': 'cifrado', 'password': 'cifrado123'})
+    finally:
+        pool.vagas.release()
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+def test_pool_limita_pendentes():
+    pool = PoolSenhas(workers=1, fila=1)
+    liberar = threading.Event()
+    threads = [threading.Thread(target=pool.executar, args=(liberar.wait,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    while pool.vagas._value:
+        pass
+    with pytest.raises(FilaSenhasCheia):
+        pool.executar(lambda: None)
+    liberar.set()
+    for thread in threads:
+        thread.join()
+    assert pool.executar(lambda: 42) == 42
@@ -0,0 +1,94 @@
+import json
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from app import create_app, db
+from app.models import User, Visita, Loja, Potencia, Rito, Oriente, Sessao, Grau
+from app.utils import serializacao
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "serializacao.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+def _visita(**campos):
+    loja = Loja(id=3, nome='Loja "Aurora" \\ Nº 1', numero='1', potencia_id=1, rito_id=2, oriente_id=4, user_id=5,
+                potencia=Potencia(id=1, nome='Grande Oriente', sigla='GOB'),
+                rito=Rito(id=2, nome='Rito Escocês', descricao=None),
+                oriente=Oriente(id=4, nome='São Paulo', uf='SP'))
+    dados = dict(id=7, data_visita=date(2024, 5, 1), loja_id=3, sessao_id=6, grau_id=8, rito_id=2, potencia_id=1,
+                 prancha_presenca=True, possui_certificado=False, registro_loja=None, data_entrega_certificado=None,
+                 certificado_scaniado=False, observacoes='Linha 1\nLinha 2\t😀 </script>', user_id=5, loja=loja,
+                 sessao=Sessao(id=6, descricao='Sessão Magna'), grau=Grau(id=8, numero=3, descricao='Mestre'), rito=loja.rito,
+                 potencia=loja.potencia)
+    dados.update(campos)
+    return Visita(**dados)
+
+@pytest.mark.parametrize('campos', [
+    {},
+    {'observacoes': None, 'data_entrega_certificado': date(2024, 6, 2), 'registro_loja': True},
+    {'loja': None, 'sessao': None, 'grau': None, 'rito': None, 'potencia': None, 'certificado_sha256': 'ab' * 32}
+])
+def test_serializador_igual_ao_to_dict(campos):
+    visita = _visita(**campos)
+    assert json.loads(visita.to_json()) == visita.to_dict()
+    assert list(json.loads(visita.to_json())) == list(visita.to_dict())
+    if visita.loja:
+        assert json.loads(Loja.to_json(visita.loja)) == visita.loja.to_dict()
+
+def test_serializador_com_atributos_nao_carregados():
+    # Atributos ausentes do __dict__ (nunca atribuídos ou expirados) passam pelo getattr
+    visita = Visita(id=1, data_visita=date(2024, 1, 1))
+    assert 'observacoes' not in visita.__dict__
+    assert json.loads(visita.to_json()) == visita.to_dict()
+
+def test_lista_e_resposta(client):
+    visitas = [_visita(id=i) for i in range(3)]
+    resposta = serializacao.resposta({'items': serializacao.lista(Visita.to_json, visitas), 'next_cursor': None, 'total': 3})
+    assert resposta.mimetype == 'application/json'
+    assert json.loads(resposta.get_data()) == {
+        'items': [visita.to_dict() for visita in visitas],
+        'next_cursor': None,
+        'total': 3
+    }
+    assert json.loads(serializacao.resposta(serializacao.lista(Visita.to_json, [])).get_data()) == []
+
+@pytest.mark.parametrize('orjson', [True, False])
+def test_provedor_com_e_sem_orjson(orjson):
+    app = create_app({'JSON_ORJSON': orjson})
+    assert (app.json.orjson is not None) == (orjson and serializacao.orjson is not None)
+    dados = {'data': date(2024, 1, 2), 'momento': datetime(2024, 1, 2, 3, 4, 5), 'valor': Decimal('1.50'),
+             'texto': 'Oriente de São Paulo', 1: 'chave numérica'}
+    with app.test_request_context():
+        corpo = app.json.response(dados).get_data(as_text=True)
+    assert json.loads(corpo) == {'data': '2024-01-02', 'momento': '2024-01-02T03:04:05', 'valor': '1.50',
+                                 'texto': 'Oriente de São Paulo', '1': 'chave numérica'}
+    assert 'São' in corpo
+    assert app.json.loads(b'{"a": [1, 2]}') == {'a': [1, 2]}
+
+def test_listagem_de_visitas(client):
+    user = User(username='visitante', email='visitante@test.com', is_admin=False)
+    user.set_password('visitante123')
+    db.session.add(user)
+    db.session.flush()
+    visita = _visita(user_id=user.id)
+    visita.loja.user_id = user.id
+    db.session.add(visita)
+    db.session.commit()
+    token = client.post('/api/auth/login', json={'username': 'visitante', 'password': 'visitante123'}).json['access_token']
+
+    response = client.get('/api/visitas?total=1', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert response.json == {'items': [visita.to_dict()], 'next_cursor': None, 'has_more': False, 'total': 1}
+    response = client.get('/api/lojas', headers={'Authorization': f'Bearer {token}'})
+    assert response.json == [visita.loja.to_dict()]
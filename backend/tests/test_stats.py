@@ -0,0 +1,96 @@
+import pytest
+from app import create_app, db
+from app.models import User, Loja, Potencia, Rito, Oriente, Sessao, Grau
+from app.utils import estatisticas
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "stats.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+@pytest.fixture
+def token(client):
+    user = User(username='estatistico', email='estatistico@test.com', is_admin=False)
+    user.set_password('estatistico123')
+    db.session.add(user)
+    db.session.commit()
+    response = client.post('/api/auth/login', json={
+        'username': 'estatistico',
+        'password': 'estatistico123'
+    })
+    assert response.status_code == 200
+    return response.json['access_token']
+
+@pytest.fixture
+def visita(client, token):
+    user = User.query.filter_by(username='estatistico').first()
+    potencia = Potencia(nome='Potência Estatística', sigla='PE')
+    rito = Rito(nome='Rito Estatístico')
+    oriente = Oriente(nome='Santos', uf='SP')
+    sessao = Sessao(descricao='Sessão Estatística')
+    grau = Grau(numero=1, descricao='Aprendiz Estatístico')
+    db.session.add_all([potencia, rito, oriente, sessao, grau])
+    db.session.flush()
+    lojas = [Loja(nome=f'Loja Estatística {i}', numero=str(i), potencia_id=potencia.id,
+                  rito_id=rito.id, oriente_id=oriente.id, user_id=user.id) for i in range(2)]
+    db.session.add_all(lojas)
+    db.session.commit()
+    return {
+        'data_visita': '2024-01-10',
+        'loja_id': lojas[0].id,
+        'sessao_id': sessao.id,
+        'grau_id': grau.id,
+        'rito_id': rito.id,
+        'potencia_id': potencia.id,
+        'possui_certificado': False,
+        'outra_loja_id': lojas[1].id
+    }
+
+def test_stats_incremental_matches_rebuild(client, token, visita):
+    headers = {'Authorization': f'Bearer {token}'}
+    dados = {k: v for k, v in visita.items() if k != 'outra_loja_id'}
+
+    primeira = client.post('/api/visitas', json=dados, headers=headers).json['id']
+    client.post('/api/visitas', json={**dados, 'data_visita': '2024-02-05', 'possui_certificado': True},
+                headers=headers)
+    removida = client.post('/api/visitas', json=dados, headers=headers).json['id']
+    client.put(f'/api/visitas/{primeira}',
+               json={**dados, 'loja_id': visita['outra_loja_id'], 'possui_certificado': True},
+               headers=headers)
+    client.delete(f'/api/visitas/{removida}', headers=headers)
+    response = client.post('/api/visitas/batch', json={'operations': [
+        {'op': 'create', 'data': {**dados, 'data_visita': '2024-03-01'}}
+    ]}, headers=headers)
+    assert response.status_code == 200
+
+    incremental = client.get('/api/stats', headers=headers).json
+    assert incremental['total_visitas'] == 3
+    assert incremental['certificados_pendentes'] == 1
+    assert incremental['lojas_visitadas'] == 2
+    assert incremental['por_mes'] == [
+        {'mes': '2024-01', 'total': 1},
+        {'mes': '2024-02', 'total': 1},
+        {'mes': '2024-03', 'total': 1}
+    ]
+    assert incremental['por_potencia'] == [
+        {'id': visita['potencia_id'], 'nome': 'Potência Estatística', 'total': 3}
+    ]
+
+    estatisticas.rebuild()
+    assert client.get('/api/stats', headers=headers).json == incremental
+
+def test_stats_empty(client, token):
+    response = client.get('/api/stats', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert response.json['total_visitas'] == 0
+    assert response.json['por_loja'] == []
@@ -0,0 +1,95 @@
+import uuid
+from datetime import timedelta
+import pytest
+from app import create_app, db
+from app.models import User, TokenRevogado
+from app.utils import senhas
+from app.utils.revogacao import BloomFilter
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "tokens.db"}',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:2000'
+    })
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='renovador', email='renovador@test.com', is_admin=False)
+            user.set_password('renovador123')
+            db.session.add(user)
+            db.session.commit()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+@pytest.fixture
+def tokens(client):
+    response = client.post('/api/auth/login', json={'username': 'renovador', 'password': 'renovador123'})
+    assert response.status_code == 200
+    return response.json
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def test_access_token_curto(app):
+    assert app.config['JWT_ACCESS_TOKEN_EXPIRES'] == timedelta(minutes=15)
+    assert app.config['JWT_REFRESH_TOKEN_EXPIRES'] == timedelta(days=30)
+
+def test_validades_configuraveis(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "validades.db"}',
+        'JWT_ACCESS_TOKEN_EXPIRES': timedelta(minutes=5),
+        'JWT_REFRESH_TOKEN_EXPIRES': timedelta(days=1)
+    })
+    assert app.config['JWT_ACCESS_TOKEN_EXPIRES'] == timedelta(minutes=5)
+    assert app.config['JWT_REFRESH_TOKEN_EXPIRES'] == timedelta(days=1)
+
+def test_refresh_sem_hash_de_senha(client, tokens, monkeypatch):
+    def hash_proibido(*args):
+        raise AssertionError('refresh não deve verificar senha')
+    monkeypatch.setattr(senhas, 'verificar', hash_proibido)
+
+    response = client.post('/api/auth/refresh', headers=bearer(tokens['refresh_token']))
+    assert response.status_code == 200
+    novo = response.json['access_token']
+    assert client.get('/api/graus', headers=bearer(novo)).status_code == 200
+
+def test_refresh_exige_refresh_token(client, tokens):
+    response = client.post('/api/auth/refresh', headers=bearer(tokens['access_token']))
+    assert response.status_code == 422
+
+def test_logout_revoga_access_e_refresh(client, tokens):
+    response = client.post('/api/auth/logout', headers=bearer(tokens['access_token']),
+                           json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+    assert TokenRevogado.query.count() == 2
+
+    assert client.get('/api/graus', headers=bearer(tokens['access_token'])).status_code == 401
+    assert client.post('/api/auth/refresh', headers=bearer(tokens['refresh_token'])).status_code == 401
+
+def test_revogacao_vista_por_outro_worker(app, client, tokens):
+    outro = create_app({
+        'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI'],
+        'JWT_DENYLIST_SYNC': 0
+    })
+    outro.config['TESTING'] = True
+    cliente_outro = outro.test_client()
+    # Aquece o filtro do outro worker antes da revogação
+    assert cliente_outro.get('/api/graus', headers=bearer(tokens['access_token'])).status_code == 200
+    client.post('/api/auth/logout', headers=bearer(tokens['access_token']))
+    assert cliente_outro.get('/api/graus', headers=bearer(tokens['access_token'])).status_code == 401
+
+def test_bloom_filter():
+    filtro = BloomFilter(capacidade=10000, taxa_erro=0.01)
+    presentes = [str(uuid.uuid4()) for _ in range(10000)]
+    for jti in presentes:
+        filtro.add(jti)
+    assert all(jti in filtro for jti in presentes)
+    falsos = sum(str(uuid.uuid4()) in filtro for _ in range(10000))
+    assert falsos < 300
@@ -0,0 +1,449 @@
+import pytest
+from contextlib import contextmanager
+from datetime import date, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Visita, Loja, Potencia, Rito, Oriente, Sessao, Grau
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "visita.db"}'})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+@pytest.fixture
+def regular_user(app, client):
+    user = User(username='visitante', email='visitante@test.com', is_admin=False)
+    user.set_password('visitante123')
+    outro = User(username='outro', email='outro@test.com', is_admin=False)
+    outro.set_password('outro123')
+    db.session.add_all([user, outro])
+    db.session.commit()
+    return user.id
+
+@pytest.fixture
+def token(client, regular_user):
+    response = client.post('/api/auth/login', json={
+        'username': 'visitante',
+        'password': 'visitante123'
+    })
+    assert response.status_code == 200
+    return response.json['access_token']
+
+@pytest.fixture
+def dominio(app, client, regular_user):
+    potencia = Potencia(nome='Potência Teste', sigla='PT')
+    rito = Rito(nome='Rito Teste')
+    oriente = Oriente(nome='Campinas', uf='SP')
+    sessao = Sessao(descricao='Sessão Teste')
+    grau = Grau(numero=1, descricao='Aprendiz Teste')
+    db.session.add_all([potencia, rito, oriente, sessao, grau])
+    db.session.flush()
+    lojas = [
+        Loja(nome=f'Loja {i}', numero=str(i), potencia_id=potencia.id, rito_id=rito.id,
+             oriente_id=oriente.id, user_id=regular_user)
+        for i in range(2)
+    ]
+    db.session.add_all(lojas)
+    db.session.commit()
+    return {
+        'potencia_id': potencia.id,
+        'rito_id': rito.id,
+        'sessao_id': sessao.id,
+        'grau_id': grau.id,
+        'loja_ids': [loja.id for loja in lojas]
+    }
+
+def criar_visitas(user_id, dominio, quantidade, inicio=date(2024, 1, 1)):
+    visitas = [
+        Visita(
+            data_visita=inicio + timedelta(days=i // 2),
+            loja_id=dominio['loja_ids'][i % 2],
+            sessao_id=dominio['sessao_id'],
+            grau_id=dominio['grau_id'],
+            rito_id=dominio['rito_id'],
+            potencia_id=dominio['potencia_id'],
+            user_id=user_id
+        )
+        for i in range(quantidade)
+    ]
+    db.session.add_all(visitas)
+    db.session.commit()
+    return [visita.id for visita in visitas]
+
+@contextmanager
+def contar_queries():
+    queries = []
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        # A lista de revogação sincroniza no máximo a cada JWT_DENYLIST_SYNC segundos
+        if 'tokens_revogados' not in statement:
+            queries.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield queries
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+def test_list_visitas_paginated(client, token, regular_user, dominio):
+    ids = criar_visitas(regular_user, dominio, 7)
+
+    vistos = []
+    cursor = None
+    while True:
+        params = {'limite': 3}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/api/visitas', query_string=params,
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        assert response.status_code == 200
+        vistos.extend(item['id'] for item in response.json['items'])
+        assert len(response.json['items']) <= 3
+        if not response.json['has_more']:
+            assert response.json['next_cursor'] is None
+            break
+        cursor = response.json['next_cursor']
+
+    # Ordem decrescente por (data_visita, id), sem repetições nem lacunas
+    esperados = [v.id for v in Visita.query.filter(Visita.id.in_(ids))
+                 .order_by(Visita.data_visita.desc(), Visita.id.desc())]
+    assert vistos == esperados
+
+def test_list_visitas_only_own(client, token, regular_user, dominio):
+    criar_visitas(regular_user, dominio, 2)
+    outro = User.query.filter_by(username='outro').first()
+    criar_visitas(outro.id, dominio, 3)
+
+    response = client.get('/api/visitas', query_string={'total': 1},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 200
+    assert response.json['total'] == 2
+    assert all(item['user_id'] == regular_user for item in response.json['items'])
+
+def test_list_visitas_filters(client, token, regular_user, dominio):
+    criar_visitas(regular_user, dominio, 6)
+
+    response = client.get('/api/visitas', query_string={
+            'loja_id': dominio['loja_ids'][0],
+            'data_inicio': '2024-01-02',
+            'total': 1
+        },
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 200
+    assert response.json['total'] == 2
+    for item in response.json['items']:
+        assert item['loja_id'] == dominio['loja_ids'][0]
+        assert item['data_visita'] >= '2024-01-02'
+
+def test_list_visitas_invalid_params(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/visitas?cursor=invalido', headers=headers).status_code == 400
+    assert client.get('/api/visitas?data_inicio=01/01/2024', headers=headers).status_code == 400
+    assert client.get('/api/visitas?loja_id=abc', headers=headers).status_code == 400
+
+def test_list_visitas_query_count_constant(client, token, regular_user, dominio):
+    headers = {'Authorization': f'Bearer {token}'}
+    criar_visitas(regular_user, dominio, 2)
+    db.session.expunge_all()
+    with contar_queries() as poucas:
+        response = client.get('/api/visitas', headers=headers)
+    assert len(response.json['items']) == 2
+
+    criar_visitas(regular_user, dominio, 20, inicio=date(2023, 1, 1))
+    db.session.expunge_all()
+    with contar_queries() as muitas:
+        response = client.get('/api/visitas', headers=headers)
+    assert len(response.json['items']) == 22
+    assert response.json['items'][0]['loja']['oriente']['nome'] == 'Campinas'
+
+    assert len(muitas) == len(poucas)
+
+def test_get_visita_single_query(client, token, regular_user, dominio):
+    id = criar_visitas(regular_user, dominio, 1)[0]
+    db.session.expunge_all()
+    with contar_queries() as queries:
+        response = client.get(f'/api/visitas/{id}',
+            headers={'Authorization': f'Bearer {token}'}
+        )
+    assert response.status_code == 200
+    assert response.json['loja']['potencia']['sigla'] == 'PT'
+    assert len(queries) == 1
+
+def test_export_visitas_csv(client, token, regular_user, dominio):
+    criar_visitas(regular_user, dominio, 5)
+    outro = User.query.filter_by(username='outro').first()
+    criar_visitas(outro.id, dominio, 2)
+
+    with contar_queries() as queries:
+        response = client.get('/api/visitas/export?format=csv',
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        linhas = response.get_data(as_text=True).splitlines()
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert linhas[0].startswith('id,data_visita,loja,loja_numero')
+    assert len(linhas) == 6
+    assert 'Loja 0' in linhas[1] and 'Potência Teste' in linhas[1]
+    # Nomes relacionados vêm do JOIN, sem consultas por linha
+    assert len(queries) == 1
+
+def test_export_visitas_ndjson_filtered(client, token, regular_user, dominio):
+    import json
+    criar_visitas(regular_user, dominio, 6)
+
+    response = client.get('/api/visitas/export', query_string={
+            'format': 'ndjson',
+            'loja_id': dominio['loja_ids'][1]
+        },
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 200
+    registros = [json.loads(linha) for linha in response.get_data(as_text=True).splitlines()]
+    assert len(registros) == 3
+    assert all(registro['loja'] == 'Loja 1' for registro in registros)
+    assert registros[0]['data_visita'] == '2024-01-01'
+
+def test_export_visitas_invalid_format(client, token):
+    response = client.get('/api/visitas/export?format=xml',
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 400
+
+def test_import_visitas_csv(client, token, regular_user, dominio):
+    import io
+    loja = dominio['loja_ids'][0]
+    ids = f"{dominio['sessao_id']},{dominio['grau_id']},{dominio['rito_id']},{dominio['potencia_id']}"
+    conteudo = '\n'.join([
+        'data_visita,loja_id,sessao_id,grau_id,rito_id,potencia_id,possui_certificado,observacoes',
+        f'2024-02-01,{loja},{ids},sim,Primeira',
+        f'2024-02-02,{loja},{ids},nao,Segunda',
+        f'02/03/2024,{loja},{ids},nao,Data errada',
+        f'2024-02-04,999999,{ids},nao,Loja inexistente',
+    ])
+    response = client.post('/api/visitas/import',
+        data={'arquivo': (io.BytesIO(conteudo.encode()), 'visitas.csv')},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 200
+    assert response.json['accepted'] == 2
+    assert response.json['rejected_count'] == 2
+    assert [r['line'] for r in response.json['rejected']] == [4, 5]
+    assert 'loja_id 999999' in response.json['rejected'][1]['reason']
+
+    visitas = Visita.query.filter_by(user_id=regular_user).order_by(Visita.data_visita).all()
+    assert [v.observacoes for v in visitas] == ['Primeira', 'Segunda']
+    assert visitas[0].possui_certificado is True
+
+def test_import_visitas_ndjson_body(client, token, regular_user, dominio):
+    import json
+    registro = {
+        'data_visita': '2024-03-01',
+        'loja_id': dominio['loja_ids'][1],
+        'sessao_id': dominio['sessao_id'],
+        'grau_id': dominio['grau_id'],
+        'rito_id': dominio['rito_id'],
+        'potencia_id': dominio['potencia_id']
+    }
+    corpo = '\n'.join([json.dumps(registro), '{quebrado', '', json.dumps(registro)])
+    response = client.post('/api/visitas/import', data=corpo,
+        content_type='application/x-ndjson',
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 200
+    assert response.json['accepted'] == 2
+    assert response.json['rejected'] == [{'line': 2, 'reason': 'JSON inválido'}]
+    assert Visita.query.filter_by(user_id=regular_user).count() == 2
+
+def test_import_visitas_rejects_invalid_types(client, token, regular_user, dominio):
+    import json
+    registro = {
+        'data_visita': '2024-03-01',
+        'loja_id': dominio['loja_ids'][1],
+        'sessao_id': dominio['sessao_id'],
+        'grau_id': dominio['grau_id'],
+        'rito_id': dominio['rito_id'],
+        'potencia_id': dominio['potencia_id']
+    }
+    corpo = '\n'.join(json.dumps(r) for r in [
+        registro,
+        {**registro, 'observacoes': ['lista']},
+        {**registro, 'sessao_id': True},
+        {**registro, 'loja_id': dominio['loja_ids'][1] + 0.9},
+        {**registro, 'grau_id': str(dominio['grau_id'])}
+    ])
+    response = client.post('/api/visitas/import', data=corpo,
+        content_type='application/x-ndjson',
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 200
+    assert response.json['accepted'] == 2
+    assert response.json['rejected'] == [
+        {'line': 2, 'reason': 'O campo observacoes deve ser texto'},
+        {'line': 3, 'reason': 'O campo sessao_id deve ser um valor inteiro'},
+        {'line': 4, 'reason': 'O campo loja_id deve ser um valor inteiro'}
+    ]
+
+def test_import_visitas_database_error(client, token, regular_user, dominio, monkeypatch):
+    import json
+    from sqlalchemy.exc import OperationalError
+    from app.routes import visita_routes
+    registro = {
+        'data_visita': '2024-03-01',
+        'loja_id': dominio['loja_ids'][1],
+        'sessao_id': dominio['sessao_id'],
+        'grau_id': dominio['grau_id'],
+        'rito_id': dominio['rito_id'],
+        'potencia_id': dominio['potencia_id']
+    }
+    inserir = visita_routes._inserir_lote
+    lotes = []
+    def falhar_no_segundo(lote):
+        lotes.append(lote)
+        if len(lotes) > 1:
+            raise OperationalError('INSERT', {}, Exception('database is locked'))
+        inserir(lote)
+    monkeypatch.setattr(visita_routes, 'LOTE_IMPORTACAO', 2)
+    monkeypatch.setattr(visita_routes, '_inserir_lote', falhar_no_segundo)
+
+    corpo = '\n'.join(json.dumps(registro) for _ in range(3))
+    response = client.post('/api/visitas/import', data=corpo,
+        content_type='application/x-ndjson',
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 500
+    assert response.json['error'] == 'Erro ao gravar as visitas'
+    assert response.json['accepted'] == 2
+    assert Visita.query.filter_by(user_id=regular_user).count() == 2
+
+def test_batch_visitas(client, token, regular_user, dominio):
+    atualizar, remover = criar_visitas(regular_user, dominio, 2)
+    dados = {
+        'data_visita': '2024-05-01',
+        'loja_id': dominio['loja_ids'][1],
+        'sessao_id': dominio['sessao_id'],
+        'grau_id': dominio['grau_id'],
+        'rito_id': dominio['rito_id'],
+        'potencia_id': dominio['potencia_id'],
+        'observacoes': 'Lote'
+    }
+    with contar_queries() as queries:
+        response = client.post('/api/visitas/batch', json={'operations': [
+                {'op': 'create', 'data': dados},
+                {'op': 'create', 'data': {**dados, 'observacoes': 'Lote 2'}},
+                {'op': 'update', 'id': atualizar, 'data': {**dados, 'observacoes': 'Atualizada'}},
+                {'op': 'delete', 'id': remover}
+            ]},
+            headers={'Authorization': f'Bearer {token}'}
+        )
+    assert response.status_code == 200
+    resultados = response.json['results']
+    assert [r['status'] for r in resultados] == ['ok'] * 4
+    assert resultados[2]['id'] == atualizar
+
+    db.session.expunge_all()
+    assert db.session.get(Visita, remover) is None
+    assert db.session.get(Visita, atualizar).observacoes == 'Atualizada'
+    assert db.session.get(Visita, resultados[0]['id']).observacoes == 'Lote'
+    assert db.session.get(Visita, resultados[1]['id']).observacoes == 'Lote 2'
+    # Atualizações e exclusões em uma instrução cada, tudo em um único commit
+    assert len([q for q in queries if q.lstrip().startswith('UPDATE')]) == 1
+    assert len([q for q in queries if q.lstrip().startswith('DELETE')]) == 1
+
+def test_batch_visitas_is_atomic(client, token, regular_user, dominio):
+    proprias = criar_visitas(regular_user, dominio, 1)
+    outro = User.query.filter_by(username='outro').first()
+    alheia = criar_visitas(outro.id, dominio, 1)[0]
+
+    response = client.post('/api/visitas/batch', json={'operations': [
+            {'op': 'delete', 'id': proprias[0]},
+            {'op': 'delete', 'id': alheia}
+        ]},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 400
+    assert [r['status'] for r in response.json['results']] == ['skipped', 'rejected']
+    assert response.json['results'][1]['error'] == 'Visita não encontrada'
+    assert db.session.get(Visita, proprias[0]) is not None
+    assert db.session.get(Visita, alheia) is not None
+
+def test_batch_visitas_rejects_invalid_types(client, token, regular_user, dominio):
+    visitas = criar_visitas(regular_user, dominio, 2)
+    dados = {
+        'data_visita': '2024-05-01',
+        'loja_id': dominio['loja_ids'][1],
+        'sessao_id': dominio['sessao_id'],
+        'grau_id': dominio['grau_id'],
+        'rito_id': dominio['rito_id'],
+        'potencia_id': dominio['potencia_id']
+    }
+    response = client.post('/api/visitas/batch', json={'operations': [
+            {'op': 'delete', 'id': True},
+            {'op': 'update', 'id': visitas[1], 'data': {**dados, 'observacoes': {'texto': 'x'}}}
+        ]},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 400
+    resultados = response.json['results']
+    assert [r['status'] for r in resultados] == ['rejected', 'rejected']
+    assert resultados[0]['error'] == 'O campo id é obrigatório'
+    assert resultados[1]['error'] == 'O campo observacoes deve ser texto'
+    assert Visita.query.filter_by(user_id=regular_user).count() == 2
+
+def test_list_visitas_not_modified(client, token, regular_user, dominio):
+    headers = {'Authorization': f'Bearer {token}'}
+    atualizar, remover = criar_visitas(regular_user, dominio, 2)
+    response = client.get('/api/visitas', headers=headers)
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    # 304 só com a consulta do validador, sem carregar visitas
+    db.session.expunge_all()
+    with contar_queries() as queries:
+        response = client.get('/api/visitas', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert len([q for q in queries if 'FROM visitas' in q]) == 1
+
+    # Os filtros fazem parte do ETag
+    response = client.get(f"/api/visitas?loja_id={dominio['loja_ids'][0]}", headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+
+    # Alterações no mesmo segundo, remoções e inserções mudam o ETag
+    vistos = {etag}
+    dados = {
+        'data_visita': '2024-05-01', 'loja_id': dominio['loja_ids'][1], 'sessao_id': dominio['sessao_id'],
+        'grau_id': dominio['grau_id'], 'rito_id': dominio['rito_id'], 'potencia_id': dominio['potencia_id']
+    }
+    for operacao in (
+        {'op': 'update', 'id': atualizar, 'data': {**dados, 'observacoes': 'Primeira'}},
+        {'op': 'update', 'id': atualizar, 'data': {**dados, 'observacoes': 'Segunda'}},
+        {'op': 'delete', 'id': remover},
+        {'op': 'create', 'data': dados}
+    ):
+        assert client.post('/api/visitas/batch', json={'operations': [operacao]}, headers=headers).status_code == 200
+        response = client.get('/api/visitas', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert etag not in vistos
+        vistos.add(etag)
+
+    # Dados aninhados: renomear a loja também muda o ETag
+    response = client.put(f"/api/lojas/{dominio['loja_ids'][1]}", headers=headers, json={
+        'nome': 'Loja Renomeada', 'numero': '1', 'potencia_id': dominio['potencia_id'],
+        'rito_id': dominio['rito_id'], 'oriente_nome': 'Campinas', 'oriente_uf': 'SP'
+    })
+    assert response.status_code == 200
+    response = client.get('/api/visitas', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['items'][0]['loja']['nome'] == 'Loja Renomeada'
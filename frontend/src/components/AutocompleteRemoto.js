@@ -0,0 +1,58 @@
+import React, { useState, useEffect } from 'react';
+import { Autocomplete, TextField } from '@mui/material';
+import api from '../services/api';
+
+// Busca as opções por prefixo no servidor (/api/autocomplete/...) conforme o
+// usuário digita, em vez de baixar a tabela inteira para o formulário.
+const AutocompleteRemoto = ({ url, label, value, onChange, onInputChange, getOptionLabel, renderOption, freeSolo = false, limite = 10 }) => {
+  const [opcoes, setOpcoes] = useState([]);
+  const [texto, setTexto] = useState('');
+  const [carregando, setCarregando] = useState(false);
+
+  useEffect(() => {
+    let ativo = true;
+    // Espera o usuário parar de digitar antes de consultar
+    const timer = setTimeout(async () => {
+      setCarregando(true);
+      try {
+        const response = await api.get(url, { params: { q: texto, limite } });
+        if (ativo) {
+          setOpcoes(response.data);
+        }
+      } catch (error) {
+        console.error(`Erro ao buscar opções de ${url}:`, error);
+      } finally {
+        if (ativo) {
+          setCarregando(false);
+        }
+      }
+    }, 150);
+    return () => {
+      ativo = false;
+      clearTimeout(timer);
+    };
+  }, [url, texto, limite]);
+
+  return (
+    <Autocomplete
+      freeSolo={freeSolo}
+      value={value}
+      options={opcoes}
+      loading={carregando}
+      filterOptions={(x) => x}
+      getOptionLabel={(opcao) => (typeof opcao === 'string' ? opcao : getOptionLabel(opcao))}
+      isOptionEqualToValue={(opcao, valor) => opcao.id === valor.id}
+      renderOption={renderOption}
+      onChange={(event, novo) => onChange(novo)}
+      onInputChange={(event, novoTexto) => {
+        setTexto(novoTexto);
+        if (onInputChange) {
+          onInputChange(novoTexto);
+        }
+      }}
+      renderInput={(params) => <TextField {...params} label={label} fullWidth />}
+    />
+  );
+};
+
+export default AutocompleteRemoto;
@@ -11,7 +11,6 @@ export const AuthProvider = ({ children }) => {
   useEffect(() => {
     const token = storage.getItem('token');
     const storedUser = storage.getItem('user');
-    console.log('Token encontrado no storage:', token);
     console.log('Usuário encontrado no storage:', storedUser);
     
     if (token && storedUser) {
@@ -23,6 +22,7 @@ export const AuthProvider = ({ children }) => {
       } catch (error) {
         console.error('Erro ao parsear dados do usuário:', error);
         storage.removeItem('token');
+        storage.removeItem('refresh_token');
         storage.removeItem('user');
         delete api.defaults.headers.common['Authorization'];
       }
@@ -33,7 +33,7 @@ export const AuthProvider = ({ children }) => {
   const login = async (username, password) => {
     console.log('Iniciando login com:', { username });
     try {
-      console.log('Enviando requisição para /auth/login com:', { username, password });
+      console.log('Enviando requisição para /auth/login com:', { username });
       const response = await api.post('/auth/login', { username, password });
       console.log('Resposta completa do login:', response);
       console.log('Resposta do login:', response.data);
@@ -43,7 +43,7 @@ export const AuthProvider = ({ children }) => {
         throw new Error('Token não encontrado na resposta');
       }
       
-      const { access_token, user } = response.data;
+      const { access_token, refresh_token, user } = response.data;
       
       if (!user || !user.id) {
         console.error('Dados do usuário inválidos na resposta');
@@ -51,9 +51,9 @@ export const AuthProvider = ({ children }) => {
       }
       
       storage.setItem('token', access_token);
+      storage.setItem('refresh_token', refresh_token);
       storage.setItem('user', JSON.stringify(user));
       api.defaults.headers.common['Authorization'] = `Bearer ${access_token}`;
-      console.log('Token armazenado:', access_token);
       console.log('Usuário armazenado:', user);
       setUser(user);
     } catch (error) {
@@ -97,8 +97,16 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
-  const logout = () => {
+  const logout = async () => {
+    // Revoga os tokens no servidor; a sessão local é encerrada mesmo se falhar
+    const refresh_token = storage.getItem('refresh_token');
+    try {
+      await api.post('/auth/logout', { refresh_token });
+    } catch (error) {
+      console.error('Erro ao revogar tokens no logout:', error.message);
+    }
     storage.removeItem('token');
+    storage.removeItem('refresh_token');
     storage.removeItem('user');
     delete api.defaults.headers.common['Authorization'];
     setUser(null);
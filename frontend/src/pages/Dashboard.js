@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { 
   Grid, 
   Paper, 
@@ -7,9 +7,17 @@ import {
   Button
 } from '@mui/material';
 import { useNavigate } from 'react-router-dom';
+import api from '../services/api';
 
 const Dashboard = () => {
   const navigate = useNavigate();
+  const [stats, setStats] = useState(null);
+
+  useEffect(() => {
+    api.get('/stats')
+      .then((response) => setStats(response.data))
+      .catch((error) => console.error('Erro ao carregar estatísticas:', error));
+  }, []);
 
   return (
     <Box sx={{ flexGrow: 1 }}>
@@ -25,6 +33,21 @@ const Dashboard = () => {
           </Paper>
         </Grid>
 
+        {stats && (
+          <Grid item xs={12}>
+            <Paper sx={{ p: 2 }}>
+              <Typography variant="h6" gutterBottom>
+                Resumo
+              </Typography>
+              <Box sx={{ display: 'flex', gap: 4, flexWrap: 'wrap' }}>
+                <Typography variant="body1">Visitas: {stats.total_visitas}</Typography>
+                <Typography variant="body1">Lojas visitadas: {stats.lojas_visitadas}</Typography>
+                <Typography variant="body1">Certificados pendentes: {stats.certificados_pendentes}</Typography>
+              </Box>
+            </Paper>
+          </Grid>
+        )}
+
         <Grid item xs={12} md={6}>
           <Paper sx={{ p: 2 }}>
             <Typography variant="h6" gutterBottom>
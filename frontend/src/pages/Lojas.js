@@ -24,6 +24,7 @@ import {
 } from '@mui/material';
 import { Edit as EditIcon, Delete as DeleteIcon } from '@mui/icons-material';
 import api from '../services/api';
+import AutocompleteRemoto from '../components/AutocompleteRemoto';
 
 const estados = [
   { uf: 'AC', nome: 'Acre' },
@@ -59,7 +60,6 @@ const Lojas = () => {
   const [lojas, setLojas] = useState([]);
   const [potencias, setPotencias] = useState([]);
   const [ritos, setRitos] = useState([]);
-  const [orientes, setOrientes] = useState([]);
   const [openDialog, setOpenDialog] = useState(false);
   const [editingLoja, setEditingLoja] = useState(null);
   const [formData, setFormData] = useState({
@@ -73,9 +73,7 @@ const Lojas = () => {
 
   useEffect(() => {
     loadLojas();
-    loadPotencias();
-    loadRitos();
-    loadOrientes();
+    loadReferencias();
   }, []);
 
   const loadLojas = async () => {
@@ -87,30 +85,15 @@ const Lojas = () => {
     }
   };
 
-  const loadPotencias = async () => {
+  // Potências e ritos são listas curtas: vêm juntas, em uma requisição só.
+  // Os orientes são buscados por prefixo enquanto o usuário digita.
+  const loadReferencias = async () => {
     try {
-      const response = await api.get('/potencias');
-      setPotencias(response.data);
+      const response = await api.get('/lookups', { params: { include: 'potencias,ritos' } });
+      setPotencias(response.data.potencias);
+      setRitos(response.data.ritos);
     } catch (error) {
-      console.error('Erro ao carregar potências:', error);
-    }
-  };
-
-  const loadRitos = async () => {
-    try {
-      const response = await api.get('/ritos');
-      setRitos(response.data);
-    } catch (error) {
-      console.error('Erro ao carregar ritos:', error);
-    }
-  };
-
-  const loadOrientes = async () => {
-    try {
-      const response = await api.get('/orientes');
-      setOrientes(response.data);
-    } catch (error) {
-      console.error('Erro ao carregar orientes:', error);
+      console.error('Erro ao carregar potências e ritos:', error);
     }
   };
 
@@ -279,11 +262,21 @@ const Lojas = () => {
                 ))}
               </Select>
             </FormControl>
-            <TextField
+            <AutocompleteRemoto
+              url="/autocomplete/orientes"
               label="Nome do Oriente"
+              freeSolo
               value={formData.oriente_nome}
-              onChange={(e) => setFormData({ ...formData, oriente_nome: e.target.value })}
-              fullWidth
+              getOptionLabel={(oriente) => oriente.nome}
+              renderOption={(props, oriente) => (
+                <li {...props} key={oriente.id}>{oriente.nome} ({oriente.uf})</li>
+              )}
+              onInputChange={(texto) => setFormData((atual) => ({ ...atual, oriente_nome: texto }))}
+              onChange={(oriente) => {
+                if (oriente && typeof oriente !== 'string') {
+                  setFormData((atual) => ({ ...atual, oriente_nome: oriente.nome, oriente_uf: oriente.uf }));
+                }
+              }}
             />
             <FormControl fullWidth>
               <InputLabel>UF</InputLabel>
@@ -25,19 +25,21 @@ import {
   Checkbox,
   FormControlLabel
 } from '@mui/material';
-import { Edit as EditIcon, Delete as DeleteIcon } from '@mui/icons-material';
+import { Edit as EditIcon, Delete as DeleteIcon, UploadFile as UploadFileIcon, Visibility as VisibilityIcon } from '@mui/icons-material';
 import { DatePicker } from '@mui/x-date-pickers/DatePicker';
 import { LocalizationProvider } from '@mui/x-date-pickers/LocalizationProvider';
 import { AdapterDateFns } from '@mui/x-date-pickers/AdapterDateFns';
 import { ptBR } from 'date-fns/locale';
 import api from '../services/api';
+import AutocompleteRemoto from '../components/AutocompleteRemoto';
 import { useLocation } from 'react-router-dom';
 
 const Visitas = () => {
   const location = useLocation();
   const isListMode = location.pathname === '/visitas/lista';
   const [visitas, setVisitas] = useState([]);
-  const [lojas, setLojas] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [lojaSelecionada, setLojaSelecionada] = useState(null);
   const [graus, setGraus] = useState([]);
   const [ritos, setRitos] = useState([]);
   const [potencias, setPotencias] = useState([]);
@@ -64,24 +66,20 @@ const Visitas = () => {
       console.log('Iniciando carregamento de dados...');
       console.log('Modo de visualização:', isListMode ? 'Lista' : 'Cadastro');
       
-      const [visitasResponse, lojasResponse, sessoesResponse, grausResponse, ritosResponse, potenciasResponse] = await Promise.all([
+      const [visitasResponse, lookupsResponse] = await Promise.all([
         api.get('/visitas'),
-        api.get('/lojas'),
-        api.get('/sessoes'),
-        api.get('/graus'),
-        api.get('/ritos'),
-        api.get('/potencias')
+        api.get('/lookups', { params: { include: 'sessoes,graus,ritos,potencias' } })
       ]);
 
       console.log('Resposta da API de visitas:', visitasResponse.data);
-      console.log('Número de visitas carregadas:', visitasResponse.data.length);
+      console.log('Número de visitas carregadas:', visitasResponse.data.items.length);
       
-      setVisitas(visitasResponse.data);
-      setLojas(lojasResponse.data);
-      setSessoes(sessoesResponse.data);
-      setGraus(grausResponse.data);
-      setRitos(ritosResponse.data);
-      setPotencias(potenciasResponse.data);
+      setVisitas(visitasResponse.data.items);
+      setNextCursor(visitasResponse.data.next_cursor);
+      setSessoes(lookupsResponse.data.sessoes);
+      setGraus(lookupsResponse.data.graus);
+      setRitos(lookupsResponse.data.ritos);
+      setPotencias(lookupsResponse.data.potencias);
       
       console.log('Dados carregados com sucesso');
     } catch (error) {
@@ -94,6 +92,34 @@ const Visitas = () => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      const response = await api.get('/visitas', { params: { cursor: nextCursor } });
+      setVisitas((atuais) => [...atuais, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Erro ao carregar mais visitas:', error);
+    }
+  };
+
+  const handleExport = async () => {
+    try {
+      const response = await api.get('/visitas/export', {
+        params: { format: 'csv' },
+        responseType: 'blob',
+        timeout: 0
+      });
+      const url = window.URL.createObjectURL(response.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'visitas.csv';
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Erro ao exportar visitas:', error);
+    }
+  };
+
   useEffect(() => {
     loadData();
   }, [isListMode]);
@@ -101,6 +127,7 @@ const Visitas = () => {
   const handleOpenDialog = (visita = null) => {
     if (visita) {
       setEditingVisita(visita);
+      setLojaSelecionada(visita.loja || null);
       setFormData({
         data_visita: new Date(visita.data_visita),
         loja_id: visita.loja_id,
@@ -117,6 +144,7 @@ const Visitas = () => {
       });
     } else {
       setEditingVisita(null);
+      setLojaSelecionada(null);
       setFormData({
         data_visita: new Date(),
         loja_id: '',
@@ -185,10 +213,42 @@ const Visitas = () => {
     }
   };
 
+  const handleUploadCertificado = async (id, arquivo) => {
+    if (!arquivo) {
+      return;
+    }
+    try {
+      // Envia o arquivo como corpo da requisição; o servidor grava em blocos
+      await api.post(`/visitas/${id}/certificado`, arquivo, {
+        headers: { 'Content-Type': arquivo.type || 'application/octet-stream' }
+      });
+      loadData();
+    } catch (error) {
+      console.error('Erro ao enviar certificado:', error);
+    }
+  };
+
+  const handleVerCertificado = async (id) => {
+    try {
+      // O download exige o token, então não dá para usar um link direto
+      const response = await api.get(`/visitas/${id}/certificado`, { responseType: 'blob' });
+      const url = URL.createObjectURL(response.data);
+      window.open(url, '_blank');
+      setTimeout(() => URL.revokeObjectURL(url), 60000);
+    } catch (error) {
+      console.error('Erro ao abrir certificado:', error);
+    }
+  };
+
   return (
     <Container>
       <Box sx={{ display: 'flex', justifyContent: 'space-between', mb: 3 }}>
         <Typography variant="h5">{isListMode ? 'Lista de Visitas' : 'Registrar Visita'}</Typography>
+        {isListMode && (
+          <Button variant="outlined" onClick={handleExport}>
+            Exportar CSV
+          </Button>
+        )}
         {!isListMode && (
           <Button 
             variant="contained" 
@@ -228,6 +288,20 @@ const Visitas = () => {
                   <TableCell>{visita.prancha_presenca ? 'Sim' : 'Não'}</TableCell>
                   <TableCell>{visita.possui_certificado ? 'Sim' : 'Não'}</TableCell>
                   <TableCell align="right">
+                    {visita.certificado_sha256 && (
+                      <IconButton onClick={() => handleVerCertificado(visita.id)} title="Ver certificado">
+                        <VisibilityIcon />
+                      </IconButton>
+                    )}
+                    <IconButton component="label" title="Enviar certificado">
+                      <UploadFileIcon color={visita.certificado_sha256 ? 'primary' : 'inherit'} />
+                      <input
+                        hidden
+                        type="file"
+                        accept="image/jpeg,image/png,image/webp,application/pdf"
+                        onChange={(e) => handleUploadCertificado(visita.id, e.target.files[0])}
+                      />
+                    </IconButton>
                     <IconButton onClick={() => handleOpenDialog(visita)}>
                       <EditIcon />
                     </IconButton>
@@ -239,6 +313,13 @@ const Visitas = () => {
               ))}
             </TableBody>
           </Table>
+          {nextCursor && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', p: 2 }}>
+              <Button variant="outlined" onClick={loadMore}>
+                Carregar mais
+              </Button>
+            </Box>
+          )}
         </TableContainer>
       ) : (
         <Dialog open={openDialog} onClose={handleCloseDialog} maxWidth="md" fullWidth>
@@ -259,20 +340,16 @@ const Visitas = () => {
                   </LocalizationProvider>
                 </Grid>
                 <Grid item xs={12} md={6}>
-                  <FormControl fullWidth>
-                    <InputLabel>Loja</InputLabel>
-                    <Select
-                      value={formData.loja_id}
-                      onChange={(e) => setFormData({ ...formData, loja_id: e.target.value })}
-                      label="Loja"
-                    >
-                      {lojas.map((loja) => (
-                        <MenuItem key={loja.id} value={loja.id}>
-                          {loja.nome}
-                        </MenuItem>
-                      ))}
-                    </Select>
-                  </FormControl>
+                  <AutocompleteRemoto
+                    url="/autocomplete/lojas"
+                    label="Loja"
+                    value={lojaSelecionada}
+                    getOptionLabel={(loja) => `${loja.nome} nº ${loja.numero}`}
+                    onChange={(loja) => {
+                      setLojaSelecionada(loja);
+                      setFormData((atual) => ({ ...atual, loja_id: loja ? loja.id : '' }));
+                    }}
+                  />
                 </Grid>
                 <Grid item xs={12} md={6}>
                   <FormControl fullWidth>
@@ -17,7 +17,6 @@ api.interceptors.request.use((config) => {
   const token = storage.getItem('token');
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
-    console.log('Token sendo enviado:', token);
     console.log('Configuração da requisição:', {
       url: config.url,
       method: config.method,
@@ -43,6 +42,35 @@ api.interceptors.request.use((config) => {
   return Promise.reject(error);
 });
 
+const limparSessao = () => {
+  storage.removeItem('token');
+  storage.removeItem('refresh_token');
+  storage.removeItem('user');
+  delete api.defaults.headers.common['Authorization'];
+  window.location.href = '/login';
+};
+
+// Uma única renovação em andamento, compartilhada pelas requisições que
+// receberem 401 ao mesmo tempo
+let renovacao = null;
+
+const renovarToken = () => {
+  if (!renovacao) {
+    const refreshToken = storage.getItem('refresh_token');
+    renovacao = axios.post(`${api.defaults.baseURL}/auth/refresh`, null, {
+      headers: { Authorization: `Bearer ${refreshToken}` },
+      withCredentials: true,
+      timeout: api.defaults.timeout
+    }).then((response) => {
+      storage.setItem('token', response.data.access_token);
+      return response.data.access_token;
+    }).finally(() => {
+      renovacao = null;
+    });
+  }
+  return renovacao;
+};
+
 // Interceptor para lidar com erros de autenticação
 api.interceptors.response.use(
   (response) => {
@@ -63,13 +91,29 @@ api.interceptors.response.use(
     
     if (error.response) {
       switch (error.response.status) {
-        case 401:
-          console.log('Token expirado ou inválido, redirecionando para login');
-          storage.removeItem('token');
-          storage.removeItem('user');
-          delete api.defaults.headers.common['Authorization'];
-          window.location.href = '/login';
+        case 401: {
+          const publicRoutes = ['/auth/login', '/auth/register', '/auth/logout'];
+          const config = error.config;
+          if (config && !config._renovado && !publicRoutes.includes(config.url) && storage.getItem('refresh_token')) {
+            // Access token expirado: renova uma vez e repete a requisição
+            config._renovado = true;
+            return renovarToken()
+              .then((token) => {
+                config.headers.Authorization = `Bearer ${token}`;
+                return api(config);
+              })
+              .catch((erroRenovacao) => {
+                console.log('Não foi possível renovar o token, redirecionando para login');
+                limparSessao();
+                return Promise.reject(erroRenovacao);
+              });
+          }
+          if (!publicRoutes.includes(config?.url)) {
+            console.log('Token expirado ou inválido, redirecionando para login');
+            limparSessao();
+          }
           break;
+        }
         case 403:
           console.error('Acesso negado:', error.response.data.error);
           break;